@@ -0,0 +1,162 @@
+"""
+End-to-end scraper throughput against the local stand-in server
+(``stand_in_server.py``): leads/s, requests per lead, p50/p99 page latency
+and peak RSS for ``scrape_yellow_pages`` and ``scrape_angi``.
+
+    python benchmarks/bench_end_to_end.py [--location us_latino] [--limit 300]
+        [--pages 3] [--latency-ms 50] [--block-rate 0.05] [--challenge-rate 0.05]
+        [--max-rps 5]
+
+Each source runs in its own process, so peak RSS is per scraper. Politeness
+delays are part of what is measured.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.request import Request, urlopen
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(HERE, "..")
+SCRAPERS = os.path.join(ROOT, "lib", "scrapers")
+
+SOURCES = ("yellow_pages", "angi")
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def run_child(source: str, keyword: str, location: str, limit: int, concurrency: int):
+    """Scrape once in this process and print the measurements as JSON."""
+    sys.path.insert(0, SCRAPERS)
+    from curl_cffi import requests
+
+    # Time the HTTP exchange itself, not rate-limiter or cache work in fetch.get.
+    latencies = []
+
+    def timed(get):
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return get(*args, **kwargs)
+            finally:
+                latencies.append(time.perf_counter() - started)
+
+        return wrapper
+
+    requests.Session.get = timed(requests.Session.get)
+    requests.get = timed(requests.get)
+
+    if source == "yellow_pages":
+        from yellow_pages_scraper import scrape_yellow_pages as scrape
+    else:
+        from angi_scraper import scrape_angi as scrape
+
+    started = time.perf_counter()
+    result = scrape(keyword, location, limit, max_cities=concurrency)
+    elapsed = time.perf_counter() - started
+    print(json.dumps({
+        "leads": len(result.get("leads", [])),
+        "elapsed": elapsed,
+        "p50": percentile(latencies, 0.50),
+        "p99": percentile(latencies, 0.99),
+        # ru_maxrss is KiB on Linux.
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 if resource else float("nan"),
+        "error": result.get("error"),
+    }))
+
+
+def server_call(base_url: str, path: str, method: str = "GET") -> dict:
+    with urlopen(Request(base_url + path, method=method), timeout=10) as response:
+        return json.loads(response.read() or b"{}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--keyword", default="plumber")
+    parser.add_argument("--location", default="us_latino")
+    parser.add_argument("--limit", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--sources", nargs="+", choices=SOURCES, default=list(SOURCES))
+    parser.add_argument("--pages", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--block-rate", type=float, default=0.0)
+    parser.add_argument("--challenge-rate", type=float, default=0.0)
+    parser.add_argument("--max-rps", type=float, default=0.0)
+    parser.add_argument("--child", choices=SOURCES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.keyword, args.location, args.limit, args.concurrency)
+        return
+
+    server = subprocess.Popen(
+        [
+            sys.executable, os.path.join(HERE, "stand_in_server.py"),
+            "--pages", str(args.pages),
+            "--latency-ms", str(args.latency_ms),
+            "--jitter-ms", str(args.jitter_ms),
+            "--block-rate", str(args.block_rate),
+            "--challenge-rate", str(args.challenge_rate),
+            "--max-rps", str(args.max_rps),
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        base_url = server.stdout.readline().strip()
+        print(f"{'source':<14}{'leads':>7}{'leads/s':>10}{'req/lead':>10}{'p50 ms':>9}{'p99 ms':>9}{'RSS MB':>9}")
+        with tempfile.TemporaryDirectory() as cache_dir:
+            env = {
+                **os.environ,
+                "YP_BASE_URL": base_url,
+                "ANGI_BASE_URL": base_url,
+                "JINA_BASE_URL": base_url,
+                # Keep the stand-in's cookies and responses out of the real cache.
+                "SCRAPER_CACHE_DIR": cache_dir,
+                "SCRAPER_HTTP_CACHE": "off",
+            }
+            for source in args.sources:
+                server_call(base_url, "/__reset", "POST")
+                child = subprocess.run(
+                    [
+                        sys.executable, os.path.abspath(__file__), "--child", source,
+                        "--keyword", args.keyword,
+                        "--location", args.location,
+                        "--limit", str(args.limit),
+                        "--concurrency", str(args.concurrency),
+                    ],
+                    env=env,
+                    capture_output=True,
+                    text=True,
+                    check=True,
+                )
+                stats = json.loads(child.stdout.strip().splitlines()[-1])
+                requests = server_call(base_url, "/__stats").get("requests", 0)
+                leads = stats["leads"]
+                print(
+                    f"{source:<14}{leads:>7}{leads / stats['elapsed']:>10.1f}"
+                    f"{(requests / leads if leads else float('inf')):>10.2f}"
+                    f"{stats['p50'] * 1000:>9.1f}{stats['p99'] * 1000:>9.1f}{stats['peak_rss_mb']:>9.1f}"
+                    + (f"  error: {stats['error']}" if stats["error"] else "")
+                )
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Row extraction cost on the recorded fixtures: one ``select_one`` per field
+(the previous approach) versus the compiled single-pass ``RowSpec.walk``, and
+which of the two ``RowSpec.extract`` settled on for each spec and backend.
+
+    python benchmarks/bench_extractors.py [--seconds 2]
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, os.path.join(ROOT, "lib", "scrapers"))
+
+import angi_scraper  # noqa: E402
+import yellow_pages_scraper  # noqa: E402
+from parsers import available_backends, parse_html  # noqa: E402
+
+FIXTURES = os.path.join(ROOT, "tests", "fixtures")
+
+CASES = [
+    (
+        "yellow_pages",
+        yellow_pages_scraper.ROW_SPEC,
+        ".search-results .result, .organic .result, [data-ypresult]",
+        ["yp_search_page1.html", "yp_search_page2.html"],
+    ),
+    (
+        "angi",
+        angi_scraper.ROW_SPEC,
+        '[class*="BusinessProfileCard"], [class*="ProCard"], [class*="business-card"], '
+        '[data-testid*="business"], [class*="SearchResult"], article[class*="pro-card"]',
+        ["angi_search_page1.html"],
+    ),
+]
+
+
+def per_field(spec, css_by_field, rows):
+    for row in rows:
+        for css in css_by_field.values():
+            row.select_one(css)
+
+
+def single_pass(spec, css_by_field, rows):
+    for row in rows:
+        spec.walk(row)
+
+
+def rows_per_second(extract, spec, css_by_field, rows, seconds: float) -> float:
+    done = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        extract(spec, css_by_field, rows)
+        done += len(rows)
+    return done / (time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    print(f"{'source':<14}{'backend':<14}{'select_one rows/s':>20}{'walk rows/s':>14}  extract uses")
+    for source, spec, rows_css, pages in CASES:
+        css_by_field = spec.css
+        for backend in available_backends():
+            rows = []
+            for page in pages:
+                with open(os.path.join(FIXTURES, page), encoding="utf-8") as handle:
+                    rows.extend(parse_html(handle.read(), backend).select(rows_css))
+            before = rows_per_second(per_field, spec, css_by_field, rows, args.seconds)
+            after = rows_per_second(single_pass, spec, css_by_field, rows, args.seconds)
+            while spec.strategy(type(rows[0])) is None and rows[0].native_select:
+                for row in rows:
+                    spec.extract(row)
+            chosen = spec.strategy(type(rows[0])) or "walk"
+            print(f"{source:<14}{backend:<14}{before:>20.0f}{after:>14.0f}  {chosen}")
@@ -0,0 +1,113 @@
+"""
+Jina fallback parsing cost: the previous parser (one regex compiled and run
+over the whole page per lead) versus the single-pass tokenizer, on the
+recorded Jina page and on copies of its cards scaled up to large pages.
+
+    python benchmarks/bench_jina.py [--seconds 2] [--cards 10 100 500 2000]
+"""
+import argparse
+import html
+import os
+import re
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, os.path.join(ROOT, "lib", "scrapers"))
+
+import angi_scraper  # noqa: E402
+
+FIXTURES = os.path.join(ROOT, "tests", "fixtures")
+RECORDED = os.path.join(FIXTURES, "angi_jina_page1.md")
+
+ARGS = ("plumber", "Houston, TX", "houston", "tx", "plumbing")
+
+
+def legacy_parse_jina_markdown(markdown_text, keyword, location, city, state, category, seen_leads):
+    """``parse_jina_markdown`` as it was before the tokenizer, for comparison."""
+    leads = []
+    link_pattern = re.compile(
+        r"\[([^\]]+)\]\((https?://www\.angi\.com/companylist[^)]+reviews[^)]*)\)",
+        re.IGNORECASE,
+    )
+    for name, url in link_pattern.findall(markdown_text):
+        if "-reviews-" not in url:
+            continue
+        clean_name = html.unescape(name).strip()
+        if not clean_name or len(clean_name) < 2:
+            continue
+        if clean_name.lower() in seen_leads:
+            continue
+        seen_leads.add(clean_name.lower())
+
+        rating, review_count = None, None
+        pattern = rf"{re.escape(clean_name)}\s+([0-9]\.?[0-9]?)\s*\(\s*([\d,]+)"
+        match = re.search(pattern, markdown_text, re.IGNORECASE)
+        if match:
+            try:
+                rating = float(match.group(1))
+                review_count = int(match.group(2).replace(",", ""))
+            except Exception:
+                pass
+        leads.append({
+            "name": clean_name,
+            "phone": None,
+            "website": None,
+            "address": None,
+            "city": city.replace("-", " ").title(),
+            "region": state.upper(),
+            "postalCode": None,
+            "rating": rating,
+            "reviewCount": review_count,
+            "category": category.replace("-", " ").title(),
+            "sourceUrl": url,
+            "keyword": keyword,
+            "location": location,
+            "source": "angi",
+        })
+    return leads
+
+
+def read_recorded() -> str:
+    with open(RECORDED, encoding="utf-8") as handle:
+        return handle.read()
+
+
+def large_markdown(cards: int) -> str:
+    """The recorded page with its cards repeated under new names and ids until it has ``cards`` of them."""
+    text = read_recorded()
+    first_card = text.index("[![Image 2:")
+    last_card = text.index("[Load more pros]")
+    body, tail = text[first_card:last_card], text[last_card:]
+    names = sorted({match.group(1) for match in re.finditer(r"^\[([^\]!][^\]]*)\]\(https://www\.angi", body, re.M)})
+    copies = []
+    for copy in range(max(1, -(-cards // 10))):
+        chunk = body
+        for name in names:
+            chunk = chunk.replace(name, f"{name} {copy}")
+        chunk = re.sub(r"-reviews-(\d+)", lambda m: f"-reviews-{int(m.group(1)) + copy * 100}", chunk)
+        copies.append(chunk)
+    return text[:first_card] + "".join(copies) + tail
+
+
+def pages_per_second(parse, text: str, seconds: float) -> float:
+    done = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        parse(text, *ARGS, set())
+        done += 1
+    return done / (time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--cards", type=int, nargs="+", default=[10, 100, 500, 2000])
+    args = parser.parse_args()
+
+    print(f"{'cards':>6}{'KB':>8}{'legacy pages/s':>16}{'single pass pages/s':>21}{'speedup':>9}")
+    for cards in args.cards:
+        text = read_recorded() if cards <= 10 else large_markdown(cards)
+        before = pages_per_second(legacy_parse_jina_markdown, text, args.seconds)
+        after = pages_per_second(angi_scraper.parse_jina_markdown, text, args.seconds)
+        print(f"{cards:>6}{len(text) / 1024:>8.0f}{before:>16.1f}{after:>21.1f}{after / before:>8.1f}x")
@@ -0,0 +1,61 @@
+"""
+Pages parsed per second for each HTML parser backend on the recorded
+Yellow Pages and Angi fixtures.
+
+    python benchmarks/bench_parsers.py [--seconds 2]
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, os.path.join(ROOT, "lib", "scrapers"))
+
+import angi_scraper  # noqa: E402
+import yellow_pages_scraper  # noqa: E402
+from parsers import available_backends  # noqa: E402
+
+FIXTURES = os.path.join(ROOT, "tests", "fixtures")
+
+
+def read(name: str) -> str:
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as handle:
+        return handle.read()
+
+
+def yp_parse(html_text, backend):
+    return yellow_pages_scraper.parse_results_page(html_text, "plumber", "Houston, TX", "u", backend)
+
+
+def angi_parse(html_text, backend):
+    return angi_scraper.parse_results_page(html_text, "plumber", "Houston, TX", "houston", "tx", "plumbing", "u", backend)
+
+
+CASES = [
+    ("yellow_pages", yp_parse, [read("yp_search_page1.html"), read("yp_search_page2.html")]),
+    ("angi", angi_parse, [read("angi_search_page1.html"), read("angi_search_fallback.html")]),
+]
+
+
+def pages_per_second(parse, pages, backend, seconds: float) -> float:
+    parsed = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while time.perf_counter() < deadline:
+        for html_text in pages:
+            parse(html_text, backend)
+            parsed += 1
+    return parsed / (time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=2.0, help="Time spent per backend and source")
+    args = parser.parse_args()
+
+    print(f"{'source':<14}{'backend':<14}{'pages/s':>10}")
+    for source, parse, pages in CASES:
+        for backend in available_backends():
+            rate = pages_per_second(parse, pages, backend, args.seconds)
+            print(f"{source:<14}{backend:<14}{rate:>10.1f}")
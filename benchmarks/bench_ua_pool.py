@@ -0,0 +1,80 @@
+"""
+Microbenchmark: user-agent loading before (re-read user_agents.txt on every
+scrape_location call) and after (ua_pool, indexed once per process).
+
+    python benchmarks/bench_ua_pool.py [--calls 90]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "lib", "scrapers"))
+
+import ua_pool  # noqa: E402
+
+
+def legacy_load_user_agents():
+    try:
+        with open(ua_pool.UA_PATH, "r", encoding="utf-8") as handle:
+            agents = [line.strip() for line in handle if line.strip()]
+            return agents if agents else []
+    except Exception:
+        return []
+
+
+def run_legacy(calls: int, picks: int):
+    kept = None
+    for _ in range(calls):
+        agents = legacy_load_user_agents()
+        for _ in range(picks):
+            random.choice(agents)
+        kept = agents  # one list stays alive per running scrape_location
+    return kept
+
+
+def run_pool(calls: int, picks: int, impersonate: str | None):
+    ua_pool._pools.clear()
+    for _ in range(calls):
+        pool = ua_pool.get_pool(impersonate=impersonate)
+        for _ in range(picks):
+            pool.choice()
+    return pool
+
+
+def measure(label: str, fn):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    print(f"{label:<34} {elapsed * 1000:>10.1f} ms {peak / 1024:>10.0f} KiB peak")
+
+
+def measure_startup(label: str, fn):
+    started = time.perf_counter()
+    fn()
+    print(f"{label:<34} {(time.perf_counter() - started) * 1000:>10.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=90, help="scrape_location calls (~90 in us_latino mode)")
+    parser.add_argument("--picks", type=int, default=80, help="UA picks per call")
+    args = parser.parse_args()
+
+    print("startup (first load)")
+    measure_startup("  legacy list", legacy_load_user_agents)
+    ua_pool._pools.clear()
+    measure_startup("  ua_pool", ua_pool.get_pool)
+    ua_pool._pools.clear()
+    measure_startup("  ua_pool chrome120 (filtered)", lambda: ua_pool.get_pool(impersonate="chrome120"))
+
+    print(f"\n{args.calls} calls x {args.picks} picks")
+    measure("  legacy list", lambda: run_legacy(args.calls, args.picks))
+    measure("  ua_pool", lambda: run_pool(args.calls, args.picks, None))
+    measure("  ua_pool chrome120 (filtered)", lambda: run_pool(args.calls, args.picks, "chrome120"))
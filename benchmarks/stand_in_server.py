@@ -0,0 +1,309 @@
+"""
+Local stand-in for yellowpages.com, angi.com and r.jina.ai serving synthetic
+result pages (and Angi profile pages), so the scrapers can be benchmarked
+end-to-end offline.
+
+    python benchmarks/stand_in_server.py [--port 0] [--pages 3] [--latency-ms 50]
+        [--block-rate 0.05] [--challenge-rate 0.05] [--max-rps 5]
+
+Point the scrapers at it with ``YP_BASE_URL``, ``ANGI_BASE_URL`` and
+``JINA_BASE_URL``. With ``--max-rps`` the server behaves like a site with a
+load-triggered WAF: result pages beyond that many requests per second get a
+429 with ``Retry-After``. The first line printed is the base URL. ``GET /__stats``
+returns request counters and ``POST /__reset`` clears them.
+"""
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+# Contains the markers angi_scraper.is_cf_blocked looks for.
+CHALLENGE_PAGE = """<!DOCTYPE html>
+<html><head><title>Attention Required! | Cloudflare</title></head>
+<body><div id="cf-error-details" class="cf-error-details-wrapper">
+<h1>Sorry, you have been blocked</h1><p>Please enable cookies.</p>
+</div></body></html>"""
+
+WARMUP_PAGE = "<!DOCTYPE html><html><head><title>Home</title></head><body><main>Welcome</main></body></html>"
+
+ANGI_PROFILE_PATH = re.compile(r"^/companylist/us/(?P<state>[^/]+)/(?P<city>[^/]+)/(?P<slug>[^/]+)-reviews-(?P<number>\d+)\.htm$")
+ANGI_PATH = re.compile(r"^/companylist/us/(?P<state>[^/]+)/(?P<city>[^/]+)/(?P<category>[^/]+)\.htm$")
+
+
+def slug(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+
+
+def yp_page(keyword: str, location: str, page: int, config) -> str:
+    if page > config.pages:
+        return "<!DOCTYPE html><html><body><main><div class=\"no-results\">No results found</div></main></body></html>"
+    city = location.split(",")[0].strip()
+    total = config.pages * config.yp_per_page
+    first = (page - 1) * config.yp_per_page
+    rows = []
+    for i in range(first, first + config.yp_per_page):
+        name = f"{city} {keyword.title()} Co {i + 1}"
+        path = f"/{slug(city)}/mip/{slug(name)}-{500000 + i}"
+        rows.append(f"""
+    <div class="result" id="lid-{500000 + i}">
+      <div class="srp-listing clickable-area mdm">
+        <div class="info">
+          <div class="info-section info-primary">
+            <h2 class="n">{i + 1}.<a class="business-name" href="{path}"><span>{name}</span></a></h2>
+            <div class="categories"><a href="/{slug(city)}/{slug(keyword)}">{keyword.title()}</a></div>
+            <div class="ratings"><div class="result-rating four"><span class="count">({i % 40})</span></div></div>
+          </div>
+          <div class="info-section info-secondary">
+            <div class="phones phone primary">(713) 555-{i % 10000:04d}</div>
+            <div class="adr"><div class="street-address">{100 + i} Main St</div><div class="locality">{location} 77{i % 1000:03d}</div></div>
+            <div class="links"><a class="track-visit-website" href="https://example.com/{slug(name)}">Website</a></div>
+          </div>
+          <div class="snippet"><p class="body"><span>From Business:</span> Family owned and operated since {1950 + i % 70}.</p></div>
+        </div>
+      </div>
+    </div>""")
+    return f"""<!DOCTYPE html>
+<html lang="en"><head><meta charset="utf-8"><title>{keyword.title()} in {location} | yellowpages.com</title>
+<script>window.__INITIAL_STATE__ = {{"search": {{"terms": "{keyword}"}}}};</script></head>
+<body class="srp"><main>
+<div class="pagination"><span class="showing-count">Showing {first + 1}-{first + config.yp_per_page} of {total:,}</span></div>
+<div class="search-results organic">{"".join(rows)}
+</div></main></body></html>"""
+
+
+def angi_page(state: str, city: str, category: str, page: int, config) -> str:
+    if page > config.pages:
+        return "<!DOCTYPE html><html><body><main><p>No pros found</p></main></body></html>"
+    title_city = city.replace("-", " ").title()
+    total = config.pages * config.angi_per_page
+    first = (page - 1) * config.angi_per_page
+    cards = []
+    for i in range(first, first + config.angi_per_page):
+        name = f"{title_city} {category.replace('-', ' ').title()} Pros {i + 1}"
+        rating = 3 + (i % 20) / 10
+        cards.append(f"""
+      <div class="BusinessProfileCard_card__3kd8x" data-testid="business-profile-card-{i}">
+        <a class="BusinessProfileCard_profile-target__z9w" href="/companylist/us/{state}/{city}/{slug(name)}-reviews-{9000000 + i}.htm">
+          <h3 class="BusinessProfileCard_business-name__x1">{name}</h3>
+        </a>
+        <div class="RatingDisplay_rating__k2x" aria-label="Rating: {rating:.1f} out of 5 stars"><span class="RatingDisplay_value__9s">{rating:.1f}</span><span class="ReviewCount_count__q1">({i * 7 % 500})</span></div>
+        <p class="BusinessProfileCard_address__7hd">{100 + i} Main St, {title_city}, {state.upper()}</p>
+        <div class="BusinessProfileCard_services__2ab"><span>{category.replace('-', ' ').title()}</span></div>
+        <button class="Button_primary__4a">Request a quote</button>
+      </div>""")
+    return f"""<!DOCTYPE html>
+<html lang="en"><head><meta charset="utf-8"><title>The 10 Best {category.title()} in {title_city} | Angi</title></head>
+<body><div id="__next"><main class="SearchPage_main__2">
+<p class="SearchPage_count__3">Showing {first + 1}-{first + config.angi_per_page} of {total} pros</p>
+<section class="SearchResults_list__4">{"".join(cards)}
+</section></main></div></body></html>"""
+
+
+def angi_profile_page(state: str, city: str, slug_text: str, number: int) -> str:
+    i = number - 9000000
+    business = {
+        "@context": "https://schema.org",
+        "@type": "HomeAndConstructionBusiness",
+        "name": slug_text.replace("-", " ").title(),
+        "url": f"https://www.angi.com/companylist/us/{state}/{city}/{slug_text}-reviews-{number}.htm",
+        "sameAs": [f"https://example.com/{slug_text}"],
+        "telephone": f"(555) 010-{i % 10000:04d}",
+        "address": {
+            "@type": "PostalAddress",
+            "streetAddress": f"{100 + i} Main St",
+            "addressLocality": city.replace("-", " ").title(),
+            "addressRegion": state.upper(),
+            "postalCode": f"77{i % 1000:03d}",
+        },
+    }
+    return f"""<!DOCTYPE html>
+<html lang="en"><head><meta charset="utf-8"><title>{business["name"]} | Angi</title>
+<script type="application/ld+json">{json.dumps(business)}</script></head>
+<body><div id="__next"><main class="ProfilePage_main__1"><h1>{business["name"]}</h1>
+<a class="Button_call__2" href="tel:{business["telephone"]}">Call</a></main></div></body></html>"""
+
+
+def jina_markdown(target: str, config) -> str | None:
+    parts = urlsplit(target if "://" in target else f"http://{target}")
+    match = ANGI_PATH.match(parts.path)
+    if not match:
+        return None
+    page = int(parse_qs(parts.query).get("page", ["1"])[0])
+    if page > config.pages:
+        return "Title: No pros found\n\nMarkdown Content:\nNo results."
+    state, city, category = match.group("state"), match.group("city"), match.group("category")
+    first = (page - 1) * config.angi_per_page
+    lines = [f"Title: Best {category} in {city}", "", "Markdown Content:"]
+    for i in range(first, first + config.angi_per_page):
+        name = f"{city.replace('-', ' ').title()} {category.replace('-', ' ').title()} Pros {i + 1}"
+        url = f"https://www.angi.com/companylist/us/{state}/{city}/{slug(name)}-reviews-{9000000 + i}.htm"
+        lines.append(f"### [{name}]({url})")
+        lines.append(f"{3 + (i % 20) / 10:.1f} ({i * 7 % 500})")
+    return "\n".join(lines)
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config):
+        super().__init__(address, Handler)
+        self.config = config
+        self.stats = Counter()
+        self.stats_lock = threading.Lock()
+        self.rng = random.Random(config.seed)
+        self.recent = deque()
+
+    def count(self, key: str):
+        with self.stats_lock:
+            self.stats[key] += 1
+
+    def roll(self, rate: float) -> bool:
+        with self.stats_lock:
+            return rate > 0 and self.rng.random() < rate
+
+    def over_limit(self) -> bool:
+        """True when the last second already saw ``max_rps`` result-page requests."""
+        if not self.config.max_rps:
+            return False
+        now = time.monotonic()
+        with self.stats_lock:
+            while self.recent and now - self.recent[0] > 1.0:
+                self.recent.popleft()
+            if len(self.recent) >= self.config.max_rps:
+                return True
+            self.recent.append(now)
+            return False
+
+    def delay(self) -> float:
+        with self.stats_lock:
+            jitter = self.rng.uniform(-self.config.jitter_ms, self.config.jitter_ms)
+        return max(0.0, self.config.latency_ms + jitter) / 1000
+
+
+class Handler(BaseHTTPRequestHandler):
+    server: StandInServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def send(
+        self,
+        status: int,
+        body: str,
+        content_type: str = "text/html; charset=utf-8",
+        cookie: str | None = None,
+        retry_after: str | None = None,
+    ):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        if cookie:
+            self.send_header("Set-Cookie", cookie)
+        if retry_after:
+            self.send_header("Retry-After", retry_after)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        if self.path == "/__reset":
+            with self.server.stats_lock:
+                self.server.stats.clear()
+            self.send(200, "{}", "application/json")
+        else:
+            self.send(404, "not found")
+
+    def do_GET(self):
+        server = self.server
+        config = server.config
+        parts = urlsplit(self.path)
+
+        if parts.path == "/__stats":
+            with server.stats_lock:
+                body = json.dumps(dict(server.stats))
+            self.send(200, body, "application/json")
+            return
+
+        server.count("requests")
+        time.sleep(server.delay())
+
+        if parts.path.startswith("/http://") or parts.path.startswith("/https://"):
+            server.count("jina")
+            markdown = jina_markdown(unquote(self.path[1:]), config)
+            if markdown is None:
+                self.send(404, "not found", "text/plain")
+            else:
+                self.send(200, markdown, "text/plain; charset=utf-8")
+            return
+
+        if parts.path == "/":
+            server.count("warmup")
+            self.send(200, WARMUP_PAGE, cookie="__cf_bm=stand-in; Path=/; Max-Age=1800")
+            return
+
+        if server.over_limit():
+            server.count("rate_limited")
+            self.send(429, CHALLENGE_PAGE, retry_after="1")
+            return
+        if server.roll(config.block_rate):
+            server.count("blocked")
+            self.send(403, CHALLENGE_PAGE)
+            return
+        if server.roll(config.challenge_rate):
+            server.count("challenged")
+            self.send(200, CHALLENGE_PAGE)
+            return
+
+        query = parse_qs(parts.query)
+        page = int(query.get("page", ["1"])[0])
+        if parts.path == "/search":
+            server.count("yp_pages")
+            keyword = query.get("search_terms", ["plumber"])[0]
+            location = query.get("geo_location_terms", ["Houston, TX"])[0]
+            self.send(200, yp_page(keyword, location, page, config))
+            return
+        match = ANGI_PROFILE_PATH.match(unquote(parts.path))
+        if match:
+            server.count("angi_profiles")
+            self.send(200, angi_profile_page(match["state"], match["city"], match["slug"], int(match["number"])))
+            return
+        match = ANGI_PATH.match(unquote(parts.path))
+        if match:
+            server.count("angi_pages")
+            self.send(200, angi_page(match.group("state"), match.group("city"), match.group("category"), page, config))
+            return
+        self.send(404, "not found")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Synthetic Yellow Pages / Angi / Jina stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0, help="0 picks a free port")
+    parser.add_argument("--pages", type=int, default=3, help="Result pages per city")
+    parser.add_argument("--yp-per-page", type=int, default=30)
+    parser.add_argument("--angi-per-page", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--block-rate", type=float, default=0.0, help="Share of result pages answered with a 403")
+    parser.add_argument("--challenge-rate", type=float, default=0.0, help="Share answered with a 200 Cloudflare challenge")
+    parser.add_argument("--max-rps", type=float, default=0.0, help="Answer 429 above this many result pages per second")
+    parser.add_argument("--seed", type=int, default=1)
+    return parser
+
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    httpd = StandInServer((args.host, args.port), args)
+    print(f"http://{args.host}:{httpd.server_address[1]}", flush=True)
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    sys.exit(0)
@@ -2,155 +2,35 @@ import sys
 import json
 import argparse
 import os
-import random
-import time
 import re
 import html
+import time
+from functools import partial
+
 from curl_cffi import requests
-from bs4 import BeautifulSoup
-
-# Ciudades principales con alta población latina o uso extendido de español
-LATINO_HEAVY_LOCATIONS = [
-    # California
-    "Los Angeles, CA",
-    "San Diego, CA",
-    "San Jose, CA",
-    "San Francisco, CA",
-    "Oakland, CA",
-    "Fresno, CA",
-    "Sacramento, CA",
-    "Riverside, CA",
-    "Bakersfield, CA",
-    "Santa Ana, CA",
-    "Anaheim, CA",
-    "Long Beach, CA",
-    "Stockton, CA",
-    "Chula Vista, CA",
-    "Modesto, CA",
-    # Texas
-    "Houston, TX",
-    "San Antonio, TX",
-    "Dallas, TX",
-    "Austin, TX",
-    "Fort Worth, TX",
-    "El Paso, TX",
-    "McAllen, TX",
-    "Brownsville, TX",
-    "Laredo, TX",
-    "Corpus Christi, TX",
-    "San Jose, TX",
-    "Irving, TX",
-    "Arlington, TX",
-    "Plano, TX",
-    "Garland, TX",
-    "Grand Prairie, TX",
-    "Amarillo, TX",
-    "Lubbock, TX",
-    "Pasadena, TX",
-    "Mesquite, TX",
-    # Florida
-    "Miami, FL",
-    "Hialeah, FL",
-    "Homestead, FL",
-    "Fort Lauderdale, FL",
-    "West Palm Beach, FL",
-    "Orlando, FL",
-    "Tampa, FL",
-    "Jacksonville, FL",
-    "Kissimmee, FL",
-    # New York / East Coast
-    "New York, NY",
-    "Queens, NY",
-    "Bronx, NY",
-    "Brooklyn, NY",
-    "Jersey City, NJ",
-    "Newark, NJ",
-    "Paterson, NJ",
-    "Elizabeth, NJ",
-    "Union City, NJ",
-    "Trenton, NJ",
-    # Midwest
-    "Chicago, IL",
-    "Aurora, IL",
-    "Cicero, IL",
-    "Waukegan, IL",
-    # Southwest
-    "Phoenix, AZ",
-    "Tucson, AZ",
-    "Mesa, AZ",
-    "Glendale, AZ",
-    "Albuquerque, NM",
-    "Las Cruces, NM",
-    "Las Vegas, NV",
-    "Henderson, NV",
-    "Reno, NV",
-    "Denver, CO",
-    # Southeast
-    "Atlanta, GA",
-    "Doral, FL",
-    "Cape Coral, FL",
-    "Charlotte, NC",
-    "Raleigh, NC",
-    # Others con fuerte presencia latina
-    "Washington, DC",
-    "San Juan, PR",
-    "Ponce, PR",
-    "Bayamon, PR",
-]
-
-STATE_FALLBACK_CITY = {
-    "AL": "Birmingham, AL",
-    "AK": "Anchorage, AK",
-    "AZ": "Phoenix, AZ",
-    "AR": "Little Rock, AR",
-    "CA": "Los Angeles, CA",
-    "CO": "Denver, CO",
-    "CT": "Bridgeport, CT",
-    "DE": "Wilmington, DE",
-    "FL": "Miami, FL",
-    "GA": "Atlanta, GA",
-    "HI": "Honolulu, HI",
-    "ID": "Boise, ID",
-    "IL": "Chicago, IL",
-    "IN": "Indianapolis, IN",
-    "IA": "Des Moines, IA",
-    "KS": "Wichita, KS",
-    "KY": "Louisville, KY",
-    "LA": "New Orleans, LA",
-    "ME": "Portland, ME",
-    "MD": "Baltimore, MD",
-    "MA": "Boston, MA",
-    "MI": "Detroit, MI",
-    "MN": "Minneapolis, MN",
-    "MS": "Jackson, MS",
-    "MO": "Kansas City, MO",
-    "MT": "Billings, MT",
-    "NE": "Omaha, NE",
-    "NV": "Las Vegas, NV",
-    "NH": "Manchester, NH",
-    "NJ": "Newark, NJ",
-    "NM": "Albuquerque, NM",
-    "NY": "New York, NY",
-    "NC": "Charlotte, NC",
-    "ND": "Fargo, ND",
-    "OH": "Columbus, OH",
-    "OK": "Oklahoma City, OK",
-    "OR": "Portland, OR",
-    "PA": "Philadelphia, PA",
-    "RI": "Providence, RI",
-    "SC": "Charleston, SC",
-    "SD": "Sioux Falls, SD",
-    "TN": "Nashville, TN",
-    "TX": "Houston, TX",
-    "UT": "Salt Lake City, UT",
-    "VT": "Burlington, VT",
-    "VA": "Virginia Beach, VA",
-    "WA": "Seattle, WA",
-    "WV": "Charleston, WV",
-    "WI": "Milwaukee, WI",
-    "WY": "Cheyenne, WY",
-    "DC": "Washington, DC",
-}
+
+import checkpoint
+import city_yield
+import enrich
+import fetch
+import hedge
+import http_cache
+import lead_store
+import lead_table
+from extractors import RowSpec
+from deadline import Deadline, as_deadline, cancelled, out_of_time
+from engine import iter_source
+from fanout import DEFAULT_MAX_CITIES, claim_lead, is_stopped
+# The engine reads these off each source module, so a source can use its own.
+from locations import LATINO_HEAVY_LOCATIONS, STATE_FALLBACK_CITY, parse_state_abbr  # noqa: F401
+from metrics import Metrics, export as export_metrics
+from pagination import DEFAULT_PREFETCH, PagePrefetcher, last_page, pages_ahead, result_range
+from parsers import parse_html
+from proxies import get_pool as get_proxy_pool, proxy_dict
+from ratelimit import LIMITER
+from sessions import SessionManager
+from streaming import drain, write_ndjson
+from ua_pool import get_pool
 
 # Mapping of common service keywords to Angi category slugs
 KEYWORD_TO_CATEGORY = {
@@ -211,16 +91,20 @@ KEYWORD_TO_CATEGORY = {
     "storage": "moving",
 }
 
-FALLBACK_UA = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+# Overridable so benchmarks can point the scraper at a local stand-in server.
+BASE_URL = os.getenv("ANGI_BASE_URL", "https://www.angi.com").rstrip("/")
+JINA_BASE_URL = os.getenv("JINA_BASE_URL", "https://r.jina.ai").rstrip("/")
 
+SESSIONS = SessionManager("angi", f"{BASE_URL}/", impersonate="chrome124", timeout=15)
 
-def parse_state_abbr(location: str) -> str | None:
-    parts = location.split(",")
-    if len(parts) < 2:
-        return None
-    state_part = parts[1].strip()
-    state = state_part.split()[0].upper() if state_part else ""
-    return state if len(state) == 2 else None
+# Angi challenges readily: start slow and let AIMD find the tolerated pace.
+LIMITER.configure(BASE_URL, rate=1.0, max_rate=6.0)
+
+# Seconds the direct route gets before Jina is raced against it (negative:
+# only after a challenge or once the direct attempts are used up), and the
+# block rate above which Jina is raced from the start.
+HEDGE_DELAY = float(os.getenv("ANGI_HEDGE_DELAY", "10"))
+HEDGE_BLOCK_RATE = float(os.getenv("ANGI_HEDGE_BLOCK_RATE", "0.5"))
 
 
 def parse_city_state(location: str) -> tuple[str, str]:
@@ -247,28 +131,6 @@ def keyword_to_category(keyword: str) -> str:
     return re.sub(r'[^a-z0-9]+', '-', normalized).strip('-')
 
 
-def load_user_agents():
-    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
-    ua_path = os.path.join(base_dir, "user_agents.txt")
-    try:
-        with open(ua_path, "r", encoding="utf-8") as handle:
-            agents = [line.strip() for line in handle if line.strip()]
-            return agents if agents else []
-    except Exception:
-        return []
-
-def load_proxies():
-    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
-    proxy_path = os.path.join(base_dir, "proxies.txt")
-    try:
-        if not os.path.exists(proxy_path):
-            return []
-        with open(proxy_path, "r", encoding="utf-8") as handle:
-            proxies = [line.strip() for line in handle if line.strip() and not line.startswith("#")]
-            return proxies
-    except Exception:
-        return []
-
 
 def parse_cookie_string(cookie_string: str) -> dict:
     cookies = {}
@@ -293,12 +155,6 @@ def load_cf_cookies() -> dict:
     return parse_cookie_string(cookie_string) if cookie_string else {}
 
 
-def choose_user_agent(user_agents: list[str]) -> str:
-    if user_agents:
-        return random.choice(user_agents)
-    return FALLBACK_UA
-
-
 def is_cf_blocked(text: str) -> bool:
     challenge_markers = (
         "Attention Required! | Cloudflare",
@@ -309,16 +165,27 @@ def is_cf_blocked(text: str) -> bool:
     return any(marker in text for marker in challenge_markers)
 
 
+def is_blocked_response(response) -> bool:
+    return fetch.is_blocked_status(response) or is_cf_blocked(response.text or "")
+
+
+def hedge_delay() -> float | None:
+    """How long a results page tries Angi directly before Jina joins in."""
+    if LIMITER.block_rate(BASE_URL) >= HEDGE_BLOCK_RATE:
+        return 0.0
+    return HEDGE_DELAY if HEDGE_DELAY >= 0 else None
+
+
 def build_jina_url(target_url: str) -> str:
     # r.jina.ai works with either http or https; strip scheme to avoid double schemes.
     cleaned = target_url.replace("https://", "").replace("http://", "")
-    return f"https://r.jina.ai/http://{cleaned}"
+    return f"{JINA_BASE_URL}/http://{cleaned}"
 
 
-def fetch_via_jina(target_url: str, timeout: int = 40) -> str | None:
+def fetch_via_jina(target_url: str, timeout: int = 40, metrics=None, deadline=None) -> str | None:
     proxy_url = build_jina_url(target_url)
     try:
-        resp = requests.get(proxy_url, timeout=timeout)
+        resp = fetch.get(requests, proxy_url, timeout=timeout, metrics=metrics, deadline=deadline)
         if resp.status_code == 200 and resp.text:
             return resp.text
     except Exception:
@@ -326,19 +193,81 @@ def fetch_via_jina(target_url: str, timeout: int = 40) -> str | None:
     return None
 
 
-def extract_rating_from_text(name: str, text: str) -> tuple[float | None, int | None]:
-    """Try to pull '4.8 (123)' style rating/review block near the business name."""
-    rating, review_count = None, None
-    # Escape name to avoid regex surprises
-    pattern = rf"{re.escape(name)}\s+([0-9]\.?[0-9]?)\s*\(\s*([\d,]+)"
-    match = re.search(pattern, text, re.IGNORECASE)
-    if match:
-        try:
-            rating = float(match.group(1))
-            review_count = int(match.group(2).replace(",", ""))
-        except Exception:
-            pass
-    return rating, review_count
+# One pass over a Jina markdown page finds both company links and "4.8 (123)"
+# rating blocks, in document order.
+JINA_TOKEN = re.compile(
+    r"\[(?P<name>[^\]]+)\]\((?P<url>https?://www\.angi\.com/companylist[^)]+reviews[^)]*)\)"
+    r"|(?P<rating>[0-9]\.?[0-9]?)\s*\(\s*(?P<count>[\d,]+)",
+    re.IGNORECASE,
+)
+
+# Longest business name a rating block can be attributed to by its preceding text.
+MAX_NAME_LENGTH = 200
+
+
+def _rating_value(match) -> tuple[float | None, int | None]:
+    try:
+        return float(match.group("rating")), int(match.group("count").replace(",", ""))
+    except ValueError:
+        return None, None
+
+
+def _is_rating_block(match, text: str) -> bool:
+    """A free-standing rating out of 5, not the tail of a longer number such as "2024 (12)"."""
+    start = match.start()
+    if start and (text[start - 1].isalnum() or text[start - 1] in ".,"):
+        return False
+    rating, _ = _rating_value(match)
+    return rating is not None and rating <= 5
+
+
+# Rating blocks are indexed under the last few characters of the text before them.
+SUFFIX_KEY_LENGTH = 8
+
+
+def tokenize_jina_markdown(markdown_text: str) -> tuple[list, dict]:
+    """
+    ``(tokens, rating_index)`` from a single scan of the page: every company
+    link and rating block match in document order, plus an index of the rating
+    blocks by the (lowercased) text directly before them on their line, across
+    whitespace -- what ``named_rating`` looks names up in.
+    """
+    tokens = []
+    rating_index = {}
+    for match in JINA_TOKEN.finditer(markdown_text):
+        tokens.append(match)
+        if match.group("rating") is None:
+            continue
+        start = match.start()
+        end = start
+        while end > 0 and markdown_text[end - 1].isspace():
+            end -= 1
+        if end == start or end == 0:
+            continue
+        line_start = max(markdown_text.rfind("\n", 0, end) + 1, end - MAX_NAME_LENGTH)
+        segment = markdown_text[line_start:end].lower()
+        entry = (segment, match)
+        for length in range(1, min(len(segment), SUFFIX_KEY_LENGTH) + 1):
+            rating_index.setdefault(segment[-length:], []).append(entry)
+    return tokens, rating_index
+
+
+def named_rating(rating_index: dict, name: str):
+    """The first rating block directly preceded by ``name`` ("Acme\n4.8 (123)"), or None."""
+    name = name.lower()
+    for segment, match in rating_index.get(name[-SUFFIX_KEY_LENGTH:], ()):
+        if segment.endswith(name):
+            return match
+    return None
+
+
+def page_labels(city: str, state: str, category: str) -> tuple[str, str, str]:
+    """Display city, region and category shared by every lead of a page (interned: they repeat across pages)."""
+    return (
+        sys.intern(city.replace("-", " ").title()),
+        sys.intern(state.upper()),
+        sys.intern(category.replace("-", " ").title()),
+    )
 
 
 def parse_jina_markdown(
@@ -353,37 +282,54 @@ def parse_jina_markdown(
     """
     r.jina.ai renders the page as markdown. Extract company links that include 'reviews'
     in the URL, using the link text as the business name.
+
+    A lead's rating is the block that follows its name ("Acme\n4.8 (123)")
+    anywhere on the page; failing that, the nearest block after its link and
+    before the next company link that is not another company's.
     """
-    leads = []
-    link_pattern = re.compile(
-        r"\[([^\]]+)\]\((https?://www\.angi\.com/companylist[^)]+reviews[^)]*)\)",
-        re.IGNORECASE,
-    )
+    tokens, rating_index = tokenize_jina_markdown(markdown_text)
+    links = [
+        (index, html.unescape(match.group("name")).strip(), match.group("url"))
+        for index, match in enumerate(tokens)
+        if match.group("url") is not None
+    ]
+    named = {name.lower(): named_rating(rating_index, name) for _, name, _ in links}
+    attributed = {id(match) for match in named.values() if match is not None}
+    city_name, region, category_name = page_labels(city, state, category)
 
-    for name, url in link_pattern.findall(markdown_text):
+    leads = []
+    for position, (index, clean_name, url) in enumerate(links):
         if "-reviews-" not in url:
             continue
-        clean_name = html.unescape(name).strip()
         if not clean_name or len(clean_name) < 2:
             continue
-        key = clean_name.lower()
-        if key in seen_leads:
+        if not claim_lead(seen_leads, clean_name.lower()):
             continue
-        seen_leads.add(key)
 
-        rating, review_count = extract_rating_from_text(clean_name, markdown_text)
+        rating_match = named[clean_name.lower()]
+        if rating_match is None:
+            next_link = links[position + 1][0] if position + 1 < len(links) else len(tokens)
+            rating_match = next(
+                (
+                    token
+                    for token in tokens[index + 1:next_link]
+                    if id(token) not in attributed and _is_rating_block(token, markdown_text)
+                ),
+                None,
+            )
+        rating, review_count = _rating_value(rating_match) if rating_match is not None else (None, None)
 
         lead = {
             "name": clean_name,
             "phone": None,
             "website": None,
             "address": None,
-            "city": city.replace("-", " ").title(),
-            "region": state.upper(),
+            "city": city_name,
+            "region": region,
             "postalCode": None,
             "rating": rating,
             "reviewCount": review_count,
-            "category": category.replace("-", " ").title(),
+            "category": category_name,
             "sourceUrl": url,
             "keyword": keyword,
             "location": location,
@@ -394,6 +340,17 @@ def parse_jina_markdown(
     return leads
 
 
+def lead_key(lead: dict) -> str:
+    return lead["name"].lower()
+
+
+# Angi paginates ~10 results/page; keep requests reasonable.
+MAX_PAGES = 40
+
+# Business cards per results page when the page does not say.
+RESULTS_PER_PAGE = 10
+
+
 def build_headers(user_agent: str | None = None, accept_language: str = "en-US,en;q=0.9"):
     headers = {
         "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
@@ -406,15 +363,48 @@ def build_headers(user_agent: str | None = None, accept_language: str = "en-US,e
     return headers
 
 
-def extract_rating(element) -> tuple[float | None, int | None]:
-    """Extract rating value and review count from a business card element."""
+# Fields of one business card, resolved in a single walk of the card.
+ROW_SPEC = RowSpec({
+    "name": (
+        'h3, h2, '
+        '[class*="business-name"], '
+        '[class*="BusinessName"], '
+        '[class*="ProName"], '
+        'a[class*="profile-target"] span'
+    ),
+    "name_link": 'a[href*="/companylist/"]',
+    "profile": (
+        'a[class*="profile-target"], '
+        'a[class*="BusinessProfileCard"], '
+        'a[href*="-reviews-"]'
+    ),
+    "rating_label": '[aria-label*="Rating"]',
+    "rating_display": '[class*="RatingDisplay"], [class*="rating"]',
+    "reviews": '[class*="review"], [class*="Review"]',
+    "address": (
+        '[class*="address"], '
+        '[class*="Address"], '
+        '[class*="location"], '
+        '[class*="Location"]'
+    ),
+    "services": (
+        '[class*="services"], '
+        '[class*="Services"], '
+        '[class*="category"], '
+        '[class*="Category"]'
+    ),
+})
+
+
+def extract_rating(fields: dict) -> tuple[float | None, int | None]:
+    """Extract rating value and review count from a business card's extracted fields."""
     rating = None
     review_count = None
     
     # Try to find rating from aria-label
-    rating_elem = element.select_one('[aria-label*="Rating"]')
+    rating_elem = fields["rating_label"]
     if rating_elem:
-        aria_label = rating_elem.get("aria-label", "")
+        aria_label = rating_elem.attr("aria-label", "")
         match = re.search(r'Rating:\s*([\d.]+)', aria_label)
         if match:
             try:
@@ -424,9 +414,9 @@ def extract_rating(element) -> tuple[float | None, int | None]:
     
     # Alternative: Look for rating display class
     if rating is None:
-        rating_display = element.select_one('[class*="RatingDisplay"], [class*="rating"]')
+        rating_display = fields["rating_display"]
         if rating_display:
-            rating_text = rating_display.get_text(strip=True)
+            rating_text = rating_display.text()
             match = re.search(r'([\d.]+)', rating_text)
             if match:
                 try:
@@ -435,9 +425,9 @@ def extract_rating(element) -> tuple[float | None, int | None]:
                     pass
     
     # Extract review count
-    review_elem = element.select_one('[class*="review"], [class*="Review"]')
+    review_elem = fields["reviews"]
     if review_elem:
-        review_text = review_elem.get_text(strip=True)
+        review_text = review_elem.text()
         match = re.search(r'\((\d+)\)', review_text)
         if match:
             try:
@@ -448,251 +438,590 @@ def extract_rating(element) -> tuple[float | None, int | None]:
     return rating, review_count
 
 
-def scrape_location(keyword, location, limit, seen_leads):
+def parse_results_page(html_text, keyword, location, city, state, category, url, backend=None) -> list[dict]:
+    """Extract every business card on a results page, in page order and without dedup."""
+    doc = parse_html(html_text, backend)
+
+    results = doc.select(
+        '[class*="BusinessProfileCard"], '
+        '[class*="ProCard"], '
+        '[class*="business-card"], '
+        '[data-testid*="business"], '
+        '[class*="SearchResult"], '
+        'article[class*="pro-card"]'
+    )
+
+    if not results:
+        results = doc.select('div[class*="card"] a[href*="/companylist/"]')
+        if results:
+            results = [r.parent_with_class("div") for r in results]
+            results = [r for r in results if r]
+
+    city_name, region, category_name = page_labels(city, state, category)
     leads = []
-    page = 1
-    max_pages = 40  # Angi paginates ~10 results/page; keep requests reasonable.
+    for row in results:
+        fields = ROW_SPEC.extract(row)
+        name_elem = fields["name"] or fields["name_link"]
+        if not name_elem:
+            continue
+
+        name = name_elem.text()
+        if not name or len(name) < 2:
+            continue
+
+        profile_link = fields["profile"]
+        profile_url = None
+        if profile_link:
+            href = profile_link.attr("href", "")
+            if href.startswith("/") and not href.startswith("//"):
+                profile_url = f"https://www.angi.com{href}"
+            elif href.startswith("http"):
+                profile_url = href
+
+        rating, review_count = extract_rating(fields)
+        address = fields["address"].text() if fields["address"] else None
+        services = fields["services"].text() if fields["services"] else None
+
+        leads.append({
+            "name": name,
+            "phone": None,
+            "website": None,
+            "address": address,
+            "city": city_name,
+            "region": region,
+            "postalCode": None,
+            "rating": rating,
+            "reviewCount": review_count,
+            "category": sys.intern(services) if services else category_name,
+            "sourceUrl": profile_url or url,
+            "keyword": keyword,
+            "location": location,
+            "source": "angi"
+        })
+    return leads
+
 
-    user_agents = load_user_agents()
-    proxies_list = load_proxies()
+def iter_location(
+    keyword,
+    location,
+    limit,
+    seen_leads,
+    stop_event=None,
+    store=None,
+    start_page=1,
+    on_page=None,
+    end_page=None,
+):
+    """
+    Yield leads for one location page by page, as soon as each page is parsed.
+    The generator returns a summary dict (``status``, ``count``,
+    ``pages_scraped`` or ``error``). Leads already in ``store`` are
+    skipped and do not count toward ``limit``.
+
+    Up to ``DEFAULT_PREFETCH`` following pages are fetched while the current
+    one is parsed, never past the last page announced on page 1 and never
+    more than the remaining ``limit`` needs.
+
+    Each page is requested from Angi directly, with the Jina reader raced
+    against it (see ``hedge``) after ``hedge_delay()`` seconds or the first
+    Cloudflare challenge, whichever comes first.
+
+    Scraping starts at ``start_page`` and stops after ``end_page`` at the
+    latest. Once each page is done, ``on_page(page, leads, last_page)`` gets
+    the leads yielded from it and the last page the location is known to
+    have (see ``checkpoint`` and ``work_queue``).
+    """
+    metrics = Metrics()
+    deadline = as_deadline(stop_event)
+    count = 0
+    page = start_page
+    max_pages = MAX_PAGES
+    end_page = min(end_page or MAX_PAGES, MAX_PAGES)
+    per_page = RESULTS_PER_PAGE
+
+    user_agents = get_pool(impersonate="chrome124")
+    proxy_pool = get_proxy_pool()
     cf_cookies = load_cf_cookies()
-    session = requests.Session()
 
     city, state = parse_city_state(location)
     category = keyword_to_category(keyword)
-    base_url = f"https://www.angi.com/companylist/us/{state}/{city}/{category}.htm"
+    base_url = f"{BASE_URL}/companylist/us/{state}/{city}/{category}.htm"
+
+    def page_url(number):
+        return base_url if number == 1 else f"{base_url}?page={number}"
+
+    def fetch_page(number, prefetch_cancelled):
+        """``(text, via_jina)`` for one results page; ``text`` is None when every route failed."""
+        url = page_url(number)
+
+        def given_up(stop) -> bool:
+            return stop.is_set() or prefetch_cancelled.is_set() or is_stopped(stop_event)
 
-    while len(leads) < limit and page <= max_pages:
-        url = base_url if page == 1 else f"{base_url}?page={page}"
-        html_text = None
+        return hedge.hedged(
+            partial(fetch_direct, url, given_up),
+            partial(fetch_jina, url, given_up),
+            hedge_delay(),
+            metrics=metrics,
+        )
 
+    def fetch_direct(url, given_up, stop, hedge_now):
         for attempt in range(4):
-            user_agent = choose_user_agent(user_agents)
+            if given_up(stop):
+                return None
+            if attempt:
+                metrics.incr("retries")
+            user_agent = user_agents.choice()
             headers = build_headers(user_agent)
-            current_proxy = random.choice(proxies_list) if proxies_list else None
-            proxy_dict = {"http": current_proxy, "https": current_proxy} if current_proxy else None
+            proxies = proxy_dict(proxy_pool.choose())
             try:
+                # Warms up only when the shared cookie jar is missing or stale.
+                session = SESSIONS.session(headers, proxies=proxies, metrics=metrics)
                 if cf_cookies:
                     session.cookies.update(cf_cookies)
 
-                # Warm up to seed cookies; ignore result.
-                session.get(
-                    "https://www.angi.com/",
-                    headers=headers,
-                    impersonate="chrome124",
-                    proxies=proxy_dict,
-                    timeout=15,
-                )
-
-                response = session.get(
-                    url,
-                    headers=headers,
-                    impersonate="chrome124",
-                    proxies=proxy_dict,
-                    timeout=35,
-                )
-                if response.status_code == 200 and not is_cf_blocked(response.text):
-                    html_text = response.text
-                    break
+                with metrics.phase("request"):
+                    response = fetch.get(
+                        session,
+                        url,
+                        headers=headers,
+                        impersonate="chrome124",
+                        proxies=proxies,
+                        proxy_pool=proxy_pool,
+                        timeout=35,
+                        is_blocked=is_blocked_response,
+                        metrics=metrics,
+                        deadline=deadline,
+                    )
+                challenged = is_cf_blocked(response.text)
+                if response.status_code == 200 and not challenged:
+                    return response.text
+                if response.status_code == 200:
+                    metrics.incr("cf_challenges")
+                if challenged:
+                    # Retrying directly rarely beats a challenge soon; let Jina race it.
+                    hedge_now()
+                SESSIONS.invalidate()
             except Exception:
                 pass
+        return None
 
-            time.sleep(random.uniform(1.0, 2.5))
-
-        fallback_via_jina = False
-        if html_text is None:
-            html_text = fetch_via_jina(url)
-            fallback_via_jina = html_text is not None
-
-        if html_text is None:
-            if page == 1:
-                return {
-                    "error": "Failed to fetch Angi (blocked by Cloudflare). Try adding residential proxies or ANGI_COOKIES.",
-                    "leads": [],
-                    "status": 403,
-                }
-            break
-
-        page_leads = []
-        if fallback_via_jina:
-            page_leads = parse_jina_markdown(
-                html_text, keyword, location, city, state, category, seen_leads
-            )
-        else:
-            soup = BeautifulSoup(html_text, "html.parser")
-
-            results = soup.select(
-                '[class*="BusinessProfileCard"], '
-                '[class*="ProCard"], '
-                '[class*="business-card"], '
-                '[data-testid*="business"], '
-                '[class*="SearchResult"], '
-                'article[class*="pro-card"]'
-            )
-
-            if not results:
-                results = soup.select('div[class*="card"] a[href*="/companylist/"]')
-                if results:
-                    results = [r.find_parent('div', class_=True) for r in results if r.find_parent('div', class_=True)]
-                    results = [r for r in results if r]
+    def fetch_jina(url, given_up, stop):
+        if given_up(stop):
+            return None
+        metrics.incr("jina_fallbacks")
+        with metrics.phase("jina"):
+            return fetch_via_jina(url, metrics=metrics, deadline=deadline)
 
-            for row in results:
-                if len(leads) + len(page_leads) >= limit:
+    pager = PagePrefetcher(fetch_page)
+    try:
+        while count < limit and page <= min(max_pages, end_page) and not is_stopped(stop_event):
+            if deadline is not None and not deadline.allows_page():
+                break
+            url = page_url(page)
+            started = time.monotonic()
+            try:
+                html_text, fallback_via_jina = pager.take(page)
+            except Exception as e:
+                if page == start_page and not (deadline is not None and deadline.spent()):
+                    return {"error": str(e), "metrics": metrics.as_dict()}
+                break
+
+            if html_text is None:
+                if page == start_page and not (deadline is not None and deadline.spent()):
+                    return {
+                        "error": "Failed to fetch Angi (blocked by Cloudflare). Try adding residential proxies or ANGI_COOKIES.",
+                        "status": 403,
+                        "metrics": metrics.as_dict(),
+                    }
+                break
+
+            if page == start_page and not fallback_via_jina:
+                max_pages = last_page(html_text, max_pages)
+                showing = result_range(html_text)
+                if showing:
+                    per_page = showing[1] - showing[0] + 1
+            ahead = pages_ahead(limit - count, per_page, DEFAULT_PREFETCH)
+            pager.fill(range(page + 1, min(max_pages, end_page, page + ahead) + 1))
+
+            page_leads = []
+            if fallback_via_jina:
+                with metrics.phase("parse"):
+                    page_leads = parse_jina_markdown(
+                        html_text, keyword, location, city, state, category, seen_leads
+                    )
+            else:
+                with metrics.phase("parse"):
+                    parsed = parse_results_page(html_text, keyword, location, city, state, category, url)
+                for lead in parsed:
+                    if count + len(page_leads) >= limit or cancelled(stop_event):
+                        break
+                    if not claim_lead(seen_leads, lead_key(lead)):
+                        metrics.incr("dedup_hits")
+                        continue
+                    page_leads.append(lead)
+
+            if not page_leads:
+                break
+
+            emitted = []
+            for lead in page_leads:
+                if count >= limit:
                     break
-
-                name_elem = row.select_one(
-                    'h3, h2, '
-                    '[class*="business-name"], '
-                    '[class*="BusinessName"], '
-                    '[class*="ProName"], '
-                    'a[class*="profile-target"] span'
-                )
-                if not name_elem:
-                    name_elem = row.select_one('a[href*="/companylist/"]')
-
-                if not name_elem:
-                    continue
-
-                name = name_elem.get_text(strip=True)
-                if not name or len(name) < 2:
-                    continue
-
-                lead_key = name.lower()
-                if lead_key in seen_leads:
+                if store is not None and store.known(lead):
+                    metrics.incr("known_leads")
                     continue
-                seen_leads.add(lead_key)
-
-                profile_link = row.select_one(
-                    'a[class*="profile-target"], '
-                    'a[class*="BusinessProfileCard"], '
-                    'a[href*="-reviews-"]'
-                )
-                profile_url = None
-                if profile_link:
-                    href = profile_link.get("href", "")
-                    if href.startswith("/") and not href.startswith("//"):
-                        profile_url = f"https://www.angi.com{href}"
-                    elif href.startswith("http"):
-                        profile_url = href
-
-                rating, review_count = extract_rating(row)
-
-                address_elem = row.select_one(
-                    '[class*="address"], '
-                    '[class*="Address"], '
-                    '[class*="location"], '
-                    '[class*="Location"]'
-                )
-                address = address_elem.get_text(strip=True) if address_elem else None
-
-                services_elem = row.select_one(
-                    '[class*="services"], '
-                    '[class*="Services"], '
-                    '[class*="category"], '
-                    '[class*="Category"]'
-                )
-                services = services_elem.get_text(strip=True) if services_elem else None
-
-                lead = {
-                    "name": name,
-                    "phone": None,
-                    "website": None,
-                    "address": address,
-                    "city": city.replace("-", " ").title(),
-                    "region": state.upper(),
-                    "postalCode": None,
-                    "rating": rating,
-                    "reviewCount": review_count,
-                    "category": services or category.replace("-", " ").title(),
-                    "sourceUrl": profile_url or url,
-                    "keyword": keyword,
-                    "location": location,
-                    "source": "angi"
-                }
-                page_leads.append(lead)
-
-        if not page_leads:
-            break
-
-        leads.extend(page_leads)
-        page += 1
-        time.sleep(random.uniform(1.4, 2.8))
+                count += 1
+                emitted.append(lead)
+                yield lead
+            if on_page is not None:
+                on_page(page, emitted, max_pages)
+            if deadline is not None:
+                deadline.record_page(time.monotonic() - started)
+            page += 1
+    finally:
+        wasted = pager.close()
+        if wasted:
+            metrics.incr("prefetch_wasted", wasted)
 
     return {
-        "leads": leads,
         "status": 200,
-        "count": len(leads),
-        "pages_scraped": page - 1,
+        "count": count,
+        "pages_scraped": page - start_page,
+        **out_of_time(deadline, count < limit and page <= min(max_pages, end_page)),
+        "metrics": metrics.as_dict(),
     }
 
 
-def scrape_angi(keyword, location, limit=2000):
-    """
-    Si la ubicación es "us_latino" (case-insensitive), recorre un conjunto de
-    ciudades de EE.UU. con alta población latina/español y agrega los leads
-    hasta el límite indicado. Si no, ejecuta la búsqueda tradicional en una sola ciudad.
-    """
-    normalized_location = location.strip().lower()
-    use_latino_locations = normalized_location in {"us_latino", "usa_latino", "all_us_latino", "usa_es"}
+# Business pages carry what the result cards leave out (phone, website, ZIP)
+# as schema.org JSON-LD.
+LD_JSON = re.compile(r'<script[^>]*type="application/ld\+json"[^>]*>(.*?)</script>', re.IGNORECASE | re.DOTALL)
+TEL_LINK = re.compile(r'href="tel:([^"]+)"', re.IGNORECASE)
 
-    if not use_latino_locations:
-        seen = set()
-        primary = scrape_location(keyword, location, limit, seen)
+PROFILE_CACHE = enrich.DetailCache("angi_profiles")
 
-        total_pages = primary.get("pages_scraped", 0)
-        leads = list(primary.get("leads", []))
 
-        state_abbr = parse_state_abbr(location)
-        fallback_loc = STATE_FALLBACK_CITY.get(state_abbr) if state_abbr else None
+def _ld_businesses(node):
+    """Every JSON-LD object with a ``telephone`` or ``address``, depth first."""
+    if isinstance(node, list):
+        for item in node:
+            yield from _ld_businesses(item)
+    elif isinstance(node, dict):
+        if "telephone" in node or "address" in node:
+            yield node
+        for key in ("@graph", "mainEntity", "itemListElement", "item"):
+            if key in node:
+                yield from _ld_businesses(node[key])
 
-        if fallback_loc and fallback_loc.strip().lower() != normalized_location and len(leads) < limit:
-            secondary = scrape_location(keyword, fallback_loc, limit, seen)
-            leads.extend(secondary.get("leads", []))
-            total_pages += secondary.get("pages_scraped", 0)
 
-        trimmed = leads[:limit]
+def parse_profile_page(html_text: str) -> dict:
+    """Phone, website, street address and ZIP from a business profile page; missing ones are left out."""
+    details = {}
+    for block in LD_JSON.findall(html_text):
+        try:
+            data = json.loads(block)
+        except ValueError:
+            continue
+        for business in _ld_businesses(data):
+            phone = business.get("telephone")
+            if isinstance(phone, str) and phone.strip():
+                details.setdefault("phone", phone.strip())
+            same_as = business.get("sameAs") or []
+            for website in [business.get("url")] + (same_as if isinstance(same_as, list) else [same_as]):
+                # ``url`` is often the Angi profile itself.
+                if isinstance(website, str) and website.startswith("http") and "angi.com" not in website:
+                    details.setdefault("website", website)
+                    break
+            address = business.get("address")
+            if isinstance(address, dict):
+                street = (address.get("streetAddress") or "").strip()
+                if street:
+                    details.setdefault("address", street)
+                postal_code = (address.get("postalCode") or "").strip()
+                if postal_code:
+                    details.setdefault("postalCode", postal_code)
+    if "phone" not in details:
+        match = TEL_LINK.search(html_text)
+        if match:
+            details["phone"] = html.unescape(match.group(1)).strip()
+    return details
 
-        return {
-            "leads": trimmed,
-            "status": 200 if trimmed else primary.get("status", 404),
-            "count": len(trimmed),
-            "pages_scraped": total_pages,
-            "locations": [location] + ([fallback_loc] if fallback_loc else []),
-            "mode": "single_with_state_fallback" if fallback_loc else "single",
-        }
 
-    all_leads = []
-    seen_leads = set()
-    total_pages = 0
+def profile_url(lead: dict) -> str | None:
+    """The lead's business profile page, on ``BASE_URL``; None when it only links the results page."""
+    url = lead.get("sourceUrl") or ""
+    if "-reviews-" not in url:
+        return None
+    return url.replace("https://www.angi.com", BASE_URL, 1)
 
-    for loc in LATINO_HEAVY_LOCATIONS:
-        if len(all_leads) >= limit:
-            break
 
-        result = scrape_location(keyword, loc, limit, seen_leads)
+def apply_profile(lead: dict, details: dict) -> dict:
+    """A copy of ``lead`` with the fields it lacks filled in from its profile page."""
+    enriched = dict(lead)
+    for field in ("phone", "website", "address", "postalCode"):
+        if not enriched.get(field) and details.get(field):
+            enriched[field] = details[field]
+    return enriched
 
-        if "leads" in result and isinstance(result["leads"], list):
-            all_leads.extend(result["leads"])
-        total_pages += result.get("pages_scraped", 0)
 
-    trimmed = all_leads[:limit]
+def fetch_profile(url: str, metrics=None) -> dict | None:
+    """Parsed profile page, or None when every attempt was blocked or failed."""
+    user_agents = get_pool(impersonate="chrome124")
+    proxy_pool = get_proxy_pool()
+    cf_cookies = load_cf_cookies()
+    for attempt in range(3):
+        if attempt and metrics is not None:
+            metrics.incr("retries")
+        headers = build_headers(user_agents.choice())
+        proxies = proxy_dict(proxy_pool.choose())
+        try:
+            session = SESSIONS.session(headers, proxies=proxies, metrics=metrics)
+            if cf_cookies:
+                session.cookies.update(cf_cookies)
+            response = fetch.get(
+                session,
+                url,
+                headers=headers,
+                impersonate="chrome124",
+                proxies=proxies,
+                proxy_pool=proxy_pool,
+                timeout=35,
+                is_blocked=is_blocked_response,
+                metrics=metrics,
+            )
+            if response.status_code == 200 and not is_cf_blocked(response.text):
+                return parse_profile_page(response.text)
+            if response.status_code == 404:
+                return None
+            if response.status_code == 200 and metrics is not None:
+                metrics.incr("cf_challenges")
+            SESSIONS.invalidate()
+        except Exception:
+            pass
+    return None
 
-    return {
-        "leads": trimmed,
-        "status": 200 if trimmed else 404,
-        "count": len(trimmed),
-        "pages_scraped": total_pages,
-        "locations": LATINO_HEAVY_LOCATIONS,
-        "mode": "us_latino",
-    }
+
+def enrich_leads(stream, metrics=None, deadline=None, workers: int = enrich.DEFAULT_WORKERS):
+    """
+    ``stream`` with each lead's phone, website and address filled in from
+    its profile page (see ``enrich``), in the same order. Past ``deadline``
+    (a ``time.monotonic()`` value) leads go out with what is cached.
+    """
+    return enrich.enrich(
+        stream,
+        partial(fetch_profile, metrics=metrics),
+        profile_url,
+        apply_profile,
+        cache=PROFILE_CACHE,
+        workers=workers,
+        metrics=metrics,
+        name="profiles",
+        deadline=deadline,
+    )
+
+
+def scrape_location(keyword, location, limit, seen_leads, stop_event=None, store=None, deadline_s=None):
+    if deadline_s:
+        stop_event = Deadline(deadline_s, parent=stop_event)
+    leads, summary = drain(
+        iter_location(keyword, location, limit, seen_leads, stop_event=stop_event, store=store)
+    )
+    if "error" in summary:
+        return {"leads": [], **summary}
+    return {"leads": leads, **summary}
+
+
+def iter_angi(
+    keyword,
+    location,
+    limit=2000,
+    max_cities=DEFAULT_MAX_CITIES,
+    max_per_host=None,
+    store=None,
+    journal=None,
+    seen_leads=None,
+    enrich_profiles=False,
+    deadline_s=None,
+    yield_stats=None,
+):
+    """
+    Si la ubicación es "us_latino" (case-insensitive), recorre un conjunto de
+    ciudades de EE.UU. con alta población latina/español y agrega los leads
+    hasta el límite indicado. Si no, ejecuta la búsqueda tradicional en una sola ciudad.
+
+    En modo us_latino se scrapean hasta ``max_cities`` ciudades a la vez
+    (``max_per_host`` limita las peticiones simultáneas por dominio).
+
+    Con ``store`` se omiten los leads ya devueltos en ejecuciones
+    anteriores (no cuentan para el límite) y se registran los nuevos. Con
+    ``journal`` (``checkpoint.Journal``) cada página queda registrada y un
+    trabajo reanudado no repite las páginas ya hechas. ``seen_leads`` permite
+    compartir la deduplicación entre varias búsquedas (ver ``batch``).
+
+    Con ``enrich_profiles`` se descarga la ficha de cada negocio (en paralelo,
+    una vez por URL y con caché en disco) para completar teléfono, sitio web
+    y dirección; los leads salen en el mismo orden.
+
+    Con ``deadline_s`` el trabajo entero termina a los ``deadline_s``
+    segundos: devuelve los leads obtenidos hasta entonces con
+    ``"partial": true`` y no empieza páginas ni ciudades que ya no caben.
+
+    Con ``yield_stats`` (``city_yield.YieldStats``) el modo us_latino ordena
+    las ciudades según los leads nuevos que dieron antes, omite las que no
+    rinden y abandona una ciudad en cuanto una de sus páginas apenas aporta
+    leads nuevos.
+
+    Genera los leads a medida que se parsean y devuelve el resumen final.
+    """
+    deadline = Deadline.start(deadline_s)
+    stage = None
+    if enrich_profiles:
+        stage = partial(enrich_leads, deadline=deadline.at if deadline is not None else None)
+    return (
+        yield from iter_source(
+            sys.modules[__name__],
+            "angi",
+            keyword,
+            location,
+            limit,
+            max_cities,
+            max_per_host,
+            store,
+            journal,
+            seen_leads,
+            stage=stage,
+            deadline=deadline,
+            yield_stats=yield_stats,
+        )
+    )
+
+
+def scrape_angi(
+    keyword,
+    location,
+    limit=2000,
+    max_cities=DEFAULT_MAX_CITIES,
+    max_per_host=None,
+    store=None,
+    journal=None,
+    enrich_profiles=False,
+    deadline_s=None,
+    yield_stats=None,
+):
+    leads, summary = drain(
+        iter_angi(
+            keyword,
+            location,
+            limit,
+            max_cities,
+            max_per_host,
+            store,
+            journal,
+            enrich_profiles=enrich_profiles,
+            deadline_s=deadline_s,
+            yield_stats=yield_stats,
+        )
+    )
+    return {"leads": leads, **summary}
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Angi.com Business Scraper")
-    parser.add_argument("keyword", help="Service keyword to search (e.g., 'plumber', 'electrician')")
-    parser.add_argument("location", help="Location to search (e.g., 'Houston, TX' or 'us_latino' for all latino-heavy cities)")
+    parser.add_argument("keyword", nargs="?", help="Service keyword to search (e.g., 'plumber', 'electrician')")
+    parser.add_argument("location", nargs="?", help="Location to search (e.g., 'Houston, TX' or 'us_latino' for all latino-heavy cities)")
     parser.add_argument("--limit", type=int, default=25, help="Maximum number of leads to return")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_MAX_CITIES, help="Cities scraped at once in us_latino mode")
+    parser.add_argument("--per-host", type=int, default=None, help="Maximum concurrent requests per host")
+    parser.add_argument("--serve", action="store_true", help="Run as a long-lived NDJSON JSON-RPC worker on stdin/stdout")
+    parser.add_argument("--jobs", type=int, default=4, help="Concurrent jobs in --serve and --batch mode")
+    parser.add_argument(
+        "--batch",
+        metavar="MATRIX",
+        default=None,
+        help="Run every (keyword, location, limit) row of a JSON/CSV job matrix as one NDJSON stream",
+    )
+    parser.add_argument(
+        "--enrich",
+        action="store_true",
+        help="Fetch each lead's profile page for its phone, website and address",
+    )
+    parser.add_argument("--stream", action="store_true", help="Emit one NDJSON lead per line, then a summary line")
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        default=None,
+        help="Seconds the whole job may take; it then returns what it has with partial: true",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        default=os.getenv("SCRAPER_METRICS_FILE"),
+        help="Write the job's metrics block here (.prom textfile, otherwise appended JSON lines)",
+    )
+    http_cache.add_arguments(parser)
+    lead_store.add_arguments(parser)
+    checkpoint.add_arguments(parser)
+    lead_table.add_arguments(parser)
+    city_yield.add_arguments(parser)
     args = parser.parse_args()
+    lead_table.check_args(parser, args)
+    http_cache.configure_from_args(args)
+    store = lead_store.store_from_args(args)
+
+    if args.serve:
+        from worker import serve
+
+        serve(max_jobs=args.jobs, metrics_file=args.metrics_file)
+        sys.exit(0)
+    if args.batch:
+        from batch import read_matrix, run_batch
 
-    result = scrape_angi(args.keyword, args.location, args.limit)
-    print(json.dumps(result, indent=2))
+        try:
+            matrix = read_matrix(args.batch, "angi")
+        except (OSError, ValueError) as exc:
+            parser.error(str(exc))
+        run_batch(matrix, sys.stdout, max_jobs=args.jobs, store=store)
+        sys.exit(0)
+    if not args.resume and (not args.keyword or not args.location):
+        parser.error("keyword and location are required unless --serve or --resume is given")
+    try:
+        journal = checkpoint.journal_from_args(args, "angi")
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    labels = {"source": "angi", "keyword": args.keyword, "location": args.location}
+    if args.stream or args.format != "json":
+        stream = iter_angi(
+            args.keyword,
+            args.location,
+            args.limit,
+            max_cities=args.concurrency,
+            max_per_host=args.per_host,
+            store=store,
+            journal=journal,
+            enrich_profiles=args.enrich,
+            deadline_s=args.deadline,
+            yield_stats=city_yield.stats_from_args(args),
+        )
+        if args.stream:
+            summary = write_ndjson(stream, sys.stdout)
+        else:
+            summary = lead_table.export(stream, args.format, args.output)
+            print(json.dumps(summary), file=sys.stderr)
+        if args.metrics_file:
+            export_metrics(args.metrics_file, summary, labels)
+        sys.exit(0)
+
+    result = scrape_angi(
+        args.keyword,
+        args.location,
+        args.limit,
+        max_cities=args.concurrency,
+        max_per_host=args.per_host,
+        store=store,
+        journal=journal,
+        enrich_profiles=args.enrich,
+        deadline_s=args.deadline,
+        yield_stats=city_yield.stats_from_args(args),
+    )
+    if args.metrics_file:
+        export_metrics(args.metrics_file, result, labels)
+    print(json.dumps(result))
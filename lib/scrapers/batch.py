@@ -0,0 +1,142 @@
+"""
+Batch mode: a whole matrix of (keyword, location, limit) jobs in one process.
+
+The matrix is a JSON list (or ``{"jobs": [...]}``) or a CSV file with
+``keyword``, ``location`` and optional ``limit``, ``source`` and ``id``
+columns. All jobs share the process's warm sessions, user-agent and proxy
+pools and, per source, one dedup set, so a business found by an earlier job
+is not returned again. Up to ``max_jobs`` jobs run at once, taken round-robin
+across sources; their requests to the same site are interleaved by the
+shared per-host rate limiter instead of arriving in per-job bursts.
+
+Output is NDJSON: ``{"type": "lead", "job": id, "lead": {...}}`` as leads
+arrive, ``{"type": "summary", "job": id, ...}`` when a job ends and a final
+``{"type": "batch", "jobs": n, "count": total}`` line.
+"""
+import argparse
+import csv
+import json
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import zip_longest
+
+from engine import source_iters
+from fanout import SharedSeen
+from streaming import consume
+
+DEFAULT_BATCH_JOBS = 4
+DEFAULT_LIMIT = 25
+
+
+def read_matrix(path: str, default_source: str = "yellow_pages") -> list[dict]:
+    """The jobs of a JSON or CSV job matrix, with ids, sources and limits filled in."""
+    with open(path, encoding="utf-8", newline="") as handle:
+        if path.lower().endswith(".csv"):
+            rows = list(csv.DictReader(handle))
+        else:
+            rows = json.load(handle)
+            if isinstance(rows, dict):
+                rows = rows.get("jobs", [])
+
+    jobs = []
+    for number, row in enumerate(rows, 1):
+        keyword = (row.get("keyword") or "").strip()
+        location = (row.get("location") or "").strip()
+        if not keyword or not location:
+            raise ValueError(f"Job matrix row {number}: keyword and location are required")
+        jobs.append({
+            "id": str(row.get("id") or f"job-{number}"),
+            "source": (row.get("source") or "").strip() or default_source,
+            "keyword": keyword,
+            "location": location,
+            "limit": int(row.get("limit") or DEFAULT_LIMIT),
+        })
+    ids = [job["id"] for job in jobs]
+    if len(set(ids)) != len(ids):
+        raise ValueError("Job matrix ids must be unique")
+    return jobs
+
+
+def schedule(jobs: list[dict]) -> list[dict]:
+    """Matrix order within each source, alternating between sources."""
+    by_source = {}
+    for job in jobs:
+        by_source.setdefault(job["source"], []).append(job)
+    return [job for turn in zip_longest(*by_source.values()) for job in turn if job is not None]
+
+
+def run_batch(
+    jobs: list[dict],
+    out,
+    max_jobs: int = DEFAULT_BATCH_JOBS,
+    scrapers: dict | None = None,
+    store=None,
+    shared_dedup: bool = True,
+) -> dict:
+    """Run every job of the matrix, writing the tagged NDJSON stream to ``out``; returns the batch line."""
+    scrapers = scrapers if scrapers is not None else source_iters()
+    unknown = sorted({job["source"] for job in jobs} - set(scrapers))
+    if unknown:
+        raise ValueError(f"Unknown source: {', '.join(unknown)}")
+    seen = {source: SharedSeen() for source in scrapers} if shared_dedup else {}
+    write_lock = threading.Lock()
+    totals = {"count": 0, "errors": {}}
+
+    def emit(record: dict):
+        line = json.dumps(record)
+        with write_lock:
+            out.write(line + "\n")
+            out.flush()
+
+    def run(job: dict):
+        options = {"seen_leads": seen.get(job["source"])}
+        if store is not None:
+            options["store"] = store
+        try:
+            stream = scrapers[job["source"]](job["keyword"], job["location"], job["limit"], **options)
+            summary = consume(stream, lambda lead: emit({"type": "lead", "job": job["id"], "lead": lead}))
+        except Exception as exc:
+            summary = {"error": str(exc)}
+        with write_lock:
+            totals["count"] += summary.get("count", 0)
+            if "error" in summary:
+                totals["errors"][job["id"]] = summary["error"]
+        emit({"type": "summary", "job": job["id"], **summary})
+
+    with ThreadPoolExecutor(max_workers=max(1, max_jobs)) as pool:
+        for job in schedule(jobs):
+            pool.submit(run, job)
+
+    result = {"type": "batch", "jobs": len(jobs), "count": totals["count"]}
+    if totals["errors"]:
+        result["errors"] = totals["errors"]
+    emit(result)
+    return result
+
+
+if __name__ == "__main__":
+    import http_cache
+    import lead_store
+
+    parser = argparse.ArgumentParser(description="Run a JSON/CSV matrix of scrape jobs as one NDJSON stream")
+    parser.add_argument("matrix")
+    parser.add_argument("--source", choices=("yellow_pages", "angi"), default="yellow_pages", help="For rows without one")
+    parser.add_argument("--jobs", type=int, default=DEFAULT_BATCH_JOBS, help="Jobs run at once")
+    parser.add_argument("--per-job-dedup", action="store_true", help="Let every job return leads other jobs found")
+    http_cache.add_arguments(parser)
+    lead_store.add_arguments(parser)
+    args = parser.parse_args()
+    http_cache.configure_from_args(args)
+
+    try:
+        matrix = read_matrix(args.matrix, args.source)
+    except (OSError, ValueError) as exc:
+        parser.error(str(exc))
+    run_batch(
+        matrix,
+        sys.stdout,
+        max_jobs=args.jobs,
+        store=lead_store.store_from_args(args),
+        shared_dedup=not args.per_job_dedup,
+    )
@@ -0,0 +1,185 @@
+"""
+Checkpoint journal for long scrape jobs, so a crashed or killed job can be
+resumed (``--resume <job-id>``) without repeating the pages it finished.
+
+Each job appends JSON lines to ``<cache dir>/jobs/<job-id>.ndjson``:
+
+- ``{"type": "job", "job_id": ..., "params": {...}}`` once, first;
+- ``{"type": "page", "location": ..., "page": n, "leads": [...], "last_page": m}``
+  after every results page, with the leads that location yielded from it and
+  the last page its result banner announced;
+- ``{"type": "location", "location": ..., "summary": {...}}`` when a location
+  finishes without an error and without running out of its deadline.
+
+Every line is flushed and fsynced before the scrape moves on. On resume each
+location first replays its journaled leads (re-claiming their dedup keys),
+then continues from the page after its last journaled one; finished
+locations are not requested again. A torn last line is ignored.
+"""
+import json
+import os
+import sys
+import threading
+import uuid
+from functools import partial
+
+from fanout import claim_lead, is_stopped
+from storage import cache_path
+
+
+class LocationState:
+    def __init__(self):
+        self.leads = []
+        self.pages = 0
+        self.next_page = 1
+        self.last_page = None
+        self.summary = None
+
+
+class Journal:
+    def __init__(self, job_id: str, params: dict, locations: dict | None = None):
+        self.job_id = job_id
+        self.params = params
+        self.path = journal_path(job_id)
+        self._locations = locations or {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(cls, params: dict, job_id: str | None = None) -> "Journal":
+        journal = cls(job_id or uuid.uuid4().hex[:12], params)
+        if os.path.exists(journal.path):
+            raise ValueError(f"Job {journal.job_id} already exists; use --resume")
+        journal._append({"type": "job", "job_id": journal.job_id, "params": params})
+        return journal
+
+    @classmethod
+    def load(cls, job_id: str) -> "Journal":
+        path = journal_path(job_id)
+        if not os.path.exists(path):
+            raise ValueError(f"No checkpoint journal for job {job_id}")
+        params = None
+        locations = {}
+        with open(path, encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                kind = record.get("type")
+                if kind == "job":
+                    params = record["params"]
+                    continue
+                state = locations.setdefault(record["location"], LocationState())
+                if kind == "page":
+                    state.leads.extend(record["leads"])
+                    state.pages += 1
+                    state.next_page = record["page"] + 1
+                    state.last_page = record.get("last_page")
+                elif kind == "location":
+                    state.summary = record["summary"]
+        if params is None:
+            raise ValueError(f"Checkpoint journal for job {job_id} has no job record")
+        return cls(job_id, params, locations)
+
+    def _append(self, record: dict):
+        line = json.dumps(record) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as handle:
+                handle.write(line)
+                handle.flush()
+                os.fsync(handle.fileno())
+
+    def page_done(self, location: str, page: int, leads: list, last_page: int | None = None):
+        self._append({"type": "page", "location": location, "page": page, "leads": leads, "last_page": last_page})
+
+    def location_done(self, location: str, summary: dict):
+        self._append({"type": "location", "location": location, "summary": summary})
+
+    def wrap(self, iter_fn, lead_key):
+        """
+        ``iter_fn`` (an ``iter_location``) with this journal: same signature,
+        but it replays what the journal already has for the location and
+        journals every page and the final summary of what it fetches.
+        """
+        return partial(self._iter_location, iter_fn, lead_key)
+
+    def _iter_location(self, iter_fn, lead_key, keyword, location, limit, seen_leads, stop_event=None):
+        with self._lock:
+            state = self._locations.get(location) or LocationState()
+        count = 0
+        for lead in state.leads:
+            if count >= limit or is_stopped(stop_event):
+                break
+            if not claim_lead(seen_leads, lead_key(lead)):
+                continue
+            count += 1
+            yield lead
+        if state.summary is not None:
+            return state.summary
+        if count >= limit or is_stopped(stop_event):
+            return {"status": 200, "count": count, "pages_scraped": state.pages}
+
+        summary = yield from iter_fn(
+            keyword,
+            location,
+            limit - count,
+            seen_leads,
+            stop_event=stop_event,
+            start_page=state.next_page,
+            end_page=state.last_page,
+            on_page=partial(self.page_done, location),
+        )
+        if "error" in summary:
+            # Not journaled as finished, so the next resume retries the location.
+            return {**summary, "count": count, "pages_scraped": state.pages} if count else summary
+        summary = {
+            **summary,
+            "count": summary.get("count", 0) + count,
+            "pages_scraped": summary.get("pages_scraped", 0) + state.pages,
+        }
+        if not summary.get("partial"):
+            # A location cut short by the deadline picks up from its next page on resume.
+            self.location_done(location, summary)
+        return summary
+
+
+def open_job(job_id: str, params: dict) -> Journal:
+    """The journal of ``job_id``, resumed when it exists and started with ``params`` otherwise."""
+    if os.path.exists(journal_path(job_id)):
+        return Journal.load(job_id)
+    return Journal.create(params, job_id)
+
+
+def journal_path(job_id: str) -> str:
+    if not job_id or os.sep in job_id or "/" in job_id or job_id.startswith("."):
+        raise ValueError(f"Invalid job id: {job_id!r}")
+    return cache_path("jobs", f"{job_id}.ndjson")
+
+
+def add_arguments(parser):
+    """The scrapers' ``--checkpoint``/``--job-id``/``--resume`` flags."""
+    parser.add_argument("--checkpoint", action="store_true", help="Journal every page so the job can be resumed")
+    parser.add_argument("--job-id", default=None, help="Name of the checkpointed job (default: random)")
+    parser.add_argument("--resume", metavar="JOB_ID", default=None, help="Continue a checkpointed job where it stopped")
+
+
+def journal_from_args(args, source: str) -> Journal | None:
+    """
+    The job's journal: loaded for ``--resume`` (whose keyword, location and
+    limit replace the command line's), new for ``--checkpoint``, else None.
+    The job id goes to stderr so a later run can resume it.
+    """
+    if args.resume:
+        journal = Journal.load(args.resume)
+        if journal.params.get("source") != source:
+            raise ValueError(f"Job {journal.job_id} is a {journal.params.get('source')} job")
+        args.keyword = journal.params["keyword"]
+        args.location = journal.params["location"]
+        args.limit = journal.params["limit"]
+    elif args.checkpoint:
+        params = {"source": source, "keyword": args.keyword, "location": args.location, "limit": args.limit}
+        journal = Journal.create(params, args.job_id)
+    else:
+        return None
+    print(f"job-id: {journal.job_id}", file=sys.stderr, flush=True)
+    return journal
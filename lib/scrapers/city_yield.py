@@ -0,0 +1,284 @@
+"""
+Yield-aware city scheduling for ``us_latino`` searches.
+
+``LATINO_HEAVY_LOCATIONS`` overlap (Queens, Bronx and Brooklyn against New
+York; Hialeah against Miami), so walking them in a fixed order spends many
+pages on leads another city already returned. ``YieldStats`` remembers, per
+(source, keyword, city), how many pages were fetched and how many new leads
+they brought; ``CitySchedule`` uses that to
+
+- run the cities that paid off best first (cities without history rank as
+  an average one),
+- leave out cities whose pages have brought less than ``min_yield`` of a
+  page in new leads (``pruned_locations`` in the summary), and
+- stop a city mid-pagination once one of its pages falls below
+  ``min_yield`` (``dropped_locations``),
+
+so ``limit`` is reached with fewer requests. Stats older than ``ttl``
+are ignored, so pruned cities get another chance.
+
+A page's new leads are the ones that survive the cross-city deduplication
+of ``iter_fan_out`` (its ``on_commit``), so a city whose leads an earlier
+city returns counts as a poor one even when both run at the same time.
+
+The stats are a JSON file (``--city-yield``, default
+``<cache dir>/city_yield.json``). Each job adds its counts to the file when
+it ends; two processes finishing at the same moment can lose one update,
+which only costs accuracy.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+from deadline import Deadline, cancelled
+from storage import cache_path, read_json, write_json
+
+# Share of a results page that has to be new leads for a city to be worth its requests.
+DEFAULT_MIN_YIELD = float(os.getenv("SCRAPER_MIN_CITY_YIELD", "0.1"))
+DEFAULT_TTL = float(os.getenv("SCRAPER_CITY_YIELD_TTL", str(30 * 24 * 3600)))
+
+# Pages of history a city needs before it can be pruned.
+MIN_EVIDENCE_PAGES = 2
+
+
+class YieldStats:
+    def __init__(self, path: str | None = None, ttl: float = DEFAULT_TTL):
+        self.path = path or cache_path("city_yield.json")
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = None
+        self._pending = {}
+
+    @staticmethod
+    def key(source: str, keyword: str, city: str) -> str:
+        return f"{source}|{keyword.strip().lower()}|{city}"
+
+    def _load(self) -> dict:
+        entries = read_json(self.path, {})
+        return entries if isinstance(entries, dict) else {}
+
+    def get(self, source: str, keyword: str, city: str) -> dict | None:
+        """``{"pages", "new", "rows"}`` recorded for the city, None without recent history."""
+        key = self.key(source, keyword, city)
+        with self._lock:
+            if self._entries is None:
+                self._entries = self._load()
+            entry = self._entries.get(key)
+            pending = self._pending.get(key)
+        if entry is not None and time.time() - entry.get("updated", 0) > self.ttl:
+            entry = None
+        if entry is None and pending is None:
+            return None
+        return {
+            field: (entry or {}).get(field, 0) + (pending or {}).get(field, 0)
+            for field in ("pages", "new", "rows")
+        }
+
+    def record(self, source: str, keyword: str, city: str, new: int, rows: int):
+        """One results page of ``city`` that brought ``new`` leads out of at most ``rows``."""
+        key = self.key(source, keyword, city)
+        with self._lock:
+            pending = self._pending.setdefault(key, {"pages": 0, "new": 0, "rows": 0})
+            pending["pages"] += 1
+            pending["new"] += new
+            pending["rows"] += rows
+
+    def save(self):
+        """Add this process's counts to the file."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            if not pending:
+                return
+            entries = self._load()
+            now = time.time()
+            for key, counts in pending.items():
+                entry = entries.get(key)
+                if entry is None or now - entry.get("updated", 0) > self.ttl:
+                    entry = {"pages": 0, "new": 0, "rows": 0}
+                for field, value in counts.items():
+                    entry[field] = entry.get(field, 0) + value
+                entry["updated"] = now
+                entries[key] = entry
+            write_json(self.path, entries)
+            self._entries = entries
+
+
+def share(entry: dict) -> float:
+    """Part of the fetched page capacity that was new leads."""
+    return entry["new"] / entry["rows"] if entry["rows"] else 0.0
+
+
+class _Page:
+    """One results page of a city: its leads so far and, once done, how many it had."""
+
+    def __init__(self):
+        self.size = None
+        self.seen = 0
+        self.new = 0
+        self.counted = False
+        self.more = False
+        self.settled = False
+
+    def close(self, size: int, counted: bool, more: bool):
+        self.size = size
+        self.counted = counted
+        self.more = more
+
+
+class _City:
+    def __init__(self, stop: Deadline):
+        self.stop = stop
+        # Leads yielded but not yet seen by ``committed``, with their page.
+        self.leads = deque()
+
+
+class CitySchedule:
+    """One job's city order and drop decisions for one source."""
+
+    def __init__(
+        self,
+        stats: YieldStats,
+        source: str,
+        keyword: str,
+        per_page: int,
+        min_yield: float = DEFAULT_MIN_YIELD,
+    ):
+        self.stats = stats
+        self.source = source
+        self.keyword = keyword
+        self.per_page = per_page
+        self.min_yield = min_yield
+        self.pruned = []
+        self.dropped = []
+        self._lock = threading.Lock()
+        self._cities = {}
+
+    def order(self, locations: list[str]) -> list[str]:
+        """``locations`` best-paying first, without the pruned ones (see ``pruned``)."""
+        entries = {loc: self.stats.get(self.source, self.keyword, loc) for loc in locations}
+        known = [share(entry) for entry in entries.values() if entry is not None]
+        prior = sum(known) / len(known) if known else 1.0
+
+        def expected(loc: str) -> float:
+            entry = entries[loc]
+            return share(entry) if entry is not None else prior
+
+        def prunable(loc: str) -> bool:
+            entry = entries[loc]
+            return entry is not None and entry["pages"] >= MIN_EVIDENCE_PAGES and share(entry) < self.min_yield
+
+        kept = [loc for loc in locations if not prunable(loc)]
+        if not kept:
+            # Nothing has paid off lately; walk everything again and refresh the stats.
+            kept = list(locations)
+        self.pruned = [loc for loc in locations if loc not in kept]
+        return sorted(kept, key=expected, reverse=True)
+
+    def wrap(self, iter_fn):
+        """
+        ``iter_fn`` (an ``iter_location``) noting which page each lead came
+        from, so ``committed`` can record every page's yield, and stopping
+        the location after a page below ``min_yield``.
+        """
+
+        def iter_location(keyword, location, limit, seen_leads, stop_event=None, on_page=None, **kwargs):
+            stop = Deadline(parent=stop_event)
+            city = _City(stop)
+            page = _Page()
+            with self._lock:
+                self._cities[location] = city
+
+            def page_done(number: int, leads: list, last_page: int | None = None):
+                nonlocal page
+                if on_page is not None:
+                    on_page(number, leads, last_page)
+                # A page cut short by the job, not by the city, says nothing about the city.
+                counted = not cancelled(stop_event) and len(leads) < limit
+                more = last_page is None or number < last_page
+                with self._lock:
+                    page.close(len(leads), counted, more)
+                    self._settle(location, city, page)
+                    page = _Page()
+                    if counted and more and len(leads) < self.min_yield * self.per_page:
+                        # Too thin even before earlier cities' leads are taken out.
+                        self._drop(location, city)
+
+            stream = iter_fn(keyword, location, limit, seen_leads, stop_event=stop, on_page=page_done, **kwargs)
+            try:
+                while True:
+                    try:
+                        lead = next(stream)
+                    except StopIteration as done:
+                        return done.value
+                    with self._lock:
+                        city.leads.append((lead, page))
+                    yield lead
+            finally:
+                stream.close()
+
+        return iter_location
+
+    def committed(self, location: str, lead: dict, kept: bool):
+        """
+        ``iter_fan_out``'s ``on_commit``: ``lead`` of ``location`` reached the
+        job's output (``kept``) or was dropped because an earlier city had it.
+        Once all leads of a page are in, the page's yield is recorded.
+        """
+        with self._lock:
+            city = self._cities.get(location)
+            if city is None or not city.leads or city.leads[0][0] is not lead:
+                # Not fetched through ``wrap`` (say, replayed from a journal).
+                return
+            _, page = city.leads.popleft()
+            page.seen += 1
+            page.new += kept
+            self._settle(location, city, page)
+
+    def _settle(self, location: str, city: "_City", page: "_Page"):
+        if page.size is None or page.seen < page.size or page.settled:
+            return
+        page.settled = True
+        if not page.counted:
+            return
+        self.stats.record(self.source, self.keyword, location, page.new, self.per_page)
+        if page.more and page.new < self.min_yield * self.per_page:
+            self._drop(location, city)
+
+    def _drop(self, location: str, city: "_City"):
+        if not city.stop.is_set():
+            self.dropped.append(location)
+            city.stop.set()
+
+    def report(self) -> dict:
+        return {
+            **({"pruned_locations": self.pruned} if self.pruned else {}),
+            **({"dropped_locations": self.dropped} if self.dropped else {}),
+        }
+
+
+_stats = None
+_stats_lock = threading.Lock()
+
+
+def get_stats(path: str | None = None) -> YieldStats:
+    """The process-wide stats (loaded on first use); ``path`` only applies the first time."""
+    global _stats
+    with _stats_lock:
+        if _stats is None:
+            _stats = YieldStats(path)
+        return _stats
+
+
+def add_arguments(parser):
+    """The scrapers' ``--schedule-cities``/``--city-yield`` flags."""
+    parser.add_argument(
+        "--schedule-cities",
+        action="store_true",
+        help="us_latino: order, prune and drop cities by the new leads they brought before",
+    )
+    parser.add_argument("--city-yield", default=None, help="JSON file of per-city yield (default: in the cache directory)")
+
+
+def stats_from_args(args) -> YieldStats | None:
+    return get_stats(args.city_yield) if args.schedule_cities else None
@@ -0,0 +1,126 @@
+"""
+Job-level time budgets.
+
+A ``Deadline`` is what the scrapers already accept as ``stop_event``: its
+``is_set()`` turns true when ``set()`` is called, when its parent is set or
+when the time is up, so every loop that checks ``is_stopped(stop_event)``
+between pages, retries and cities also stops on time. Code that waits
+(``fetch.get``, the rate limiter) asks it how long it may still wait, and
+the schedulers ask ``allows_page()`` whether another page, city or fallback
+is worth starting given how long pages have been taking.
+
+A job that stops because of its deadline returns what it has so far with
+``"partial": true``.
+"""
+import math
+import threading
+import time
+
+# Weight of the newest page in the running page-time estimate.
+PACE_WEIGHT = 0.3
+
+# Shortest timeout handed to a request, so one cut close is not rejected outright.
+MIN_TIMEOUT = 0.5
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+class _Pace:
+    """Running estimate of how long one results page takes, shared by a job's locations."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.seconds = None
+
+    def record(self, seconds: float):
+        with self._lock:
+            if self.seconds is None:
+                self.seconds = seconds
+            else:
+                self.seconds += PACE_WEIGHT * (seconds - self.seconds)
+
+
+class Deadline:
+    def __init__(self, seconds: float | None = None, parent=None, clock=time.monotonic):
+        self._clock = clock
+        self.parent = parent
+        at = None if seconds is None else clock() + seconds
+        parent_at = getattr(parent, "at", None)
+        if parent_at is not None:
+            at = parent_at if at is None else min(at, parent_at)
+        self.at = at
+        self._pace = parent._pace if isinstance(parent, Deadline) else _Pace()
+        self._stopped = threading.Event()
+        self._refused = False
+
+    @classmethod
+    def start(cls, seconds: float | None) -> "Deadline | None":
+        """A deadline ``seconds`` from now, or None without a budget."""
+        return cls(seconds) if seconds else None
+
+    def remaining(self) -> float:
+        if self.at is None:
+            return math.inf
+        return max(0.0, self.at - self._clock())
+
+    def expired(self) -> bool:
+        return self.at is not None and self._clock() >= self.at
+
+    def is_set(self) -> bool:
+        return self._stopped.is_set() or self.expired() or (self.parent is not None and self.parent.is_set())
+
+    def set(self):
+        self._stopped.set()
+
+    def cancelled(self) -> bool:
+        """Stopped by ``set()`` here or on a parent, as opposed to by the clock."""
+        if self._stopped.is_set():
+            return True
+        return cancelled(self.parent)
+
+    def check(self):
+        if self.expired():
+            raise DeadlineExceeded("job deadline reached")
+
+    def refuse(self, reason: str) -> DeadlineExceeded:
+        """Note that a request was dropped because it no longer fit; returns the error to raise."""
+        self._refused = True
+        return DeadlineExceeded(reason)
+
+    def timeout(self, seconds: float) -> float:
+        """``seconds`` capped to the time left."""
+        return min(seconds, max(MIN_TIMEOUT, self.remaining()))
+
+    def record_page(self, seconds: float):
+        self._pace.record(seconds)
+
+    def allows_page(self) -> bool:
+        """Whether one more page, at the pace seen so far, still fits."""
+        return not self.expired() and self.remaining() >= (self._pace.seconds or 0.0)
+
+    def spent(self) -> bool:
+        """Out of time: expired, too close to the end for another page, or a request did not fit."""
+        return self._refused or not self.allows_page()
+
+
+def as_deadline(stop_event) -> Deadline | None:
+    """The ``Deadline`` behind a ``stop_event``, if it is one."""
+    return stop_event if isinstance(stop_event, Deadline) else None
+
+
+def cancelled(stop_event) -> bool:
+    """
+    ``stop_event`` is set for a reason other than time. A page already
+    fetched is still worth emitting in full when only the clock ran out, so
+    its checkpoint does not lose the rest of it.
+    """
+    if isinstance(stop_event, Deadline):
+        return stop_event.cancelled()
+    return stop_event is not None and stop_event.is_set()
+
+
+def out_of_time(deadline: Deadline | None, unfinished: bool) -> dict:
+    """``{"partial": True}`` for a summary cut short by ``deadline``, else nothing."""
+    return {"partial": True} if deadline is not None and unfinished and deadline.spent() else {}
@@ -0,0 +1,321 @@
+"""
+One search engine for every lead source.
+
+Each source is a scraper module acting as an adapter: it knows how to page
+through one location (``iter_location``), what makes two of its leads the
+same (``lead_key``) and which cities to cover (``LATINO_HEAVY_LOCATIONS``,
+``STATE_FALLBACK_CITY``, shared from ``locations``). Everything around that,
+namely the single-city search with its state fallback, the ``us_latino``
+fan-out, journaling, the lead store and extra pipeline stages, lives here
+once. The layer underneath is shared as well: warm sessions, the per-host
+rate limiter and concurrency caps, the HTTP cache and the user-agent and
+proxy pools are process-wide.
+
+``search(keyword, location, sources=[...])`` runs several sources at once
+and merges them into one stream, so asking both sites takes as long as the
+slowest one rather than the sum. A business already returned by one source
+is dropped when another finds it too.
+
+    python engine.py plumber "Houston, TX" --sources yellow_pages,angi --stream
+"""
+import argparse
+import importlib
+import json
+import queue
+import re
+import sys
+import threading
+from functools import partial
+
+import http_cache
+from city_yield import CitySchedule
+from fanout import DEFAULT_MAX_CITIES, iter_fan_out
+from http_cache import HTTP_CACHE
+from lead_store import normalize_name, remember
+from locations import fallback_city, is_latino
+from metrics import Metrics
+from streaming import drain, write_ndjson
+
+# Source name -> (adapter module, its top-level lead generator), imported on first use.
+SOURCES = {
+    "yellow_pages": ("yellow_pages_scraper", "iter_yellow_pages"),
+    "angi": ("angi_scraper", "iter_angi"),
+}
+
+_SOURCE_DONE = object()
+
+
+def source_module(name: str):
+    if name not in SOURCES:
+        raise ValueError(f"Unknown source: {name}")
+    return importlib.import_module(SOURCES[name][0])
+
+
+def source_iters(names=tuple(SOURCES)) -> dict:
+    """The top-level lead generators (``iter_yellow_pages``, ...) of ``names``."""
+    return {name: getattr(source_module(name), SOURCES[name][1]) for name in names}
+
+
+def iter_source(
+    scraper,
+    source: str,
+    keyword: str,
+    location: str,
+    limit: int = 2000,
+    max_cities: int = DEFAULT_MAX_CITIES,
+    max_per_host: int | None = None,
+    store=None,
+    journal=None,
+    seen_leads=None,
+    stage=None,
+    deadline=None,
+    yield_stats=None,
+):
+    """
+    Search one source: a single location plus its state's fallback city, or
+    every city of the source's ``LATINO_HEAVY_LOCATIONS`` for ``us_latino``.
+    ``scraper`` is the source's module; ``stage(stream, metrics)`` wraps its
+    lead stream after the lead store has seen it (see ``enrich``).
+
+    With a ``deadline.Deadline`` the search stops when it runs out and does
+    not start a fallback city or a ``us_latino`` city that no longer fits;
+    the summary then says ``"partial": true`` and lists the cities it left
+    out under ``skipped_locations``. With ``yield_stats`` (a
+    ``city_yield.YieldStats``) ``us_latino`` cities are ordered, pruned and
+    dropped by the new leads they bring (see ``city_yield``).
+
+    Yields leads as they are parsed and returns the job summary.
+    """
+    cache_stats = HTTP_CACHE.stats()
+    metrics = Metrics()
+    job = {"job_id": journal.job_id} if journal is not None else {}
+
+    def city_iter(iter_fn):
+        iter_fn = partial(iter_fn, store=store)
+        return journal.wrap(iter_fn, scraper.lead_key) if journal is not None else iter_fn
+
+    def staged(stream):
+        stream = remember(store, stream, source)
+        return stage(stream, metrics) if stage is not None else stream
+
+    if not is_latino(location):
+        seen = seen_leads if seen_leads is not None else set()
+        iter_city = city_iter(scraper.iter_location)
+        primary = yield from staged(iter_city(keyword, location, limit, seen, stop_event=deadline))
+        metrics.add_location(location, primary)
+
+        count = primary.get("count", 0)
+        total_pages = primary.get("pages_scraped", 0)
+        cut_short = bool(primary.get("partial"))
+        skipped = []
+
+        fallback_loc = fallback_city(location, scraper.STATE_FALLBACK_CITY)
+        if fallback_loc and count < limit and deadline is not None and deadline.spent():
+            skipped.append(fallback_loc)
+        elif fallback_loc and count < limit:
+            secondary = yield from staged(iter_city(keyword, fallback_loc, limit - count, seen, stop_event=deadline))
+            metrics.add_location(fallback_loc, secondary)
+            count += secondary.get("count", 0)
+            total_pages += secondary.get("pages_scraped", 0)
+            cut_short = cut_short or bool(secondary.get("partial"))
+
+        return {
+            "status": 200 if count else primary.get("status", 404),
+            "count": count,
+            "pages_scraped": total_pages,
+            "locations": [location] + ([fallback_loc] if fallback_loc else []),
+            "mode": "single_with_state_fallback" if fallback_loc else "single",
+            **_time_budget(cut_short, skipped),
+            **job,
+            "metrics": metrics.as_dict(),
+            **HTTP_CACHE.report(cache_stats),
+        }
+
+    errors = {}
+    skipped = []
+    cut_short = []
+    locations = scraper.LATINO_HEAVY_LOCATIONS
+    schedule = None
+    iter_fn = scraper.iter_location
+    if yield_stats is not None:
+        schedule = CitySchedule(yield_stats, source, keyword, scraper.RESULTS_PER_PAGE)
+        locations = schedule.order(locations)
+        iter_fn = schedule.wrap(iter_fn)
+
+    def on_summary(loc: str, summary: dict):
+        metrics.add_location(loc, summary)
+        if summary.get("partial"):
+            cut_short.append(loc)
+
+    try:
+        count, total_pages = yield from staged(
+            iter_fan_out(
+                city_iter(iter_fn),
+                keyword,
+                locations,
+                limit,
+                seen_leads if seen_leads is not None else set(),
+                max_cities=max_cities,
+                max_per_host=max_per_host,
+                on_summary=on_summary,
+                lead_key=scraper.lead_key,
+                errors=errors,
+                deadline=deadline,
+                skipped=skipped,
+                on_commit=schedule.committed if schedule is not None else None,
+            )
+        )
+    finally:
+        if yield_stats is not None:
+            yield_stats.save()
+
+    return {
+        "status": 200 if count else 404,
+        "count": count,
+        "pages_scraped": total_pages,
+        "locations": locations,
+        "mode": "us_latino",
+        **_time_budget(bool(cut_short and count < limit), skipped if count < limit else []),
+        **(schedule.report() if schedule is not None else {}),
+        **job,
+        **({"errors": errors} if errors else {}),
+        "metrics": metrics.as_dict(),
+        **HTTP_CACHE.report(cache_stats),
+    }
+
+
+def _time_budget(cut_short: bool, skipped: list) -> dict:
+    """Summary fields of a search the deadline cut short; nothing otherwise."""
+    if not cut_short and not skipped:
+        return {}
+    return {"partial": True, **({"skipped_locations": skipped} if skipped else {})}
+
+
+def business_key(lead: dict) -> str:
+    """Identity of a business across sources, which share neither ids nor (for Angi) phones."""
+    city = re.sub(r"\W+", " ", (lead.get("city") or "").lower()).strip()
+    return f"{normalize_name(lead.get('name'))}|{city}"
+
+
+def search(
+    keyword: str,
+    location: str,
+    sources=tuple(SOURCES),
+    limit: int = 2000,
+    source_options: dict | None = None,
+    iters: dict | None = None,
+    **options,
+):
+    """
+    Run ``sources`` concurrently and yield their leads as they arrive, each
+    business once. ``limit`` applies per source; ``options`` (``max_cities``,
+    ``store``, ...) go to every source and ``source_options[name]`` to
+    one (``{"angi": {"enrich_profiles": True}}``).
+
+    Returns ``{"status", "count", "sources": {name: summary}}``, with
+    ``errors`` for sources that failed, ``cross_source_duplicates`` and
+    ``partial`` when a source ran out of its ``deadline_s``.
+    """
+    iters = iters if iters is not None else source_iters(sources)
+    unknown = [name for name in sources if name not in iters]
+    if unknown:
+        raise ValueError(f"Unknown source: {', '.join(unknown)}")
+    source_options = source_options or {}
+    outbox = queue.SimpleQueue()
+    stop = threading.Event()
+    summaries = {}
+    errors = {}
+
+    def run(name: str):
+        stream = iters[name](keyword, location, limit, **options, **source_options.get(name, {}))
+        try:
+            while not stop.is_set():
+                try:
+                    outbox.put((name, next(stream)))
+                except StopIteration as stop_iteration:
+                    summaries[name] = stop_iteration.value or {}
+                    if "error" in summaries[name]:
+                        errors[name] = summaries[name]["error"]
+                    break
+        except Exception as exc:
+            errors[name] = str(exc)
+        finally:
+            stream.close()
+            outbox.put((name, _SOURCE_DONE))
+
+    threads = [threading.Thread(target=run, args=(name,), name=f"search-{name}", daemon=True) for name in sources]
+    for thread in threads:
+        thread.start()
+
+    owners = {}
+    count = duplicates = 0
+    running = len(threads)
+    try:
+        while running:
+            name, lead = outbox.get()
+            if lead is _SOURCE_DONE:
+                running -= 1
+                continue
+            key = business_key(lead)
+            if owners.setdefault(key, name) != name:
+                duplicates += 1
+                continue
+            count += 1
+            yield lead
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    result = {
+        "status": 200 if count else 404,
+        "count": count,
+        "sources": {name: summaries.get(name, {}) for name in sources},
+        "cross_source_duplicates": duplicates,
+    }
+    if any(summary.get("partial") for summary in result["sources"].values()):
+        result["partial"] = True
+    if errors:
+        result["errors"] = errors
+    return result
+
+
+if __name__ == "__main__":
+    import city_yield
+    import lead_store
+
+    parser = argparse.ArgumentParser(description="Search several lead sources at once as one deduplicated stream")
+    parser.add_argument("keyword")
+    parser.add_argument("location")
+    parser.add_argument("--sources", default=",".join(SOURCES), help="Comma-separated: yellow_pages,angi")
+    parser.add_argument("--limit", type=int, default=25, help="Maximum leads per source")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_MAX_CITIES)
+    parser.add_argument("--per-host", type=int, default=None)
+    parser.add_argument("--stream", action="store_true")
+    parser.add_argument("--deadline", type=float, default=None, help="Seconds the whole search may take")
+    http_cache.add_arguments(parser)
+    lead_store.add_arguments(parser)
+    city_yield.add_arguments(parser)
+    args = parser.parse_args()
+    http_cache.configure_from_args(args)
+
+    sources = [name.strip() for name in args.sources.split(",") if name.strip()]
+    unknown = [name for name in sources if name not in SOURCES]
+    if unknown or not sources:
+        parser.error(f"--sources must name some of: {', '.join(SOURCES)}")
+    stream = search(
+        args.keyword,
+        args.location,
+        sources,
+        args.limit,
+        max_cities=args.concurrency,
+        max_per_host=args.per_host,
+        store=lead_store.store_from_args(args),
+        yield_stats=city_yield.stats_from_args(args),
+        deadline_s=args.deadline,
+    )
+    if args.stream:
+        write_ndjson(stream, sys.stdout)
+    else:
+        leads, summary = drain(stream)
+        print(json.dumps({"leads": leads, **summary}))
@@ -0,0 +1,164 @@
+"""
+Enrichment stage: fill in lead fields from a second page per lead.
+
+Some sources only list a name and a link on their result pages; the phone,
+website and address sit on the page the link points to. ``enrich()`` sits
+between a scraper's lead stream and its consumer and fetches those detail
+pages on a small thread pool while the stream keeps going:
+
+- leads come out in the order the stream produced them, each as soon as its
+  own details (and those of every lead before it) are in;
+- at most ``workers`` detail pages are fetched at once and at most
+  ``4 * workers`` leads wait for theirs, so a slow site holds the stream back
+  instead of piling up fetches;
+- every URL is fetched once per job, however many leads point at it;
+- parsed details are kept on disk (``DetailCache``) for ``ttl`` seconds, so a
+  repeat run over the same area fetches nothing it already knows;
+- past an optional ``deadline`` nothing new is fetched and nothing is waited
+  for: leads go out with whatever details are cached or already in.
+
+The fetch itself is the caller's (``fetch_details(url)``), so it goes through
+``fetch`` with the source's own sessions, rate limit and block detection.
+"""
+import hashlib
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import storage
+from storage import read_json, write_json
+
+DEFAULT_WORKERS = int(os.getenv("SCRAPER_ENRICH_WORKERS", "4"))
+DEFAULT_TTL = float(os.getenv("SCRAPER_ENRICH_TTL", str(7 * 24 * 3600)))
+
+# Leads allowed to wait for their details, per worker.
+WINDOW_PER_WORKER = 4
+
+
+class DetailCache:
+    """Parsed details by URL, one JSON file each under ``<cache dir>/<namespace>/``."""
+
+    def __init__(self, namespace: str, ttl: float = DEFAULT_TTL):
+        self.namespace = namespace
+        self.ttl = ttl
+
+    def _path(self, url: str) -> str:
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(storage.CACHE_DIR, self.namespace, digest[:2], f"{digest}.json")
+
+    def get(self, url: str) -> dict | None:
+        entry = read_json(self._path(url))
+        if not isinstance(entry, dict) or entry.get("url") != url:
+            return None
+        if time.time() - entry.get("stored_at", 0) > self.ttl:
+            return None
+        return entry.get("details")
+
+    def put(self, url: str, details: dict):
+        write_json(self._path(url), {"url": url, "stored_at": time.time(), "details": details})
+
+
+def enrich(
+    stream,
+    fetch_details,
+    url_of,
+    apply,
+    cache: DetailCache | None = None,
+    workers: int = DEFAULT_WORKERS,
+    metrics=None,
+    name: str = "details",
+    deadline: float | None = None,
+):
+    """
+    Yield the leads of ``stream`` in order, each passed through
+    ``apply(lead, details)`` once ``fetch_details(url_of(lead))`` has parsed
+    its details page, and return the stream's summary.
+
+    ``url_of`` returns None for leads without a details page and
+    ``fetch_details`` returns None (or raises) when the page could not be
+    had; those leads come out unchanged, as do leads still waiting once
+    ``deadline`` (a ``time.monotonic()`` value) has passed. ``metrics``
+    counts ``<name>_fetched``, ``<name>_cache_hits``, ``<name>_shared`` (URLs
+    already asked for by an earlier lead), ``<name>_failed`` and
+    ``<name>_over_budget``.
+    """
+    workers = max(1, workers)
+    window = workers * WINDOW_PER_WORKER
+
+    def incr(counter: str):
+        if metrics is not None:
+            metrics.incr(f"{name}_{counter}")
+
+    def remaining() -> float | None:
+        return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+    def cached(url: str):
+        details = cache.get(url) if cache is not None else None
+        if details is not None:
+            incr("cache_hits")
+        return details
+
+    def lookup(url: str):
+        details = cached(url)
+        if details is not None:
+            return details
+        details = fetch_details(url)
+        if details is None:
+            incr("failed")
+            return None
+        incr("fetched")
+        if cache is not None:
+            cache.put(url, details)
+        return details
+
+    def finish(lead: dict, future):
+        if future is None:
+            return lead
+        try:
+            details = future.result(timeout=remaining())
+        except TimeoutError:
+            future.cancel()
+            incr("over_budget")
+            details = None
+        except Exception:
+            incr("failed")
+            details = None
+        return apply(lead, details) if details else lead
+
+    def late(lead: dict, url: str) -> dict:
+        details = cached(url)
+        if details is None:
+            incr("over_budget")
+            return lead
+        return apply(lead, details)
+
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"enrich-{name}")
+    requested = {}
+    waiting = deque()
+    try:
+        while True:
+            try:
+                lead = next(stream)
+            except StopIteration as stop:
+                summary = stop.value
+                break
+            url = url_of(lead)
+            future = None
+            if url and url not in requested and remaining() == 0:
+                lead = late(lead, url)
+            elif url:
+                future = requested.get(url)
+                if future is None:
+                    future = requested[url] = pool.submit(lookup, url)
+                else:
+                    incr("shared")
+            waiting.append((lead, future))
+            while waiting and (len(waiting) > window or waiting[0][1] is None or waiting[0][1].done()):
+                yield finish(*waiting.popleft())
+        while waiting:
+            yield finish(*waiting.popleft())
+    finally:
+        stream.close()
+        pool.shutdown(wait=False, cancel_futures=True)
+    return summary
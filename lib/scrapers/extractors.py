@@ -0,0 +1,169 @@
+"""
+Declarative, compiled single-pass field extraction for result cards.
+
+A ``RowSpec`` maps field names to CSS selector groups. The selectors are
+compiled once into plain predicates, then ``extract(row)`` walks the card's
+subtree a single time and records, for every field, the first matching
+element in document order -- the same element ``row.select_one(css)`` would
+return, without re-walking the subtree once per field. On backends whose
+selector engine is native (``node.native_select``) one ``select_one`` per
+field can be cheaper than walking the tree from Python, depending on the
+spec: each spec times both on its first ``CALIBRATION_ROWS`` rows per backend
+and keeps the faster one.
+
+Supported selector syntax: tag names, ``.class``, ``[attr]``,
+``[attr="v"]``, ``[attr*="v"]``, ``[attr^="v"]``, ``[attr$="v"]``, the
+descendant combinator (whitespace) and comma-separated groups.
+"""
+import re
+import time
+
+# Rows each spec times both strategies on before settling on one per backend.
+CALIBRATION_ROWS = 16
+
+_COMPOUND = re.compile(
+    r"""
+    (?P<tag>^[a-zA-Z][\w-]*)
+    | \.(?P<cls>[\w-]+)
+    | \[\s*(?P<attr>[\w-]+)\s*(?:(?P<op>[*^$]?=)\s*"(?P<value>[^"]*)"\s*)?\]
+    """,
+    re.VERBOSE,
+)
+
+
+class _Compound:
+    __slots__ = ("tag", "classes", "attrs")
+
+    def __init__(self, text: str):
+        self.tag = None
+        classes = []
+        self.attrs = []
+        pos = 0
+        while pos < len(text):
+            match = _COMPOUND.match(text, pos)
+            if not match or match.end() == pos:
+                raise ValueError(f"Unsupported selector: {text!r}")
+            if match.group("tag"):
+                self.tag = match.group("tag").lower()
+            elif match.group("cls"):
+                classes.append(match.group("cls"))
+            else:
+                self.attrs.append((match.group("attr"), match.group("op"), match.group("value")))
+            pos = match.end()
+        self.classes = frozenset(classes)
+
+    def matches(self, tag: str, attrs: dict, classes: frozenset | None = None) -> bool:
+        if self.tag is not None and tag != self.tag:
+            return False
+        if self.classes:
+            if classes is None:
+                classes = frozenset((attrs.get("class") or "").split())
+            if not self.classes <= classes:
+                return False
+        for name, op, value in self.attrs:
+            actual = attrs.get(name)
+            if actual is None:
+                if name not in attrs:
+                    return False
+                actual = ""
+            if op is None:
+                continue
+            if op == "=" and actual != value:
+                return False
+            if op == "*=" and (not value or value not in actual):
+                return False
+            if op == "^=" and (not value or not actual.startswith(value)):
+                return False
+            if op == "$=" and (not value or not actual.endswith(value)):
+                return False
+        return True
+
+
+class _Selector:
+    """One selector of a group: compounds joined by descendant combinators."""
+
+    __slots__ = ("subject", "ancestors")
+
+    def __init__(self, text: str):
+        compounds = [_Compound(part) for part in text.split()]
+        if not compounds:
+            raise ValueError("Empty selector")
+        self.subject = compounds[-1]
+        self.ancestors = compounds[:-1][::-1]
+
+    def matches_ancestors(self, node) -> bool:
+        pending = 0
+        parent = node.parent
+        while parent is not None and pending < len(self.ancestors):
+            if self.ancestors[pending].matches(parent.tag, parent.attrs):
+                pending += 1
+            parent = parent.parent
+        return pending == len(self.ancestors)
+
+
+class RowSpec:
+    def __init__(self, fields: dict[str, str]):
+        self.css = dict(fields)
+        self.fields = list(fields)
+        self._rules = [
+            (name, _Selector(part.strip()))
+            for name, css in fields.items()
+            for part in css.split(",")
+        ]
+        self._strategy = {}
+        self._timings = {}
+
+    def extract(self, row) -> dict:
+        """Map every field to its first matching descendant of ``row`` (or None)."""
+        if not row.native_select:
+            return self.walk(row)
+        strategy = self._strategy.get(type(row))
+        if strategy is None:
+            return self._calibrate(row)
+        return strategy(row)
+
+    def select_each(self, row) -> dict:
+        """``extract`` as one native ``select_one`` per field."""
+        return {name: row.select_one(css) for name, css in self.css.items()}
+
+    def _calibrate(self, row) -> dict:
+        started = time.perf_counter()
+        found = self.walk(row)
+        walked = time.perf_counter() - started
+        started = time.perf_counter()
+        self.select_each(row)
+        selected = time.perf_counter() - started
+
+        backend = type(row)
+        rows, walk_total, select_total = self._timings.get(backend, (0, 0.0, 0.0))
+        rows, walk_total, select_total = rows + 1, walk_total + walked, select_total + selected
+        self._timings[backend] = (rows, walk_total, select_total)
+        if rows >= CALIBRATION_ROWS:
+            self._strategy[backend] = self.walk if walk_total <= select_total else self.select_each
+        return found
+
+    def strategy(self, backend) -> str | None:
+        """``"walk"`` or ``"select_each"`` once calibrated for ``backend``'s node type."""
+        chosen = self._strategy.get(backend)
+        return chosen.__name__ if chosen else None
+
+    def walk(self, row) -> dict:
+        """Single-pass ``extract``: one walk of the card for all fields."""
+        found = dict.fromkeys(self.fields)
+        pending = self._rules
+        for node in row.descendants():
+            tag = node.tag
+            attrs = node.attrs
+            classes = frozenset((attrs.get("class") or "").split())
+            matched = None
+            for name, selector in pending:
+                if found[name] is None and selector.subject.matches(tag, attrs, classes) and (
+                    not selector.ancestors or selector.matches_ancestors(node)
+                ):
+                    found[name] = node
+                    matched = True
+            if matched:
+                pending = [rule for rule in pending if found[rule[0]] is None]
+                if not pending:
+                    break
+        return found
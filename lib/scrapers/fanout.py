@@ -0,0 +1,193 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from deadline import Deadline
+from fetch import HOST_SLOTS
+from streaming import consume
+
+DEFAULT_MAX_CITIES = 4
+
+# How often a city waiting for room in the buffer rechecks its stop event.
+BLOCKED_POLL = 0.5
+
+_CITY_DONE = object()
+
+
+class SharedSeen:
+    """Thread-safe wrapper around a plain ``seen_leads`` set (updated in place)."""
+
+    def __init__(self, initial=None):
+        self._lock = threading.Lock()
+        self._keys = initial if initial is not None else set()
+
+    def claim(self, key: str) -> bool:
+        with self._lock:
+            if key in self._keys:
+                return False
+            self._keys.add(key)
+            return True
+
+    def add(self, key: str):
+        with self._lock:
+            self._keys.add(key)
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            return key in self._keys
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._keys)
+
+
+class CityClaims:
+    """
+    A city's provisional view of a ``SharedSeen``: keys the city already had
+    or that earlier cities have committed are refused, everything else is
+    only recorded locally. Whether the lead survives is decided when it is
+    committed in location order, so a faster later city cannot take a key
+    away from an earlier one.
+    """
+
+    def __init__(self, shared: SharedSeen):
+        self._shared = shared
+        self._local = set()
+
+    def claim(self, key: str) -> bool:
+        if key in self._local or key in self._shared:
+            return False
+        self._local.add(key)
+        return True
+
+    def __contains__(self, key) -> bool:
+        return key in self._local or key in self._shared
+
+
+def claim_lead(seen_leads, key: str) -> bool:
+    """Mark ``key`` as seen; False when another page or city already had it."""
+    if isinstance(seen_leads, (SharedSeen, CityClaims)):
+        return seen_leads.claim(key)
+    if key in seen_leads:
+        return False
+    seen_leads.add(key)
+    return True
+
+
+def is_stopped(stop_event: threading.Event | None) -> bool:
+    return stop_event is not None and stop_event.is_set()
+
+
+def iter_fan_out(
+    iter_fn,
+    keyword: str,
+    locations: list[str],
+    limit: int,
+    seen_leads: set[str],
+    max_cities: int = DEFAULT_MAX_CITIES,
+    max_per_host: int | None = None,
+    on_summary=None,
+    lead_key=None,
+    errors: dict | None = None,
+    deadline: Deadline | None = None,
+    skipped: list | None = None,
+    on_commit=None,
+):
+    """
+    Run the ``iter_fn`` lead generator over ``locations`` with up to
+    ``max_cities`` cities in flight. Leads are yielded in ``locations`` order,
+    as the sequential loop would lay them out: the earliest unfinished city
+    streams live while later ones buffer, and a buffered lead whose
+    ``lead_key(lead)`` an earlier city already produced is dropped when its
+    city reaches the front. The buffers are bounded by what is left of
+    ``limit``: a later city waits once the leads yielded plus those buffered
+    would fill it, and carries on only if an earlier city falls short. Every
+    city stops once ``limit`` leads have been yielded.
+
+    ``on_summary(location, summary)`` is called from the worker thread as
+    each city finishes; a city that fails or returns an error summary is
+    recorded as ``errors[location] = message``. ``on_commit(location, lead,
+    kept)`` is called from the consuming thread for each lead that reaches
+    its turn before ``limit``, ``kept`` false when an earlier city already
+    had it.
+
+    With a ``deadline`` every city stops when it runs out, and a city whose
+    turn comes when not even one more page fits (see ``Deadline.spent``) is
+    not started but appended to ``skipped``.
+
+    Returns ``(count, pages_scraped)``.
+    """
+    stop = Deadline(parent=deadline)
+    shared = SharedSeen(seen_leads)
+    outboxes = [queue.SimpleQueue() for _ in locations]
+    pages = [0] * len(locations)
+    room = threading.Condition()
+    count = buffered = front = 0
+
+    def run(index: int, loc: str):
+        outbox = outboxes[index]
+
+        def put(lead):
+            nonlocal buffered
+            with room:
+                while index != front and count + buffered >= limit and not stop.is_set():
+                    room.wait(min(stop.remaining(), BLOCKED_POLL))
+                buffered += 1
+            outbox.put(lead)
+
+        try:
+            if stop.cancelled():
+                return
+            if stop.spent():
+                if skipped is not None:
+                    skipped.append(loc)
+                return
+            summary = consume(iter_fn(keyword, loc, limit, CityClaims(shared), stop_event=stop), put)
+            pages[index] = summary.get("pages_scraped", 0)
+            if errors is not None and "error" in summary:
+                errors[loc] = summary["error"]
+            if on_summary is not None:
+                on_summary(loc, summary)
+        except Exception as exc:
+            if errors is not None:
+                errors[loc] = str(exc)
+        finally:
+            outbox.put(_CITY_DONE)
+
+    with HOST_SLOTS.limit(max_per_host), ThreadPoolExecutor(max_workers=max(1, max_cities)) as pool:
+        for index, loc in enumerate(locations):
+            pool.submit(run, index, loc)
+        try:
+            for index, outbox in enumerate(outboxes):
+                if count >= limit:
+                    break
+                with room:
+                    front = index
+                    room.notify_all()
+                while True:
+                    lead = outbox.get()
+                    if lead is _CITY_DONE:
+                        break
+                    with room:
+                        buffered -= 1
+                        full = count >= limit
+                        kept = not full and (lead_key is None or shared.claim(lead_key(lead)))
+                        if kept:
+                            count += 1
+                        else:
+                            # A dropped lead frees its place for a waiting city.
+                            room.notify_all()
+                    if on_commit is not None and not full:
+                        on_commit(locations[index], lead, kept)
+                    if not kept:
+                        continue
+                    yield lead
+                    if count >= limit:
+                        stop.set()
+        finally:
+            # Also reached when the consumer stops early; let workers wind down.
+            stop.set()
+            with room:
+                room.notify_all()
+
+    return count, sum(pages)
@@ -0,0 +1,176 @@
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+from http_cache import HTTP_CACHE, MISS_STATUS, CachedResponse
+from ratelimit import LIMITER
+
+DEFAULT_MAX_PER_HOST = 4
+
+
+class HostSlots:
+    """
+    Caps how many requests may be in flight against a single host.
+
+    Jobs that want a tighter cap hold ``limit(max_per_host)`` while they run;
+    the strictest active cap applies to every request, and in-flight requests
+    are counted once regardless of which cap admitted them.
+    """
+
+    def __init__(self, max_per_host: int = DEFAULT_MAX_PER_HOST):
+        self._cond = threading.Condition()
+        self._default = max(1, max_per_host)
+        self._caps: list[int] = []
+        self._in_flight: dict[str, int] = {}
+
+    def _cap(self) -> int:
+        return min(self._caps) if self._caps else self._default
+
+    @contextmanager
+    def limit(self, max_per_host: int | None):
+        """Apply ``max_per_host`` (None: no extra cap) until the block exits."""
+        if max_per_host is None:
+            yield
+            return
+        cap = max(1, max_per_host)
+        with self._cond:
+            self._caps.append(cap)
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._caps.remove(cap)
+                self._cond.notify_all()
+
+    @contextmanager
+    def acquire(self, url: str):
+        host = urlsplit(url).hostname or ""
+        with self._cond:
+            while self._in_flight.get(host, 0) >= self._cap():
+                self._cond.wait()
+            self._in_flight[host] = self._in_flight.get(host, 0) + 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._in_flight[host] -= 1
+                self._cond.notify_all()
+
+
+HOST_SLOTS = HostSlots()
+
+
+BLOCK_STATUSES = (403, 429, 503)
+
+
+def is_blocked_status(response) -> bool:
+    return response.status_code in BLOCK_STATUSES
+
+
+def get(
+    session,
+    url: str,
+    is_blocked=is_blocked_status,
+    metrics=None,
+    proxy_pool=None,
+    cache=True,
+    deadline=None,
+    **kwargs,
+):
+    """
+    session.get() paced by the per-domain rate limiter, bounded by the
+    per-host concurrency cap and routed through the HTTP cache.
+
+    ``is_blocked(response)`` tells the limiter to back off (and keeps the page
+    out of the cache); pass a ``metrics.Metrics`` to count the request and the
+    ``proxies.ProxyPool`` the ``proxies=`` entry came from to score it.
+    ``cache=False`` always goes to the network and stores nothing, for
+    requests whose side effects (cookies) matter more than their body.
+    With a ``deadline.Deadline`` the request is not started once it has
+    passed, nor when the rate limiter would have to wait beyond it (both
+    ``DeadlineExceeded``), and its timeout is cut to the time left.
+    """
+    proxy = (kwargs.get("proxies") or {}).get("https") if proxy_pool is not None else None
+    headers = kwargs.get("headers")
+    cached = HTTP_CACHE.lookup(url, headers) if cache else None
+    if cache and cached is None and HTTP_CACHE.replaying:
+        cached = CachedResponse(url, MISS_STATUS, "", from_cache=False)
+    if cached is not None:
+        if metrics is not None:
+            metrics.record_response(cached, from_cache=cached.from_cache)
+        return cached
+
+    max_wait = None
+    if deadline is not None and deadline.at is not None:
+        deadline.check()
+        max_wait = deadline.remaining()
+        kwargs["timeout"] = deadline.timeout(kwargs.get("timeout") or max_wait)
+    try:
+        if metrics is None:
+            LIMITER.acquire(url, max_wait)
+        else:
+            with metrics.phase("backoff"):
+                LIMITER.acquire(url, max_wait)
+    except TimeoutError as exc:
+        raise deadline.refuse(str(exc)) from exc
+    started = time.monotonic()
+    try:
+        with HOST_SLOTS.acquire(url):
+            response = session.get(url, **kwargs)
+    except Exception:
+        if proxy is not None:
+            proxy_pool.report(proxy, ok=False)
+        if metrics is not None:
+            metrics.record_error()
+        raise
+
+    blocked = is_blocked(response)
+    if proxy is not None:
+        proxy_pool.report(proxy, ok=not blocked, latency=time.monotonic() - started, blocked=blocked)
+    LIMITER.feedback(url, response, blocked)
+    if metrics is not None:
+        metrics.record_response(response)
+        if blocked:
+            metrics.incr("throttled")
+    if cache and HTTP_CACHE.enabled and response.status_code == 200 and not blocked:
+        HTTP_CACHE.store(url, headers, response)
+    return response
+
+
+# Statuses after which a HEAD is retried as a GET: servers that refuse HEAD.
+HEAD_REFUSED = (400, 403, 405, 501)
+
+
+def resolve(session, url: str, metrics=None, **kwargs) -> str | None:
+    """
+    The URL ``url`` finally redirects to, without downloading the target
+    page: a HEAD request following redirects or, for servers that refuse
+    HEAD, a streamed GET closed before its body is read. Paced and capped
+    like ``get`` for the host of ``url``; never cached. None on errors or
+    when the chain ends in an error status.
+    """
+    if metrics is None:
+        LIMITER.acquire(url)
+    else:
+        with metrics.phase("backoff"):
+            LIMITER.acquire(url)
+    try:
+        with HOST_SLOTS.acquire(url):
+            response = session.head(url, allow_redirects=True, **kwargs)
+            if response.status_code in HEAD_REFUSED:
+                if metrics is not None:
+                    metrics.record_status(response.status_code)
+                response = session.get(url, allow_redirects=True, stream=True, **kwargs)
+                response.close()
+    except Exception:
+        if metrics is not None:
+            metrics.record_error()
+        return None
+
+    LIMITER.feedback(url, response, response.status_code == 429)
+    if metrics is not None:
+        metrics.record_status(response.status_code)
+    if response.status_code >= 400:
+        return None
+    return str(response.url)
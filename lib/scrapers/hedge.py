@@ -0,0 +1,100 @@
+"""
+Hedged requests: race a backup route against a slow or struggling primary.
+
+``hedged(primary, backup, delay)`` runs ``primary`` and, if it has not
+produced a usable result within ``delay`` seconds or calls its
+``hedge_now()`` early (say, on a Cloudflare challenge), starts ``backup``
+alongside it. The first usable result wins and the other side is told to
+stop. A primary that fails outright starts the backup at once, so with no
+``delay`` this is the plain "try A, then B" fallback.
+
+Stopping is cooperative: each side gets an event to check between its
+attempts. A request already on the wire finishes in the background and its
+result is dropped.
+
+Both sides run on a shared, long-lived thread pool, so the thread-local
+sessions they use (see ``sessions.thread_session``) stay warm across pages.
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Up to two per hedged request in flight, plus losers still finishing.
+HEDGE_THREADS = int(os.getenv("SCRAPER_HEDGE_THREADS", "16"))
+
+_HEDGE = object()
+
+PRIMARY, BACKUP = 0, 1
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max(2, HEDGE_THREADS), thread_name_prefix="hedge")
+        return _executor
+
+
+def hedged(primary, backup, delay: float | None = None, usable=None, metrics=None):
+    """
+    Run ``primary(stop, hedge_now)`` and, after ``delay`` seconds (None:
+    never on time alone), on ``hedge_now()`` or once the primary fails,
+    ``backup(stop)``. Returns ``(result, from_backup)`` for the first result
+    ``usable(result)`` accepts (default: not None), or ``(None, False)``
+    when neither side has one. Exceptions count as unusable results.
+
+    ``metrics`` counts ``hedges`` (backups started while the primary was
+    still running) and ``hedge_wins`` (those that came back first).
+    """
+    usable = usable or (lambda result: result is not None)
+    outcomes = queue.SimpleQueue()
+    stops = (threading.Event(), threading.Event())
+
+    def run(side: int, call):
+        try:
+            result = call()
+        except Exception:
+            result = None
+        outcomes.put((side, result))
+
+    def start(side: int, call):
+        _pool().submit(run, side, call)
+
+    def incr(counter: str):
+        if metrics is not None:
+            metrics.incr(counter)
+
+    start(PRIMARY, lambda: primary(stops[PRIMARY], lambda: outcomes.put((_HEDGE, None))))
+    hedge_at = None if delay is None else time.monotonic() + delay
+    running = {PRIMARY}
+    backup_started = False
+    while running:
+        timeout = None
+        if not backup_started and hedge_at is not None:
+            timeout = max(0.0, hedge_at - time.monotonic())
+        try:
+            side, result = outcomes.get(timeout=timeout)
+        except queue.Empty:
+            side, result = _HEDGE, None
+        if side is _HEDGE or (side == PRIMARY and not usable(result)):
+            if side == PRIMARY:
+                running.discard(PRIMARY)
+            if not backup_started:
+                backup_started = True
+                if PRIMARY in running:
+                    incr("hedges")
+                running.add(BACKUP)
+                start(BACKUP, lambda: backup(stops[BACKUP]))
+            continue
+        running.discard(side)
+        if usable(result):
+            stops[PRIMARY if side == BACKUP else BACKUP].set()
+            if side == BACKUP and PRIMARY in running:
+                incr("hedge_wins")
+            return result, side == BACKUP
+    return None, False
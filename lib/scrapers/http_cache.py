@@ -0,0 +1,153 @@
+"""
+Content-addressed on-disk cache for scraper HTTP responses.
+
+Entries are keyed by the URL and the headers that change what a site serves
+(``RELEVANT_HEADERS``), so rotating user agents, proxies and cookies still hit
+the same entry. Bodies are stored once per SHA-256 of their content.
+
+Modes (``SCRAPER_HTTP_CACHE`` / the scrapers' CLI flags):
+
+- ``off``: no caching.
+- ``record``: always fetch, store every cacheable response.
+- ``replay``: never touch the network; misses come back as a 504.
+- ``ttl``: serve entries younger than ``ttl`` seconds, fetch and store the rest.
+"""
+import hashlib
+import os
+import threading
+import time
+
+from storage import CACHE_DIR, read_json, write_json, write_text
+
+MODES = ("off", "record", "replay", "ttl")
+
+# Request headers that select a different response; everything else is noise.
+RELEVANT_HEADERS = ("accept", "accept-language")
+
+MISS_STATUS = 504
+
+
+class CachedResponse:
+    """The subset of a requests/curl_cffi response the scrapers read."""
+
+    def __init__(self, url: str, status_code: int, text: str, from_cache: bool = True):
+        self.url = url
+        self.status_code = status_code
+        self.text = text
+        self.content = text.encode("utf-8")
+        self.headers = {}
+        self.from_cache = from_cache
+
+
+def cache_key(url: str, headers: dict | None = None) -> str:
+    relevant = sorted(
+        (name.lower(), str(value))
+        for name, value in (headers or {}).items()
+        if name.lower() in RELEVANT_HEADERS
+    )
+    material = "\n".join([url] + [f"{name}: {value}" for name, value in relevant])
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class HttpCache:
+    def __init__(self, mode: str = "off", ttl: float | None = None, directory: str | None = None):
+        self._lock = threading.Lock()
+        self.configure(mode, ttl, directory)
+
+    def configure(self, mode: str = "off", ttl: float | None = None, directory: str | None = None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown HTTP cache mode: {mode}")
+        if mode == "ttl" and not ttl:
+            raise ValueError("ttl mode needs a positive ttl")
+        with self._lock:
+            self.mode = mode
+            self.ttl = ttl
+            self.directory = directory or os.path.join(CACHE_DIR, "http")
+            self._hits = 0
+            self._misses = 0
+            self._stores = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, "entries", key[:2], f"{key}.json")
+
+    def _body_path(self, digest: str) -> str:
+        return os.path.join(self.directory, "bodies", digest[:2], digest)
+
+    def _count(self, field: str):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def lookup(self, url: str, headers: dict | None = None) -> CachedResponse | None:
+        """Cached response for this request, honouring the mode's freshness rules."""
+        if not self.enabled or self.mode == "record":
+            return None
+        entry = read_json(self._entry_path(cache_key(url, headers)))
+        if entry and self.mode == "ttl" and time.time() - entry.get("stored_at", 0) > self.ttl:
+            entry = None
+        if entry:
+            try:
+                with open(self._body_path(entry["body"]), "r", encoding="utf-8") as handle:
+                    text = handle.read()
+            except OSError:
+                entry = None
+        if not entry:
+            self._count("_misses")
+            return None
+        self._count("_hits")
+        return CachedResponse(entry.get("url", url), entry["status"], text)
+
+    def store(self, url: str, headers: dict | None, response):
+        if not self.enabled or self.replaying:
+            return
+        text = response.text or ""
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        body_path = self._body_path(digest)
+        if not os.path.exists(body_path):
+            write_text(body_path, text)
+        write_json(
+            self._entry_path(cache_key(url, headers)),
+            {"url": url, "status": response.status_code, "body": digest, "stored_at": time.time()},
+        )
+        self._count("_stores")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self._hits, "misses": self._misses, "stores": self._stores}
+
+    def report(self, since: dict) -> dict:
+        """``{"cache": ...}`` counters since the ``stats()`` snapshot, or {} when off."""
+        if not self.enabled:
+            return {}
+        now = self.stats()
+        return {"cache": {"mode": self.mode, **{name: now[name] - since.get(name, 0) for name in now}}}
+
+
+HTTP_CACHE = HttpCache(
+    os.getenv("SCRAPER_HTTP_CACHE", "off"),
+    float(os.getenv("SCRAPER_HTTP_CACHE_TTL", "0")) or None,
+)
+
+
+def add_arguments(parser):
+    """The scrapers' ``--record``/``--replay``/``--cache-ttl`` flags."""
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--record", action="store_true", help="Fetch normally and store every response in the HTTP cache")
+    group.add_argument("--replay", action="store_true", help="Serve responses from the HTTP cache only (no network)")
+    group.add_argument("--cache-ttl", type=float, default=None, help="Reuse cached responses younger than this many seconds")
+
+
+def configure_from_args(args):
+    if args.record:
+        HTTP_CACHE.configure("record")
+    elif args.replay:
+        HTTP_CACHE.configure("replay")
+    elif args.cache_ttl:
+        HTTP_CACHE.configure("ttl", args.cache_ttl)
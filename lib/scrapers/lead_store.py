@@ -0,0 +1,218 @@
+"""
+On-disk index of the leads earlier runs already returned, shared by both
+scrapers and by every worker process on the machine.
+
+A lead is known by several keys (``store_keys``): its normalized phone, its
+name within its ZIP and its name within its city, whichever it has. A lead
+matching any key of an earlier one is the same business, so it is recognised
+when found again by another keyword, city or source (an Angi listing with
+only a name and city matches the Yellow Pages row with phone and ZIP), while
+same-name businesses in different cities stay apart. Only the keys are kept,
+not the leads themselves. Scrapers given a store skip known leads without
+counting them toward ``limit`` (``known_leads`` in the metrics) and record
+every lead they yield, unless the consumer confirms delivery itself
+(``UnconfirmedStore``, used by the worker).
+
+The index is a SQLite file (``SCRAPER_LEAD_STORE`` / ``--lead-store``,
+default ``<cache dir>/leads.sqlite3``) in WAL mode, so concurrent workers can
+read while one writes.
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from storage import cache_path
+
+# Inserts are committed in batches; a crash loses at most this many records.
+COMMIT_EVERY = 100
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS known_leads (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    first_seen REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS lead_keys (
+    key TEXT PRIMARY KEY,
+    lead INTEGER NOT NULL
+);
+"""
+
+
+def normalize_phone(phone: str | None) -> str:
+    digits = re.sub(r"\D", "", phone or "")
+    if len(digits) == 11 and digits.startswith("1"):
+        digits = digits[1:]
+    return digits
+
+
+def normalize_name(name: str | None) -> str:
+    name = re.sub(r"['’]", "", (name or "").casefold()).replace("&", " and ")
+    return " ".join(re.sub(r"[\W_]+", " ", name).split())
+
+
+def normalize_zip(postal_code: str | None) -> str:
+    match = re.search(r"\d{5}", postal_code or "")
+    return match.group(0) if match else ""
+
+
+def store_keys(lead: dict) -> list[str]:
+    """Every key ``lead`` can be recognised by; a bare name only when it has nothing else."""
+    keys = []
+    phone = normalize_phone(lead.get("phone"))
+    if phone:
+        keys.append(f"phone:{phone}")
+    name = normalize_name(lead.get("name"))
+    if name:
+        postal_code = normalize_zip(lead.get("postalCode"))
+        if postal_code:
+            keys.append(f"zip:{postal_code}|{name}")
+        city = normalize_name(lead.get("city"))
+        if city:
+            keys.append(f"city:{city}|{normalize_name(lead.get('region'))}|{name}")
+        if not keys:
+            keys.append(f"name:{name}")
+    return keys
+
+
+class LeadStore:
+    def __init__(self, path: str | None = None):
+        self.path = path or os.getenv("SCRAPER_LEAD_STORE") or cache_path("leads.sqlite3")
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pending = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _match(self, conn: sqlite3.Connection, keys: list[str]):
+        """The id of a known lead sharing one of ``keys``, or None."""
+        if not keys:
+            return None
+        marks = ", ".join("?" * len(keys))
+        row = conn.execute(f"SELECT lead FROM lead_keys WHERE key IN ({marks}) LIMIT 1", keys).fetchone()
+        return row[0] if row else None
+
+    def known(self, lead: dict) -> bool:
+        with self._lock:
+            return self._match(self._connection(), store_keys(lead)) is not None
+
+    def add(self, lead: dict, source: str) -> bool:
+        """
+        Record ``lead``; False when it was already known. Keys it brings that
+        the known lead lacked (say, the phone of an enriched Angi lead) are
+        added to it.
+        """
+        keys = store_keys(lead)
+        if not keys:
+            return False
+        with self._lock:
+            conn = self._connection()
+            lead_id = self._match(conn, keys)
+            new = lead_id is None
+            if new:
+                lead_id = conn.execute(
+                    "INSERT INTO known_leads (source, first_seen) VALUES (?, ?)", (source, time.time())
+                ).lastrowid
+            conn.executemany(
+                "INSERT OR IGNORE INTO lead_keys (key, lead) VALUES (?, ?)", [(key, lead_id) for key in keys]
+            )
+            self._pending += 1
+            if self._pending >= COMMIT_EVERY:
+                conn.commit()
+                self._pending = 0
+            return new
+
+    def flush(self):
+        with self._lock:
+            if self._conn is not None and self._pending:
+                self._conn.commit()
+                self._pending = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection().execute("SELECT COUNT(*) FROM known_leads").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.commit()
+                self._conn.close()
+                self._conn = None
+                self._pending = 0
+
+
+class UnconfirmedStore:
+    """
+    ``store`` for a consumer that confirms delivery: known leads are still
+    skipped, but nothing is recorded until the consumer adds the leads it
+    actually kept (the worker's "remember" method), so leads lost on the way
+    (say, a failed upload) come back in the next run.
+    """
+
+    def __init__(self, store: LeadStore):
+        self.store = store
+
+    def known(self, lead: dict) -> bool:
+        return self.store.known(lead)
+
+    def add(self, lead: dict, source: str) -> bool:
+        return not self.store.known(lead)
+
+    def flush(self):
+        pass
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store(path: str | None = None) -> LeadStore:
+    """The process-wide store (opened on first use); ``path`` only applies the first time."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = LeadStore(path)
+        return _store
+
+
+def remember(store: LeadStore | UnconfirmedStore | None, stream, source: str):
+    """
+    Pass a lead generator through, recording each lead in ``store`` as it is
+    yielded; returns the generator's summary. A no-op without a store.
+    """
+    if store is None:
+        return (yield from stream)
+    try:
+        while True:
+            try:
+                lead = next(stream)
+            except StopIteration as stop:
+                return stop.value
+            store.add(lead, source)
+            yield lead
+    finally:
+        stream.close()
+        store.flush()
+
+
+def add_arguments(parser):
+    """The scrapers' ``--skip-known``/``--lead-store`` flags."""
+    parser.add_argument("--skip-known", action="store_true", help="Skip leads an earlier run already returned")
+    parser.add_argument("--lead-store", default=None, help="SQLite file of known leads (default: in the cache directory)")
+
+
+def store_from_args(args) -> LeadStore | None:
+    return get_store(args.lead_store) if args.skip_known else None
@@ -0,0 +1,260 @@
+"""
+Compact, column-oriented storage for large numbers of leads, and the
+``--format`` writers (CSV, Parquet, Arrow IPC) built on it.
+
+A scraper yields one dict per lead, which is fine for a stream but heavy
+when a job or an export holds hundreds of thousands of them: every dict
+carries its own hash table and, before interning, its own copies of the
+``keyword``, ``location``, ``source``, ``city``, ``region`` and
+``category`` strings. ``LeadTable`` keeps one list per field instead, with
+those repeated strings interned, and writes or reads whole columns, so
+exporting and bulk loading never build a dict per row. ``Lead`` is a
+``__slots__`` view of one row for code that wants attribute access.
+
+Parquet and Arrow need ``pyarrow`` (optional); CSV is always available.
+"""
+import argparse
+import csv
+import json
+import sys
+
+from streaming import consume
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+
+# Every field either scraper fills in, in output column order.
+FIELDS = (
+    "name",
+    "phone",
+    "website",
+    "street",
+    "address",
+    "city",
+    "region",
+    "postalCode",
+    "rating",
+    "reviewCount",
+    "category",
+    "sourceUrl",
+    "keyword",
+    "location",
+    "source",
+)
+
+# Values shared by many rows; interned so each distinct one is stored once.
+INTERNED = frozenset({"city", "region", "postalCode", "category", "keyword", "location", "source"})
+
+NUMERIC = {"rating": float, "reviewCount": int}
+
+FORMATS = ("json", "csv", "parquet", "arrow")
+
+
+class Lead:
+    """One lead as a fixed set of attributes."""
+
+    __slots__ = FIELDS
+
+    def __init__(self, *values):
+        for field, value in zip(FIELDS, values):
+            setattr(self, field, value)
+
+    def as_dict(self) -> dict:
+        return {field: getattr(self, field) for field in FIELDS}
+
+    def __repr__(self):
+        return f"Lead(name={self.name!r}, source={self.source!r})"
+
+
+class LeadTable:
+    """Leads stored column by column; fields outside ``FIELDS`` are dropped."""
+
+    def __init__(self):
+        self.columns = {field: [] for field in FIELDS}
+        self._strings = {}
+
+    def _intern(self, value):
+        if value is None:
+            return None
+        return self._strings.setdefault(value, value)
+
+    def append(self, lead: dict):
+        get = lead.get
+        for field, column in self.columns.items():
+            value = get(field)
+            column.append(self._intern(value) if field in INTERNED else value)
+
+    def extend(self, leads):
+        for lead in leads:
+            self.append(lead)
+
+    def __len__(self) -> int:
+        return len(self.columns["name"])
+
+    def __iter__(self):
+        """``Lead`` records, one per row."""
+        for values in zip(*self.columns.values()):
+            yield Lead(*values)
+
+    def rows(self):
+        """Plain value tuples in ``FIELDS`` order."""
+        return zip(*self.columns.values())
+
+    def dicts(self):
+        """Rows as lead dicts, for callers that still want them."""
+        for values in self.rows():
+            yield dict(zip(FIELDS, values))
+
+    @classmethod
+    def from_columns(cls, columns: dict) -> "LeadTable":
+        table = cls()
+        length = max((len(values) for values in columns.values()), default=0)
+        for field in FIELDS:
+            values = list(columns.get(field) or [None] * length)
+            if field in INTERNED:
+                values = [table._intern(value) for value in values]
+            table.columns[field] = values
+        return table
+
+
+def _require_pyarrow(fmt: str):
+    if pa is None:
+        raise RuntimeError(f"{fmt} output needs pyarrow (pip install pyarrow)")
+
+
+def to_arrow(table: LeadTable):
+    """The table as a ``pyarrow.Table``; repeated strings become dictionary columns."""
+    _require_pyarrow("Arrow")
+    arrays = {}
+    for field, values in table.columns.items():
+        if field == "rating":
+            arrays[field] = pa.array(values, pa.float64())
+        elif field == "reviewCount":
+            arrays[field] = pa.array(values, pa.int64())
+        elif field in INTERNED:
+            arrays[field] = pa.array(values, pa.string()).dictionary_encode()
+        else:
+            arrays[field] = pa.array(values, pa.string())
+    return pa.table(arrays)
+
+
+def from_arrow(arrow_table) -> LeadTable:
+    columns = {}
+    for field in FIELDS:
+        if field in arrow_table.column_names:
+            column = arrow_table.column(field)
+            if pa.types.is_dictionary(column.type):
+                column = column.cast(column.type.value_type)
+            columns[field] = column.to_pylist()
+    return LeadTable.from_columns(columns)
+
+
+def write_csv(table: LeadTable, out):
+    writer = csv.writer(out)
+    writer.writerow(FIELDS)
+    writer.writerows(("" if value is None else value for value in row) for row in table.rows())
+
+
+def read_csv(handle) -> LeadTable:
+    reader = csv.reader(handle)
+    header = next(reader, None) or []
+    columns = {field: [] for field in header}
+    lists = [columns[field] for field in header]
+    for row in reader:
+        for column, value in zip(lists, row):
+            column.append(value if value != "" else None)
+    for field, convert in NUMERIC.items():
+        if field in columns:
+            columns[field] = [convert(value) if value is not None else None for value in columns[field]]
+    return LeadTable.from_columns(columns)
+
+
+def write_table(table: LeadTable, fmt: str, path: str | None = None, out=None):
+    """Write ``table`` as ``fmt`` to ``path`` (or, for CSV and JSON, to ``out``)."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format: {fmt}")
+    if fmt in ("csv", "json"):
+        handle = open(path, "w", encoding="utf-8", newline="") if path else out
+        try:
+            if fmt == "csv":
+                write_csv(table, handle)
+            else:
+                json.dump(list(table.dicts()), handle)
+        finally:
+            if path:
+                handle.close()
+        return
+    if not path:
+        raise ValueError(f"{fmt} output needs an output file")
+    arrow_table = to_arrow(table)
+    if fmt == "parquet":
+        pq.write_table(arrow_table, path)
+    else:
+        with pa_ipc.new_file(path, arrow_table.schema) as writer:
+            writer.write_table(arrow_table)
+
+
+def read_table(path: str) -> LeadTable:
+    """Bulk-load a CSV, Parquet or Arrow IPC export, chosen by extension."""
+    lowered = path.lower()
+    if lowered.endswith(".csv"):
+        with open(path, encoding="utf-8", newline="") as handle:
+            return read_csv(handle)
+    if lowered.endswith(".parquet"):
+        _require_pyarrow("Parquet")
+        return from_arrow(pq.read_table(path))
+    if lowered.endswith((".arrow", ".feather", ".ipc")):
+        _require_pyarrow("Arrow")
+        with pa_ipc.open_file(path) as reader:
+            return from_arrow(reader.read_all())
+    raise ValueError(f"Unknown lead file type: {path}")
+
+
+def export(stream, fmt: str, path: str | None = None, out=None) -> dict:
+    """Collect a lead generator into a ``LeadTable``, write it and return the summary."""
+    if fmt in ("parquet", "arrow"):
+        _require_pyarrow(fmt.title())
+        if not path:
+            raise ValueError(f"{fmt} output needs --output")
+    table = LeadTable()
+    summary = consume(stream, table.append)
+    write_table(table, fmt, path, out if out is not None else sys.stdout)
+    return summary
+
+
+def add_arguments(parser):
+    """The scrapers' ``--format``/``--output`` flags."""
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        default="json",
+        help="json: one result object (default); csv, parquet, arrow: a lead table, summary on stderr",
+    )
+    parser.add_argument("--output", default=None, help="File for --format csv/parquet/arrow (csv defaults to stdout)")
+
+
+def check_args(parser: argparse.ArgumentParser, args):
+    if args.format != "json" and getattr(args, "stream", False):
+        parser.error("--stream and --format are exclusive")
+    if args.format in ("parquet", "arrow"):
+        if not args.output:
+            parser.error(f"--format {args.format} needs --output")
+        if pa is None:
+            parser.error(f"--format {args.format} needs pyarrow (pip install pyarrow)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert a lead export between CSV, Parquet, Arrow and JSON")
+    parser.add_argument("input")
+    add_arguments(parser)
+    args = parser.parse_args()
+    check_args(parser, args)
+    try:
+        table = read_table(args.input)
+    except (OSError, ValueError, RuntimeError) as exc:
+        parser.error(str(exc))
+    write_table(table, args.format, args.output, sys.stdout)
@@ -0,0 +1,159 @@
+"""
+Per-location and per-job scrape instrumentation.
+
+A ``Metrics`` object is passed down explicitly (``fetch.get(..., metrics=m)``)
+and collects wall time per phase (``warmup``, ``request``, ``backoff``,
+``jina``, ``parse``), request counts by status, bytes downloaded, retries,
+fallbacks and dedup hits. ``as_dict()`` is what lands in the ``metrics``
+block of a scrape result; ``export()`` writes it as a Prometheus textfile
+(``.prom``) or appends it to a JSON-lines log (anything else).
+"""
+import json
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from storage import write_text
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._started = time.perf_counter()
+        self._wall = None
+        self.phases = Counter()
+        self.counters = Counter()
+        self.statuses = Counter()
+        self.locations: dict[str, dict] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Time a phase. Phases are exclusive: time spent in a nested phase (say
+        ``backoff`` inside ``request``) is only counted for the inner one.
+        """
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        nested = [0.0]
+        stack.append(nested)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            stack.pop()
+            if stack:
+                stack[-1][0] += elapsed
+            with self._lock:
+                self.phases[name] += elapsed - nested[0]
+
+    def incr(self, name: str, amount: int = 1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def record_response(self, response, from_cache: bool = False):
+        text = getattr(response, "text", None) or ""
+        with self._lock:
+            self.counters["requests"] += 1
+            self.counters["bytes"] += len(getattr(response, "content", None) or text.encode("utf-8"))
+            self.statuses[str(response.status_code)] += 1
+            if from_cache:
+                self.counters["cache_hits"] += 1
+
+    def record_status(self, status_code: int):
+        """A request whose body was never downloaded (HEAD, redirect probes)."""
+        with self._lock:
+            self.counters["requests"] += 1
+            self.statuses[str(status_code)] += 1
+
+    def record_error(self):
+        with self._lock:
+            self.counters["requests"] += 1
+            self.statuses["error"] += 1
+
+    def finish(self) -> "Metrics":
+        if self._wall is None:
+            self._wall = time.perf_counter() - self._started
+        return self
+
+    def add_location(self, location: str, summary: dict):
+        """Fold a location's ``metrics`` block into this job's totals."""
+        block = summary.get("metrics")
+        if not block:
+            return
+        with self._lock:
+            self.locations[location] = block
+            self.phases.update(block.get("phases", {}))
+            self.counters.update(block.get("counters", {}))
+            self.statuses.update(block.get("requests_by_status", {}))
+
+    def as_dict(self) -> dict:
+        self.finish()
+        with self._lock:
+            result = {
+                "wall_seconds": round(self._wall, 4),
+                "phases": {name: round(value, 4) for name, value in self.phases.items()},
+                "requests_by_status": dict(self.statuses),
+                "counters": dict(self.counters),
+            }
+            if self.locations:
+                result["locations"] = dict(self.locations)
+            return result
+
+
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _prometheus_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label(value)}"' for name, value in sorted(labels.items())) + "}"
+
+
+def to_prometheus(block: dict, labels: dict | None = None) -> str:
+    """Render a ``metrics`` block in the Prometheus text exposition format."""
+    labels = labels or {}
+    lines = [
+        "# TYPE scraper_wall_seconds gauge",
+        f"scraper_wall_seconds{_prometheus_labels(labels)} {block.get('wall_seconds', 0)}",
+        "# TYPE scraper_phase_seconds gauge",
+    ]
+    for phase, seconds in sorted(block.get("phases", {}).items()):
+        lines.append(f"scraper_phase_seconds{_prometheus_labels({**labels, 'phase': phase})} {seconds}")
+    lines.append("# TYPE scraper_requests gauge")
+    for status, count in sorted(block.get("requests_by_status", {}).items()):
+        lines.append(f"scraper_requests{_prometheus_labels({**labels, 'status': status})} {count}")
+    for name, value in sorted(block.get("counters", {}).items()):
+        if name == "requests":
+            continue
+        lines.append(f"# TYPE scraper_{name} gauge")
+        lines.append(f"scraper_{name}{_prometheus_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+_log_lock = threading.Lock()
+
+
+def export(path: str, summary: dict, labels: dict | None = None):
+    """
+    Write a finished job's ``metrics`` block to ``path``: a Prometheus textfile
+    (replaced atomically, for node_exporter's textfile collector) when it ends
+    in ``.prom``, otherwise one appended JSON line.
+    """
+    block = summary.get("metrics")
+    if not block:
+        return
+    if path.endswith(".prom"):
+        write_text(path, to_prometheus(block, labels))
+        return
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    record = {"ts": time.time(), **(labels or {}), "count": summary.get("count"), "metrics": block}
+    with _log_lock, open(path, "a", encoding="utf-8") as handle:
+        handle.write(json.dumps(record) + "\n")
@@ -0,0 +1,92 @@
+"""
+Pipelined pagination: fetch the next page(s) while the current one is parsed.
+
+``PagePrefetcher`` keeps a small window of page fetches in flight on a shared
+thread pool, and ``result_range`` reads the "Showing 1-30 of 1,284" banner
+both sites print, so a location never requests pages past its last one.
+"""
+import math
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+DEFAULT_PREFETCH = int(os.getenv("SCRAPER_PREFETCH_PAGES", "2"))
+PREFETCH_THREADS = int(os.getenv("SCRAPER_PREFETCH_THREADS", "8"))
+
+_SHOWING = re.compile(r"Showing\s+([\d,]+)\s*[-–]\s*([\d,]+)\s+of\s+([\d,]+)", re.IGNORECASE)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max(1, PREFETCH_THREADS), thread_name_prefix="prefetch")
+        return _executor
+
+
+def result_range(text: str) -> tuple[int, int, int] | None:
+    """``(first, last, total)`` from a "Showing first-last of total" banner."""
+    match = _SHOWING.search(text or "")
+    if not match:
+        return None
+    first, last, total = (int(group.replace(",", "")) for group in match.groups())
+    if first < 1 or last < first:
+        return None
+    return first, last, total
+
+
+def last_page(text: str, max_pages: int) -> int:
+    """Last page worth requesting according to the page's result banner."""
+    showing = result_range(text)
+    if showing is None:
+        return max_pages
+    first, last, total = showing
+    per_page = last - first + 1
+    return max(1, min(max_pages, math.ceil(total / per_page)))
+
+
+def pages_ahead(remaining: int, per_page: int, window: int) -> int:
+    """Pages to prefetch beyond the current one without overshooting ``remaining`` leads."""
+    if remaining <= 0 or per_page <= 0:
+        return 0
+    return max(0, min(window, math.ceil(remaining / per_page) - 1))
+
+
+class PagePrefetcher:
+    """
+    ``take(page)`` returns ``fetch_page(page, cancelled)`` (re-raising its
+    exception), using a prefetched result when one is in flight; ``fill(pages)``
+    starts fetching pages in the background.
+
+    ``cancelled`` is a ``threading.Event`` that ``fetch_page`` should check
+    between attempts. ``close()`` sets it, cancels fetches that have not
+    started, waits for the running ones to wind down and returns how many
+    of those were never used.
+    """
+
+    def __init__(self, fetch_page):
+        self._fetch_page = fetch_page
+        self._inflight = {}
+        self.cancelled = threading.Event()
+
+    def fill(self, pages):
+        for page in pages:
+            if page not in self._inflight and not self.cancelled.is_set():
+                self._inflight[page] = _pool().submit(self._fetch_page, page, self.cancelled)
+
+    def take(self, page: int):
+        future = self._inflight.pop(page, None)
+        if future is None:
+            return self._fetch_page(page, self.cancelled)
+        return future.result()
+
+    def close(self) -> int:
+        self.cancelled.set()
+        running = [future for future in self._inflight.values() if not future.cancel()]
+        self._inflight.clear()
+        wait(running)
+        return len(running)
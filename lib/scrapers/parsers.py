@@ -0,0 +1,198 @@
+"""
+Pluggable HTML parsing backends behind one small node API.
+
+``selectolax`` (lexbor, C) is the default when installed, then ``lxml`` via
+BeautifulSoup, then the pure-Python ``html.parser``. Override the choice with
+the ``SCRAPER_HTML_PARSER`` environment variable or the ``backend`` argument.
+"""
+import os
+
+from bs4 import BeautifulSoup, Tag
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # pragma: no cover - optional dependency
+    LexborHTMLParser = None
+
+try:
+    import lxml  # noqa: F401
+
+    HAS_LXML = True
+except ImportError:  # pragma: no cover - optional dependency
+    HAS_LXML = False
+
+BACKENDS = ("selectolax", "lxml", "html.parser")
+
+
+def available_backends() -> list[str]:
+    available = []
+    if LexborHTMLParser is not None:
+        available.append("selectolax")
+    if HAS_LXML:
+        available.append("lxml")
+    available.append("html.parser")
+    return available
+
+
+def default_backend() -> str:
+    requested = os.getenv("SCRAPER_HTML_PARSER")
+    available = available_backends()
+    if requested in available:
+        return requested
+    return available[0]
+
+
+class SoupNode:
+    """BeautifulSoup element (html.parser or lxml tree builder)."""
+
+    __slots__ = ("_el",)
+
+    native_select = False
+
+    def __init__(self, element):
+        self._el = element
+
+    def select(self, css: str) -> list["SoupNode"]:
+        return [SoupNode(el) for el in self._el.select(css)]
+
+    def select_one(self, css: str) -> "SoupNode | None":
+        el = self._el.select_one(css)
+        return SoupNode(el) if el is not None else None
+
+    def text(self) -> str:
+        return self._el.get_text(strip=True)
+
+    def attr(self, name: str, default=None):
+        return self._el.get(name, default)
+
+    def parent_with_class(self, tag: str) -> "SoupNode | None":
+        parent = self._el.find_parent(tag, class_=True)
+        return SoupNode(parent) if parent is not None else None
+
+    @property
+    def tag(self) -> str:
+        return self._el.name
+
+    @property
+    def attrs(self) -> dict:
+        attrs = self._el.attrs
+        if isinstance(attrs.get("class"), list):
+            attrs = {**attrs, "class": " ".join(attrs["class"])}
+        return attrs
+
+    @property
+    def parent(self) -> "SoupNode | None":
+        parent = self._el.parent
+        return SoupNode(parent) if parent is not None and parent.name != "[document]" else None
+
+    def descendants(self):
+        """Descendant elements in document order."""
+        return (SoupNode(el) for el in self._el.descendants if isinstance(el, Tag))
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, SoupNode) and self._el is other._el
+
+    def __hash__(self) -> int:
+        return id(self._el)
+
+
+class LexborNode:
+    """selectolax (lexbor) node."""
+
+    __slots__ = ("_el",)
+
+    # lexbor matches selectors in C; a per-field select_one beats a Python walk.
+    native_select = True
+
+    def __init__(self, element):
+        self._el = element
+
+    def select(self, css: str) -> list["LexborNode"]:
+        # lexbor reports a node once per matching selector of a group and may
+        # match the node itself; bs4 reports each descendant once.
+        seen = {self._el.mem_id}
+        nodes = []
+        for el in self._el.css(css):
+            if el.mem_id not in seen:
+                seen.add(el.mem_id)
+                nodes.append(LexborNode(el))
+        return nodes
+
+    def select_one(self, css: str) -> "LexborNode | None":
+        el = self._el.css_first(css)
+        if el is None:
+            return None
+        if el.mem_id == self._el.mem_id:
+            nodes = self.select(css)
+            return nodes[0] if nodes else None
+        return LexborNode(el)
+
+    def text(self) -> str:
+        # Same result as bs4's get_text(strip=True), which skips script/style text.
+        parts = []
+        _collect_text(self._el, parts)
+        return "".join(parts)
+
+    def attr(self, name: str, default=None):
+        value = self._el.attributes.get(name, default)
+        # Valueless attributes come back as None; bs4 reports them as "".
+        return "" if value is None and name in self._el.attributes else value
+
+    def parent_with_class(self, tag: str) -> "LexborNode | None":
+        parent = self._el.parent
+        while parent is not None:
+            if parent.tag == tag and parent.attributes.get("class"):
+                return LexborNode(parent)
+            parent = parent.parent
+        return None
+
+    @property
+    def tag(self) -> str:
+        return self._el.tag
+
+    @property
+    def attrs(self) -> dict:
+        return self._el.attributes
+
+    @property
+    def parent(self) -> "LexborNode | None":
+        parent = self._el.parent
+        return LexborNode(parent) if parent is not None and parent.tag != "-document" else None
+
+    def descendants(self):
+        """Descendant elements in document order."""
+        elements = self._el.traverse()
+        next(elements, None)  # traverse() starts with the node itself
+        return (LexborNode(el) for el in elements)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, LexborNode) and self._el.mem_id == other._el.mem_id
+
+    def __hash__(self) -> int:
+        return self._el.mem_id
+
+
+_NO_TEXT_TAGS = frozenset({"script", "style", "template", "-comment"})
+
+
+def _collect_text(node, parts: list[str]):
+    for child in node.iter(include_text=True):
+        tag = child.tag
+        if tag == "-text":
+            value = child.text_content.strip()
+            if value:
+                parts.append(value)
+        elif tag not in _NO_TEXT_TAGS:
+            _collect_text(child, parts)
+
+
+def parse_html(text: str, backend: str | None = None):
+    """Parse ``text`` and return the document root as a backend node."""
+    backend = backend or default_backend()
+    if backend == "selectolax":
+        if LexborHTMLParser is None:
+            raise ValueError("selectolax is not installed")
+        return LexborNode(LexborHTMLParser(text).root)
+    if backend in ("lxml", "html.parser"):
+        return SoupNode(BeautifulSoup(text, backend))
+    raise ValueError(f"Unknown HTML parser backend: {backend}")
@@ -0,0 +1,178 @@
+"""
+Health-scored proxy pool shared by the scrapers.
+
+Every proxy keeps EWMAs of latency, success rate and block rate. Selection is
+weighted towards fast, healthy proxies. ``FAILURE_THRESHOLD`` consecutive
+failures (errors, timeouts or blocks) open the proxy's circuit breaker; after
+``cooldown`` seconds a single probe request is let through (half-open) and
+its outcome closes or re-opens the breaker. State is saved under the scraper
+cache keyed by a hash of each proxy URL, so credentials never hit the disk.
+"""
+import hashlib
+import os
+import random
+import threading
+import time
+
+from storage import CACHE_DIR, read_json, write_json
+
+PROXIES_PATH = os.getenv("SCRAPER_PROXIES_FILE") or os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "proxies.txt")
+)
+STATE_PATH = os.path.join(CACHE_DIR, "proxies.json")
+
+ALPHA = 0.3
+FAILURE_THRESHOLD = 3
+DEFAULT_COOLDOWN = 300.0
+# Latency assumed for a proxy that has not answered yet (seconds).
+PRIOR_LATENCY = 2.0
+SAVE_INTERVAL = 30.0
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+def load_proxies(path: str = PROXIES_PATH) -> list[str]:
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            return [line.strip() for line in handle if line.strip() and not line.startswith("#")]
+    except OSError:
+        return []
+
+
+def proxy_dict(proxy: str | None) -> dict | None:
+    """``proxies=`` argument for requests/curl_cffi, or None to go direct."""
+    return {"http": proxy, "https": proxy} if proxy else None
+
+
+def proxy_id(proxy: str) -> str:
+    return hashlib.sha256(proxy.encode("utf-8")).hexdigest()[:16]
+
+
+class ProxyHealth:
+    __slots__ = ("latency", "success", "blocked", "failures", "state", "opened_at")
+
+    def __init__(self, saved: dict | None = None):
+        saved = saved or {}
+        self.latency = saved.get("latency", PRIOR_LATENCY)
+        self.success = saved.get("success", 1.0)
+        self.blocked = saved.get("blocked", 0.0)
+        self.failures = saved.get("failures", 0)
+        self.state = saved.get("state", CLOSED)
+        self.opened_at = saved.get("opened_at", 0.0)
+
+    def weight(self) -> float:
+        return max(self.success, 0.01) * max(1.0 - self.blocked, 0.01) / max(self.latency, 0.05)
+
+    def as_dict(self) -> dict:
+        return {
+            "latency": round(self.latency, 4),
+            "success": round(self.success, 4),
+            "blocked": round(self.blocked, 4),
+            "failures": self.failures,
+            "state": self.state,
+            "opened_at": self.opened_at,
+        }
+
+
+class ProxyPool:
+    def __init__(
+        self,
+        proxies: list[str],
+        state_path: str | None = None,
+        cooldown: float = DEFAULT_COOLDOWN,
+        rng=random,
+        clock=time.time,
+    ):
+        self.proxies = list(dict.fromkeys(proxies))
+        self.state_path = state_path
+        self.cooldown = cooldown
+        self._rng = rng
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._saved_at = 0.0
+        saved = (read_json(state_path, {}) if state_path else {}) or {}
+        self._health = {proxy: ProxyHealth(saved.get(proxy_id(proxy))) for proxy in self.proxies}
+
+    def __len__(self) -> int:
+        return len(self.proxies)
+
+    def choose(self) -> str | None:
+        """
+        A proxy picked by health weight. An open breaker whose cooldown has run
+        out is handed to exactly one caller as a probe. Returns None (go
+        direct) when the pool is empty or every breaker is open.
+        """
+        with self._lock:
+            now = self._clock()
+            candidates = []
+            for proxy, health in self._health.items():
+                if health.state == CLOSED:
+                    candidates.append((proxy, health))
+                elif now - health.opened_at >= self.cooldown:
+                    # Open (or a probe that never reported back): probe it again.
+                    health.state = HALF_OPEN
+                    health.opened_at = now
+                    return proxy
+            if not candidates:
+                return None
+            total = sum(health.weight() for _, health in candidates)
+            point = self._rng.random() * total
+            for proxy, health in candidates:
+                point -= health.weight()
+                if point <= 0:
+                    return proxy
+            return candidates[-1][0]
+
+    def report(self, proxy: str | None, ok: bool, latency: float | None = None, blocked: bool = False):
+        """Feed back one request made through ``proxy`` (``ok=False`` for errors and timeouts)."""
+        if proxy is None:
+            return
+        with self._lock:
+            health = self._health.get(proxy)
+            if health is None:
+                return
+            if latency is not None:
+                health.latency += ALPHA * (latency - health.latency)
+            health.success += ALPHA * ((1.0 if ok else 0.0) - health.success)
+            health.blocked += ALPHA * ((1.0 if blocked else 0.0) - health.blocked)
+            previous = health.state
+            if ok:
+                health.failures = 0
+                health.state = CLOSED
+            else:
+                health.failures += 1
+                if health.state == HALF_OPEN or health.failures >= FAILURE_THRESHOLD:
+                    health.state = OPEN
+                    health.opened_at = self._clock()
+            changed = health.state != previous
+        if changed or self._clock() - self._saved_at >= SAVE_INTERVAL:
+            self.save()
+
+    def snapshot(self) -> dict[str, dict]:
+        with self._lock:
+            return {proxy: health.as_dict() for proxy, health in self._health.items()}
+
+    def save(self):
+        if not self.state_path:
+            return
+        with self._lock:
+            self._saved_at = self._clock()
+            state = {proxy_id(proxy): health.as_dict() for proxy, health in self._health.items()}
+        try:
+            write_json(self.state_path, state)
+        except OSError:
+            pass
+
+
+_lock = threading.Lock()
+_pools: dict[str, ProxyPool] = {}
+
+
+def get_pool(path: str = PROXIES_PATH) -> ProxyPool:
+    """Process-wide pool for ``path``, loaded (with its saved health) once."""
+    with _lock:
+        pool = _pools.get(path)
+        if pool is None:
+            pool = ProxyPool(load_proxies(path), state_path=STATE_PATH)
+            _pools[path] = pool
+        return pool
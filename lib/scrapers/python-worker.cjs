@@ -0,0 +1,131 @@
+// Small pool of long-lived `worker.py` processes (NDJSON JSON-RPC over stdio),
+// so each scrape job reuses a warm interpreter instead of forking Python.
+// Plain JS so the Node scripts in scripts/*.mjs can load it without a
+// TypeScript loader; the app imports it through python-worker.ts, which adds
+// the types.
+const { spawn } = require("node:child_process");
+const path = require("node:path");
+
+const PYTHON_PATH = process.env.PYTHON_PATH ?? "C:\\Python313\\python.exe";
+const POOL_SIZE = Number(process.env.SCRAPER_WORKERS ?? 2);
+const JOBS_PER_WORKER = Number(process.env.SCRAPER_JOBS_PER_WORKER ?? 4);
+
+const workers = [];
+let nextId = 1;
+
+// Drops the worker from the pool and rejects every job still waiting on it.
+function failWorker(worker, error) {
+  const index = workers.indexOf(worker);
+  if (index !== -1) workers.splice(index, 1);
+  for (const pending of worker.pending.values()) {
+    pending.reject(error);
+  }
+  worker.pending.clear();
+}
+
+function startWorker() {
+  const scriptPath = path.join(process.cwd(), "lib", "scrapers", "worker.py");
+  const proc = spawn(PYTHON_PATH, [scriptPath, "--jobs", JOBS_PER_WORKER.toString()]);
+  const worker = { proc, pending: new Map() };
+
+  let buffer = "";
+  let errorOutput = "";
+
+  proc.stdout.on("data", (data) => {
+    buffer += data.toString();
+    let newline = buffer.indexOf("\n");
+    while (newline !== -1) {
+      const line = buffer.slice(0, newline).trim();
+      buffer = buffer.slice(newline + 1);
+      newline = buffer.indexOf("\n");
+      if (!line) continue;
+
+      let message;
+      try {
+        message = JSON.parse(line);
+      } catch {
+        continue;
+      }
+      const pending = worker.pending.get(message.id);
+      if (!pending) continue;
+      if (message.lead !== undefined) {
+        pending.onLead?.(message.lead);
+        continue;
+      }
+      worker.pending.delete(message.id);
+      if (message.error) {
+        pending.reject(new Error(message.error.message));
+      } else {
+        pending.resolve(message.result);
+      }
+    }
+  });
+
+  proc.stderr.on("data", (data) => {
+    errorOutput = (errorOutput + data.toString()).slice(-4000);
+  });
+
+  // Spawn failures (e.g. no Python at PYTHON_PATH) and writes to a dead
+  // worker (EPIPE) reject its jobs instead of crashing the Node process.
+  proc.on("error", (error) => {
+    failWorker(worker, new Error(`Python worker failed: ${error.message}`));
+  });
+  proc.stdin.on("error", (error) => {
+    failWorker(worker, new Error(`Python worker stdin failed: ${error.message}`));
+  });
+
+  proc.on("close", (code) => {
+    failWorker(worker, new Error(`Python worker exited with code ${code}: ${errorOutput}`));
+  });
+
+  workers.push(worker);
+  return worker;
+}
+
+function pickWorker() {
+  const idle = workers.find((worker) => worker.pending.size === 0);
+  if (idle) return idle;
+  if (workers.length < POOL_SIZE) return startWorker();
+  return workers.reduce((best, worker) =>
+    worker.pending.size < best.pending.size ? worker : best,
+  );
+}
+
+// With `onLead`, leads are streamed as they are parsed and the promise
+// resolves to the final summary only.
+function runScrapeJob(params, onLead) {
+  const worker = pickWorker();
+  const id = nextId++;
+  const request = { id, method: "scrape", params: { ...params, stream: Boolean(onLead) } };
+
+  return new Promise((resolve, reject) => {
+    worker.pending.set(id, { resolve, reject, onLead });
+    worker.proc.stdin.write(`${JSON.stringify(request)}\n`);
+  });
+}
+
+// Records leads a `skip_known` job returned once they are safely stored, so
+// later jobs skip them; until then they are not known (lead_store.py).
+function rememberLeads(source, leads) {
+  const worker = pickWorker();
+  const id = nextId++;
+  const request = { id, method: "remember", params: { source, leads } };
+
+  return new Promise((resolve, reject) => {
+    worker.pending.set(id, { resolve, reject });
+    worker.proc.stdin.write(`${JSON.stringify(request)}\n`);
+  });
+}
+
+// Lets a script exit: idle workers are asked to shut down.
+function closeWorkers() {
+  for (const worker of workers.splice(0)) {
+    worker.proc.stdin.end(`${JSON.stringify({ id: 0, method: "shutdown" })}\n`);
+  }
+}
+
+module.exports = {
+  runScrapeJob,
+  rememberLeads,
+  closeWorkers,
+};
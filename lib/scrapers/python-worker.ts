@@ -0,0 +1,42 @@
+// Typed entry point for the app's scrapers. The worker pool itself lives in
+// python-worker.cjs, which the Node scripts in scripts/*.mjs load directly
+// (they run without a TypeScript loader), so there is a single implementation.
+import pythonWorker from "./python-worker.cjs";
+
+export type ScrapeJobParams = {
+  source: "yellow_pages" | "angi";
+  // Search several sources at once as one deduplicated stream (engine.py); overrides `source`.
+  sources?: ("yellow_pages" | "angi")[];
+  keyword: string;
+  location: string;
+  limit?: number;
+  concurrency?: number;
+  per_host?: number;
+  stream?: boolean;
+  // Skip leads an earlier job already returned and confirmed with rememberLeads (lead_store.py).
+  skip_known?: boolean;
+  // Journal every page under this id; resending the id resumes the job (checkpoint.py).
+  job_id?: string;
+  // Angi only: fetch each lead's profile page for phone, website and address.
+  enrich_profiles?: boolean;
+  // Yellow Pages only: replace tracking links in `website` with their targets,
+  // spending at most resolve_budget seconds (default 30) on it.
+  resolve_websites?: boolean;
+  resolve_budget?: number;
+  // Seconds the whole job may take; past them it returns what it has with `partial: true`.
+  deadline_s?: number;
+  // us_latino: order, prune and drop cities by the new leads they brought before (city_yield.py).
+  schedule_cities?: boolean;
+};
+
+// With `onLead`, leads are streamed as they are parsed and the promise
+// resolves to the final summary only.
+export const runScrapeJob: (params: ScrapeJobParams, onLead?: (lead: any) => void) => Promise<any> =
+  pythonWorker.runScrapeJob;
+
+// Records leads a `skip_known` job returned once they are safely stored, so
+// later jobs skip them; until then they are not known (lead_store.py).
+export const rememberLeads: (source: string, leads: any[]) => Promise<any> = pythonWorker.rememberLeads;
+
+// Lets a script exit: idle workers are asked to shut down.
+export const closeWorkers: () => void = pythonWorker.closeWorkers;
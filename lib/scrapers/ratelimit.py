@@ -0,0 +1,167 @@
+"""
+Adaptive per-domain request pacing shared by every thread in the process.
+
+Each host gets a token bucket whose rate follows AIMD: every healthy
+response adds ``increase`` requests/second (up to ``max_rate``), every block
+(403/429/503 or a challenge page) multiplies the rate by ``decrease`` (down
+to ``min_rate``) and empties the bucket. A ``Retry-After`` header pauses the
+whole host until it has passed. Throughput therefore settles near the
+highest rate the site tolerates instead of fixed sleeps.
+
+Each bucket also keeps a running block rate (the share of recent responses
+that were blocks), which callers read to switch strategies on hosts that
+block often.
+"""
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+DEFAULT_RATE = float(os.getenv("SCRAPER_RATE_INITIAL", "1.0"))
+DEFAULT_MIN_RATE = float(os.getenv("SCRAPER_RATE_MIN", "0.05"))
+DEFAULT_MAX_RATE = float(os.getenv("SCRAPER_RATE_MAX", "10.0"))
+DEFAULT_INCREASE = 0.25
+DEFAULT_DECREASE = 0.5
+DEFAULT_BURST = 1.0
+
+# Refill rounding slack, so a bucket at 0.9999999999999998 tokens does not
+# wait 1e-16 s (a no-op on a coarse or virtual clock) forever.
+TOKEN_EPSILON = 1e-9
+
+# Weight of the newest response in a host's running block rate.
+BLOCK_RATE_WEIGHT = 0.2
+
+# Longest Retry-After we honour, so one header cannot park a worker for hours.
+MAX_RETRY_AFTER = 300.0
+
+
+def parse_retry_after(value, now: float | None = None) -> float | None:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - (now if now is not None else time.time())
+        except (TypeError, ValueError, IndexError, OverflowError):
+            return None
+    return min(max(0.0, seconds), MAX_RETRY_AFTER)
+
+
+class TokenBucket:
+    def __init__(
+        self,
+        rate: float = DEFAULT_RATE,
+        min_rate: float = DEFAULT_MIN_RATE,
+        max_rate: float = DEFAULT_MAX_RATE,
+        increase: float = DEFAULT_INCREASE,
+        decrease: float = DEFAULT_DECREASE,
+        burst: float = DEFAULT_BURST,
+        clock=time.monotonic,
+        sleep=time.sleep,
+    ):
+        self.min_rate = min_rate
+        self.max_rate = max(max_rate, min_rate)
+        self.rate = min(max(rate, self.min_rate), self.max_rate)
+        self.increase = increase
+        self.decrease = decrease
+        self.burst = max(1.0, burst)
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = self.burst
+        self._updated = clock()
+        self._paused_until = 0.0
+        self.block_rate = 0.0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, max_wait: float | None = None) -> float:
+        """
+        Block until a request may go out; returns the seconds spent waiting.
+        Raises ``TimeoutError`` instead of waiting past ``max_wait`` seconds.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._refill(now)
+                wait = self._paused_until - now
+                if wait <= 0:
+                    if self._tokens >= 1 - TOKEN_EPSILON:
+                        self._tokens = max(0.0, self._tokens - 1)
+                        return waited
+                    wait = (1 - self._tokens) / self.rate
+            if max_wait is not None and waited + wait > max_wait:
+                raise TimeoutError(f"rate limit wait of {waited + wait:.1f}s exceeds {max_wait:.1f}s")
+            self._sleep(wait)
+            waited += wait
+
+    def succeeded(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+            self.block_rate -= BLOCK_RATE_WEIGHT * self.block_rate
+
+    def blocked(self, retry_after: float | None = None):
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self.block_rate += BLOCK_RATE_WEIGHT * (1 - self.block_rate)
+            self._tokens = 0.0
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+
+
+class RateLimiter:
+    """One ``TokenBucket`` per host, created on first use."""
+
+    def __init__(self, clock=time.monotonic, sleep=time.sleep):
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._buckets: dict[str, TokenBucket] = {}
+        self._settings: dict[str, dict] = {}
+
+    def configure(self, url: str, **settings):
+        """Starting/limit settings (``TokenBucket`` keyword arguments) for ``url``'s host."""
+        host = urlsplit(url).hostname or ""
+        with self._lock:
+            self._settings[host] = settings
+            self._buckets.pop(host, None)
+
+    def bucket(self, url: str) -> TokenBucket:
+        host = urlsplit(url).hostname or ""
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(clock=self._clock, sleep=self._sleep, **self._settings.get(host, {}))
+                self._buckets[host] = bucket
+            return bucket
+
+    def acquire(self, url: str, max_wait: float | None = None) -> float:
+        return self.bucket(url).acquire(max_wait)
+
+    def feedback(self, url: str, response, blocked: bool):
+        bucket = self.bucket(url)
+        if blocked:
+            headers = getattr(response, "headers", None) or {}
+            bucket.blocked(parse_retry_after(headers.get("Retry-After")))
+        else:
+            bucket.succeeded()
+
+    def block_rate(self, url: str) -> float:
+        """Share of recent responses from ``url``'s host that were blocks (0 to 1)."""
+        return self.bucket(url).block_rate
+
+    def rates(self) -> dict[str, float]:
+        with self._lock:
+            return {host: round(bucket.rate, 3) for host, bucket in self._buckets.items()}
+
+
+LIMITER = RateLimiter()
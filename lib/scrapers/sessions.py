@@ -0,0 +1,161 @@
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+from curl_cffi import requests
+
+import fetch
+from http_cache import HTTP_CACHE
+from storage import CACHE_DIR, read_json, write_json
+
+DEFAULT_COOKIE_TTL = int(os.getenv("SCRAPER_COOKIE_TTL", "1800"))
+
+# After a failed warm-up, pages go out with whatever cookies they have for this long.
+WARMUP_RETRY_DELAY = 30.0
+
+# Cloudflare cookies that gate access; the saved jar expires with the first of them.
+CRITICAL_COOKIES = ("cf_clearance", "__cf_bm")
+
+_local = threading.local()
+
+
+def thread_session():
+    """
+    One curl_cffi session per thread, reused across pages, cities and jobs so
+    TLS connections and cookies stay warm in long-lived workers.
+    """
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        _local.session = session
+    return session
+
+
+class SessionManager:
+    """
+    Warms a site up once and shares the resulting cookie jar with every
+    thread-local session, across pages, locations and (via the on-disk copy)
+    processes. The jar is refreshed only when it expires or after
+    ``invalidate()`` is called on a block.
+    """
+
+    def __init__(self, name: str, warmup_url: str, impersonate: str, timeout: int = 20, ttl: int = DEFAULT_COOKIE_TTL):
+        self.name = name
+        self.warmup_url = warmup_url
+        self.host = urlsplit(warmup_url).hostname or ""
+        self.impersonate = impersonate
+        self.timeout = timeout
+        self.ttl = ttl
+        self.path = os.path.join(CACHE_DIR, "cookies", f"{name}.json")
+        self._lock = threading.Lock()
+        self._cookies: list[dict] = []
+        self._expires_at = 0.0
+        self._retry_at = 0.0
+        self._generation = 0
+        self._loaded = False
+
+    def _applied(self) -> dict:
+        applied = getattr(_local, "applied", None)
+        if applied is None:
+            applied = _local.applied = {}
+        return applied
+
+    def _load(self):
+        self._loaded = True
+        saved = read_json(self.path)
+        if saved and saved.get("expires_at", 0) > time.time():
+            self._cookies = saved.get("cookies", [])
+            self._expires_at = saved["expires_at"]
+            self._generation += 1
+
+    def _owns(self, cookie) -> bool:
+        domain = (cookie.domain or "").lstrip(".")
+        return not domain or self.host == domain or self.host.endswith("." + domain)
+
+    def _warm_up(self, session, headers: dict, proxies: dict | None, metrics=None):
+        """
+        Fetch the home page and share its cookies. Only a 200 that set
+        cookies for this site counts: anything else is retried after
+        ``WARMUP_RETRY_DELAY`` and never written to disk.
+        """
+        now = time.time()
+        try:
+            response = fetch.get(
+                session,
+                self.warmup_url,
+                headers=headers,
+                impersonate=self.impersonate,
+                proxies=proxies,
+                timeout=self.timeout,
+                metrics=metrics,
+                # A cached home page sets no cookies.
+                cache=False,
+            )
+        except Exception:
+            response = None
+
+        expires_at = now + self.ttl
+        cookies = []
+        for cookie in session.cookies.jar:
+            if not self._owns(cookie):
+                continue
+            cookies.append({
+                "name": cookie.name,
+                "value": cookie.value,
+                "domain": cookie.domain,
+                "path": cookie.path,
+            })
+            if cookie.name in CRITICAL_COOKIES and cookie.expires:
+                expires_at = min(expires_at, cookie.expires)
+
+        if response is None or response.status_code != 200 or not cookies:
+            self._retry_at = now + WARMUP_RETRY_DELAY
+            return
+
+        self._cookies = cookies
+        self._expires_at = expires_at
+        self._generation += 1
+        try:
+            write_json(self.path, {"saved_at": now, "expires_at": expires_at, "cookies": cookies})
+        except OSError:
+            pass
+
+    def session(self, headers: dict, proxies: dict | None = None, metrics=None):
+        """Thread-local session carrying a warm cookie jar for this site."""
+        session = thread_session()
+        if HTTP_CACHE.replaying:
+            # Replayed pages need no cookies, and replay never touches the network.
+            return session
+        applied = self._applied()
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            now = time.time()
+            if self._expires_at <= now and self._retry_at <= now:
+                if metrics is None:
+                    self._warm_up(session, headers, proxies)
+                else:
+                    with metrics.phase("warmup"):
+                        self._warm_up(session, headers, proxies, metrics)
+                    metrics.incr("warmups")
+                applied[self.name] = self._generation
+                return session
+            generation = self._generation
+
+        if applied.get(self.name) != generation:
+            for cookie in self._cookies:
+                session.cookies.set(
+                    cookie["name"],
+                    cookie["value"],
+                    domain=cookie.get("domain") or "",
+                    path=cookie.get("path") or "/",
+                )
+            applied[self.name] = generation
+        return session
+
+    def invalidate(self):
+        """Force a fresh warm-up, unless another thread already replaced the jar we used."""
+        with self._lock:
+            if self._applied().get(self.name) == self._generation:
+                self._expires_at = 0.0
@@ -0,0 +1,47 @@
+import json
+import os
+import tempfile
+
+CACHE_DIR = os.getenv("SCRAPER_CACHE_DIR") or os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", ".scraper_cache")
+)
+
+
+def cache_path(*parts: str) -> str:
+    """Path under the scraper cache directory; parent directories are created."""
+    path = os.path.join(CACHE_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def read_json(path: str, default=None):
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return default
+
+
+def _write_atomic(path: str, dump):
+    """Write atomically so concurrent processes never read half a file."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            dump(handle)
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def write_json(path: str, data):
+    _write_atomic(path, lambda handle: json.dump(data, handle))
+
+
+def write_text(path: str, text: str):
+    _write_atomic(path, lambda handle: handle.write(text))
@@ -0,0 +1,32 @@
+import json
+
+
+def consume(stream, on_item) -> dict:
+    """Feed every item of a lead generator to ``on_item``; returns its summary."""
+    while True:
+        try:
+            item = next(stream)
+        except StopIteration as stop:
+            return stop.value or {}
+        on_item(item)
+
+
+def drain(stream) -> tuple[list, dict]:
+    """Collect a lead generator into ``(leads, summary)``."""
+    items = []
+    summary = consume(stream, items.append)
+    return items, summary
+
+
+def write_ndjson(stream, out) -> dict:
+    """
+    Write one ``{"type": "lead"}`` line per lead as it arrives, then a final
+    ``{"type": "summary"}`` line.
+    """
+    def emit(record: dict):
+        out.write(json.dumps(record) + "\n")
+        out.flush()
+
+    summary = consume(stream, lambda lead: emit({"type": "lead", "lead": lead}))
+    emit({"type": "summary", **summary})
+    return summary
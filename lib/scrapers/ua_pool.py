@@ -0,0 +1,126 @@
+"""
+Process-wide user-agent pool backed by a memory-mapped ``user_agents.txt``.
+
+The file is indexed once into two integer arrays of line offsets, so a random
+pick decodes a single line instead of keeping 10k strings alive per call.
+"""
+import bisect
+import mmap
+import os
+import random
+import re
+import threading
+from array import array
+
+FALLBACK_UA = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+UA_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "user_agents.txt"))
+
+_CHROME_VERSION = re.compile(r"Chrome/(\d+)")
+_IMPERSONATE_CHROME = re.compile(r"chrome(\d+)$")
+_NOT_DESKTOP_CHROME = re.compile(r"Edg/|OPR/|Firefox|YaBrowser|SamsungBrowser|Mobile|Android|CriOS")
+
+
+class UserAgentPool:
+    def __init__(self, buffer=None, starts=None, ends=None, cumulative=None):
+        self._buffer = buffer
+        self._starts = starts if starts is not None else array("Q")
+        self._ends = ends if ends is not None else array("Q")
+        self._cumulative = cumulative
+
+    @classmethod
+    def from_file(cls, path: str = UA_PATH) -> "UserAgentPool":
+        try:
+            with open(path, "rb") as handle:
+                if os.fstat(handle.fileno()).st_size == 0:
+                    return cls()
+                buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError:
+            return cls()
+        starts, ends = array("Q"), array("Q")
+        offset = 0
+        for line in iter(buffer.readline, b""):
+            stripped = line.strip()
+            if stripped:
+                start = offset + line.index(stripped[:1])
+                starts.append(start)
+                ends.append(start + len(stripped))
+            offset += len(line)
+        return cls(buffer, starts, ends)
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def __getitem__(self, index: int) -> str:
+        return self._buffer[self._starts[index]:self._ends[index]].decode("utf-8", "replace")
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def choice(self, rng=random) -> str:
+        """Random user agent (weighted if the pool is), or ``FALLBACK_UA`` when empty."""
+        if not self._starts:
+            return FALLBACK_UA
+        if self._cumulative is None:
+            return self[rng.randrange(len(self._starts))]
+        point = rng.random() * self._cumulative[-1]
+        return self[min(bisect.bisect_right(self._cumulative, point), len(self._starts) - 1)]
+
+    def filter(self, predicate) -> "UserAgentPool":
+        """Sub-pool sharing the same mapping; keeps lines where ``predicate(ua)`` is true."""
+        keep = [i for i in range(len(self)) if predicate(self[i])]
+        return UserAgentPool(
+            self._buffer,
+            array("Q", (self._starts[i] for i in keep)),
+            array("Q", (self._ends[i] for i in keep)),
+        )
+
+    def weighted(self, weight) -> "UserAgentPool":
+        """Same lines, picked with probability proportional to ``weight(ua)``."""
+        cumulative = array("d")
+        total = 0.0
+        for i in range(len(self)):
+            total += max(0.0, float(weight(self[i])))
+            cumulative.append(total)
+        if not total:
+            return self
+        return UserAgentPool(self._buffer, self._starts, self._ends, cumulative)
+
+
+def chrome_major(user_agent: str) -> int | None:
+    match = _CHROME_VERSION.search(user_agent)
+    return int(match.group(1)) if match else None
+
+
+def is_desktop_chrome(user_agent: str) -> bool:
+    return chrome_major(user_agent) is not None and not _NOT_DESKTOP_CHROME.search(user_agent)
+
+
+_lock = threading.Lock()
+_pools: dict[tuple[str, str | None], UserAgentPool] = {}
+
+
+def get_pool(impersonate: str | None = None, path: str = UA_PATH) -> UserAgentPool:
+    """
+    Shared pool, loaded once per process. With ``impersonate="chrome120"`` only
+    desktop Chrome UAs are kept (so the header matches the TLS fingerprint),
+    weighted towards the impersonated major version.
+    """
+    key = (path, impersonate)
+    with _lock:
+        pool = _pools.get(key)
+        if pool is not None:
+            return pool
+        base = _pools.get((path, None))
+        if base is None:
+            base = UserAgentPool.from_file(path)
+            _pools[(path, None)] = base
+        pool = base
+        target = _IMPERSONATE_CHROME.match(impersonate or "")
+        if target:
+            major = int(target.group(1))
+            chrome = base.filter(is_desktop_chrome)
+            if len(chrome):
+                pool = chrome.weighted(lambda ua: 1.0 / (1 + abs(chrome_major(ua) - major)))
+        _pools[key] = pool
+        return pool
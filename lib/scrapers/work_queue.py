@@ -0,0 +1,408 @@
+"""
+Sharded execution of scrape jobs over a SQLite work queue, so one job can use
+every core of a box, or several boxes that share the queue directory.
+
+A job (source, keyword, location, limit) is split into units of
+``PAGES_PER_UNIT`` result pages of one location: every city of
+``LATINO_HEAVY_LOCATIONS`` for ``us_latino``, otherwise the location and its
+``STATE_FALLBACK_CITY``. Workers (``work``) lease units one at a time, run
+them with the scraper's ``iter_location`` and commit each page's leads in one
+transaction that applies the job-wide dedup (the source's ``lead_key``) and
+the job-wide ``limit``. A lead found by several units is kept as the earliest
+location and page found it, as a sequential scrape would. Once the limit is
+reached every worker stops at its next page. When a location runs out of
+pages, its later units are skipped.
+
+Units are handed out block by block (pages 1-5 of every city, then 6-10,
+...). A city's later blocks wait until its first page is in: the result
+banner on it gives the city's last page, and blocks past it are skipped
+without a request.
+A unit whose worker dies is leased again after ``LEASE_SECONDS`` and resumes
+from the page after its last committed one.
+
+Each worker process paces requests with its own rate limiter, so N workers
+put up to N times the per-process rate on a site.
+
+    python work_queue.py run plumber us_latino --limit 2000 --processes 8
+    python work_queue.py submit plumber us_latino --limit 2000   # prints the job id
+    python work_queue.py work                                    # on every host
+    python work_queue.py results JOB_ID
+"""
+import argparse
+import json
+import math
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from engine import SOURCES, source_module
+from locations import fallback_city, is_latino
+from storage import CACHE_DIR
+from streaming import consume
+
+PAGES_PER_UNIT = int(os.getenv("SCRAPER_UNIT_PAGES", "5"))
+LEASE_SECONDS = 600
+MAX_ATTEMPTS = 3
+# How often an idle worker looks again while units it may not start yet are open.
+POLL_SECONDS = 0.2
+
+DEFAULT_QUEUE_DIR = os.getenv("SCRAPER_QUEUE_DIR") or os.path.join(CACHE_DIR, "queue")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    keyword TEXT NOT NULL,
+    location TEXT NOT NULL,
+    lead_limit INTEGER NOT NULL,
+    accepted INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS units (
+    unit_id INTEGER PRIMARY KEY,
+    job_id TEXT NOT NULL,
+    location TEXT NOT NULL,
+    location_index INTEGER NOT NULL,
+    block INTEGER NOT NULL,
+    first_page INTEGER NOT NULL,
+    last_page INTEGER NOT NULL,
+    next_page INTEGER NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    pages INTEGER NOT NULL DEFAULT 0,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS units_by_state ON units (state, block, location_index);
+CREATE TABLE IF NOT EXISTS leads (
+    job_id TEXT NOT NULL,
+    lead_key TEXT NOT NULL,
+    location_index INTEGER NOT NULL,
+    page INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    lead TEXT NOT NULL,
+    PRIMARY KEY (job_id, lead_key)
+);
+"""
+
+
+def _sources() -> dict:
+    return {name: source_module(name) for name in SOURCES}
+
+
+def job_locations(scraper, location: str) -> list[str]:
+    """The locations a job is split over, mirroring what ``engine.iter_source`` would scrape."""
+    if is_latino(location):
+        return list(scraper.LATINO_HEAVY_LOCATIONS)
+    fallback = fallback_city(location, scraper.STATE_FALLBACK_CITY)
+    return [location, fallback] if fallback else [location]
+
+
+class WorkQueue:
+    def __init__(self, directory: str | None = None):
+        self.directory = directory or DEFAULT_QUEUE_DIR
+        self.path = os.path.join(self.directory, "queue.sqlite3")
+        self._conn = None
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per WorkQueue; worker processes open their own.
+        if self._conn is None:
+            os.makedirs(self.directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _transaction(self):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        return conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def submit(self, source: str, keyword: str, location: str, limit: int, job_id: str | None = None) -> str:
+        scraper = _sources().get(source)
+        if scraper is None:
+            raise ValueError(f"Unknown source: {source}")
+        job_id = job_id or uuid.uuid4().hex[:12]
+        blocks = math.ceil(scraper.MAX_PAGES / PAGES_PER_UNIT)
+        conn = self._transaction()
+        try:
+            conn.execute(
+                "INSERT INTO jobs (job_id, source, keyword, location, lead_limit, created) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, source, keyword, location, limit, time.time()),
+            )
+            for index, loc in enumerate(job_locations(scraper, location)):
+                for block in range(blocks):
+                    first = block * PAGES_PER_UNIT + 1
+                    last = min(scraper.MAX_PAGES, first + PAGES_PER_UNIT - 1)
+                    conn.execute(
+                        "INSERT INTO units (job_id, location, location_index, block, first_page, last_page, next_page)"
+                        " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (job_id, loc, index, block, first, last, first),
+                    )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return job_id
+
+    def claim(self, worker: str, job_id: str | None = None) -> dict | None:
+        """Lease the next runnable unit (pending, or whose lease expired), or None."""
+        now = time.time()
+        conn = self._transaction()
+        try:
+            row = conn.execute(
+                "SELECT units.*, jobs.source, jobs.keyword, jobs.lead_limit FROM units JOIN jobs USING (job_id)"
+                " WHERE (units.state = 'pending' OR (units.state = 'running' AND units.lease_until < ?))"
+                " AND jobs.accepted < jobs.lead_limit AND (? IS NULL OR units.job_id = ?)"
+                " AND (units.block = 0 OR EXISTS (SELECT 1 FROM units AS head"
+                " WHERE head.job_id = units.job_id AND head.location_index = units.location_index AND head.block = 0"
+                " AND (head.next_page > head.first_page OR head.state NOT IN ('pending', 'running'))))"
+                " ORDER BY jobs.created, units.block, units.location_index LIMIT 1",
+                (now, job_id, job_id),
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE units SET state = 'running', worker = ?, lease_until = ?, attempts = attempts + 1"
+                    " WHERE unit_id = ?",
+                    (worker, now + LEASE_SECONDS, row["unit_id"]),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return dict(row) if row is not None else None
+
+    def commit_page(self, unit: dict, page: int, leads: list, lead_key, last_page: int | None = None) -> bool:
+        """
+        Store a page's leads that are new to the job, up to its limit, and
+        advance the unit past the page; with ``last_page``, the location's
+        units past it are skipped. True once the job has its limit.
+        """
+        conn = self._transaction()
+        try:
+            accepted, limit = conn.execute(
+                "SELECT accepted, lead_limit FROM jobs WHERE job_id = ?", (unit["job_id"],)
+            ).fetchone()
+            for seq, lead in enumerate(leads):
+                key = lead_key(lead)
+                position = (unit["location_index"], page, seq)
+                held = conn.execute(
+                    "SELECT location_index, page, seq FROM leads WHERE job_id = ? AND lead_key = ?",
+                    (unit["job_id"], key),
+                ).fetchone()
+                if held is None:
+                    if accepted >= limit:
+                        continue
+                    conn.execute(
+                        "INSERT INTO leads (job_id, lead_key, location_index, page, seq, lead) VALUES (?, ?, ?, ?, ?, ?)",
+                        (unit["job_id"], key, *position, json.dumps(lead)),
+                    )
+                    accepted += 1
+                elif position < tuple(held):
+                    # The copy the sequential scrape would have kept wins, whichever worker got there first.
+                    conn.execute(
+                        "UPDATE leads SET location_index = ?, page = ?, seq = ?, lead = ? WHERE job_id = ? AND lead_key = ?",
+                        (*position, json.dumps(lead), unit["job_id"], key),
+                    )
+            conn.execute("UPDATE jobs SET accepted = ? WHERE job_id = ?", (accepted, unit["job_id"]))
+            conn.execute(
+                "UPDATE units SET next_page = ?, pages = pages + 1, lease_until = ? WHERE unit_id = ?",
+                (page + 1, time.time() + LEASE_SECONDS, unit["unit_id"]),
+            )
+            if last_page is not None:
+                conn.execute(
+                    "UPDATE units SET state = 'skipped' WHERE job_id = ? AND location_index = ? AND first_page > ?"
+                    " AND state = 'pending'",
+                    (unit["job_id"], unit["location_index"], last_page),
+                )
+                conn.execute(
+                    "UPDATE units SET last_page = MIN(last_page, ?) WHERE job_id = ? AND location_index = ?"
+                    " AND state = 'pending'",
+                    (last_page, unit["job_id"], unit["location_index"]),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return accepted >= limit
+
+    def has_open_units(self, job_id: str | None = None) -> bool:
+        """Whether units are still pending or running (on jobs short of their limit)."""
+        row = self._connection().execute(
+            "SELECT 1 FROM units JOIN jobs USING (job_id) WHERE units.state IN ('pending', 'running')"
+            " AND jobs.accepted < jobs.lead_limit AND (? IS NULL OR units.job_id = ?) LIMIT 1",
+            (job_id, job_id),
+        ).fetchone()
+        return row is not None
+
+    def finish(self, unit: dict, exhausted: bool):
+        """Mark the unit done; ``exhausted`` skips the location's later units."""
+        conn = self._transaction()
+        try:
+            conn.execute("UPDATE units SET state = 'done', lease_until = NULL WHERE unit_id = ?", (unit["unit_id"],))
+            if exhausted:
+                conn.execute(
+                    "UPDATE units SET state = 'skipped' WHERE job_id = ? AND location_index = ? AND block > ?"
+                    " AND state = 'pending'",
+                    (unit["job_id"], unit["location_index"], unit["block"]),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def fail(self, unit: dict, error: str):
+        """Put the unit back in the queue, or give up on it after ``MAX_ATTEMPTS``."""
+        state = "failed" if unit["attempts"] + 1 >= MAX_ATTEMPTS else "pending"
+        conn = self._transaction()
+        try:
+            conn.execute(
+                "UPDATE units SET state = ?, error = ?, lease_until = NULL WHERE unit_id = ?",
+                (state, error, unit["unit_id"]),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def leads(self, job_id: str) -> list[dict]:
+        """The job's leads in location order, then page order."""
+        rows = self._connection().execute(
+            "SELECT lead FROM leads WHERE job_id = ? ORDER BY location_index, page, seq", (job_id,)
+        )
+        return [json.loads(row["lead"]) for row in rows]
+
+    def summary(self, job_id: str) -> dict:
+        conn = self._connection()
+        job = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if job is None:
+            raise ValueError(f"Unknown job: {job_id}")
+        units = dict(conn.execute("SELECT state, COUNT(*) FROM units WHERE job_id = ? GROUP BY state", (job_id,)).fetchall())
+        pages = conn.execute("SELECT COALESCE(SUM(pages), 0) FROM units WHERE job_id = ?", (job_id,)).fetchone()[0]
+        errors = {
+            row["location"]: row["error"]
+            for row in conn.execute("SELECT location, error FROM units WHERE job_id = ? AND state = 'failed'", (job_id,))
+        }
+        return {
+            "status": 200 if job["accepted"] else 404,
+            "count": job["accepted"],
+            "pages_scraped": pages,
+            "job_id": job_id,
+            "units": units,
+            **({"errors": errors} if errors else {}),
+        }
+
+
+def run_unit(queue: WorkQueue, unit: dict):
+    scraper = _sources()[unit["source"]]
+    stop = threading.Event()
+    last_done = [unit["next_page"] - 1]
+
+    def on_page(page, leads, last_page):
+        last_done[0] = page
+        if queue.commit_page(unit, page, leads, scraper.lead_key, last_page):
+            stop.set()
+
+    try:
+        summary = consume(
+            scraper.iter_location(
+                unit["keyword"],
+                unit["location"],
+                unit["lead_limit"],
+                set(),
+                stop_event=stop,
+                start_page=unit["next_page"],
+                end_page=unit["last_page"],
+                on_page=on_page,
+            ),
+            lambda lead: None,
+        )
+    except Exception as exc:
+        queue.fail(unit, str(exc))
+        return
+    if "error" in summary:
+        queue.fail(unit, summary["error"])
+        return
+    queue.finish(unit, exhausted=not stop.is_set() and last_done[0] < unit["last_page"])
+
+
+def work(directory: str | None = None, job_id: str | None = None, worker: str | None = None) -> int:
+    """Run units until none is left open; returns how many this worker ran."""
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    queue = WorkQueue(directory)
+    ran = 0
+    try:
+        while True:
+            unit = queue.claim(worker, job_id)
+            if unit is None:
+                if not queue.has_open_units(job_id):
+                    return ran
+                time.sleep(POLL_SECONDS)
+                continue
+            run_unit(queue, unit)
+            ran += 1
+    finally:
+        queue.close()
+
+
+def run_job(
+    source: str,
+    keyword: str,
+    location: str,
+    limit: int,
+    processes: int = os.cpu_count() or 1,
+    directory: str | None = None,
+) -> dict:
+    """Submit a job and work it on a local process pool; returns ``{"leads": [...], **summary}``."""
+    queue = WorkQueue(directory)
+    try:
+        job_id = queue.submit(source, keyword, location, limit)
+        with ProcessPoolExecutor(max_workers=max(1, processes)) as pool:
+            for future in [pool.submit(work, queue.directory, job_id) for _ in range(max(1, processes))]:
+                future.result()
+        return {"leads": queue.leads(job_id), **queue.summary(job_id)}
+    finally:
+        queue.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sharded scrape jobs over a shared SQLite work queue")
+    parser.add_argument("--queue-dir", default=DEFAULT_QUEUE_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name in ("run", "submit"):
+        command = commands.add_parser(name)
+        command.add_argument("keyword")
+        command.add_argument("location")
+        command.add_argument("--source", choices=("yellow_pages", "angi"), default="yellow_pages")
+        command.add_argument("--limit", type=int, default=25)
+        if name == "run":
+            command.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    command = commands.add_parser("work")
+    command.add_argument("--job-id", default=None)
+    command = commands.add_parser("results")
+    command.add_argument("job_id")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        result = run_job(args.source, args.keyword, args.location, args.limit, args.processes, args.queue_dir)
+        print(json.dumps(result))
+    elif args.command == "submit":
+        print(WorkQueue(args.queue_dir).submit(args.source, args.keyword, args.location, args.limit))
+    elif args.command == "work":
+        print(f"units run: {work(args.queue_dir, args.job_id)}", file=sys.stderr)
+    else:
+        queue = WorkQueue(args.queue_dir)
+        print(json.dumps({"leads": queue.leads(args.job_id), **queue.summary(args.job_id)}))
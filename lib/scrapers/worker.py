@@ -0,0 +1,185 @@
+"""
+Long-lived scraper worker speaking newline-delimited JSON-RPC on stdin/stdout.
+
+Requests:  {"id": 1, "method": "scrape", "params": {"source": "yellow_pages", "keyword": "plumber", "location": "Houston, TX", "limit": 25}}
+Responses: {"id": 1, "result": {...}} or {"id": 1, "error": {"message": "..."}}
+
+With ``"stream": true`` in the params, each lead is sent as soon as it is
+parsed as {"id": 1, "lead": {...}} before the final result (the summary).
+
+With ``"skip_known": true``, leads an earlier job or run already returned
+are skipped (see ``lead_store``). The new ones are recorded only when the
+client confirms it kept them, by sending them back with "remember"
+(params ``{"source": ..., "leads": [...]}``), so leads a client fails to
+store are not skipped next time. With a
+``"job_id"``, every page is journaled (see ``checkpoint``) and sending the
+same job id again after a crash or timeout resumes the job. Angi jobs with
+``"enrich_profiles": true`` fill in each lead's phone, website and address
+from its profile page; Yellow Pages jobs with ``"resolve_websites": true``
+replace tracking links with the sites they redirect to, within
+``"resolve_budget"`` seconds. ``"sources": ["yellow_pages", "angi"]`` instead
+of ``"source"`` searches both at once as one deduplicated stream (see
+``engine.search``). ``"deadline_s"`` bounds the whole job: when it runs out
+the job returns the leads it has with ``"partial": true``. With
+``"schedule_cities": true``, ``us_latino`` jobs order and prune their cities
+by the yield earlier jobs recorded (see ``city_yield``).
+
+Other methods: "remember", "ping" and "shutdown". Jobs run concurrently; sessions and
+other per-process state stay warm between them.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import http_cache
+from checkpoint import open_job
+from city_yield import get_stats
+from engine import search, source_iters
+from fanout import DEFAULT_MAX_CITIES
+from lead_store import UnconfirmedStore, get_store
+from metrics import export as export_metrics
+from streaming import consume, drain
+
+DEFAULT_MAX_JOBS = 4
+
+
+def iter_scrape(scrapers: dict, params: dict):
+    sources = params.get("sources") or [params.get("source", "yellow_pages")]
+    unknown = [source for source in sources if source not in scrapers]
+    if unknown:
+        raise ValueError(f"Unknown source: {', '.join(unknown)}")
+    keyword = params.get("keyword")
+    location = params.get("location")
+    if not keyword or not location:
+        raise ValueError("keyword and location are required")
+    options = {
+        "max_cities": int(params.get("concurrency", DEFAULT_MAX_CITIES)),
+        "max_per_host": params.get("per_host"),
+    }
+    if params.get("skip_known"):
+        options["store"] = UnconfirmedStore(get_store())
+    if params.get("schedule_cities"):
+        options["yield_stats"] = get_stats()
+    if params.get("deadline_s") is not None:
+        options["deadline_s"] = float(params["deadline_s"])
+    source_options = {source: {} for source in sources}
+    if params.get("enrich_profiles"):
+        if "angi" not in sources:
+            raise ValueError("enrich_profiles is only supported for angi")
+        source_options["angi"]["enrich_profiles"] = True
+    if params.get("resolve_websites"):
+        if "yellow_pages" not in sources:
+            raise ValueError("resolve_websites is only supported for yellow_pages")
+        source_options["yellow_pages"]["resolve_websites"] = True
+        if params.get("resolve_budget") is not None:
+            source_options["yellow_pages"]["resolve_budget"] = float(params["resolve_budget"])
+    limit = int(params.get("limit", 25))
+    if len(sources) > 1:
+        if params.get("job_id"):
+            raise ValueError("job_id needs a single source")
+        return search(keyword, location, sources, limit, source_options=source_options, iters=scrapers, **options)
+    source = sources[0]
+    if params.get("job_id"):
+        job = {"source": source, "keyword": keyword, "location": location, "limit": limit}
+        options["journal"] = open_job(params["job_id"], job)
+    return scrapers[source](keyword, location, limit, **options, **source_options[source])
+
+
+def remember_leads(params: dict) -> dict:
+    """Record the leads a client confirmed it kept; returns how many were new."""
+    leads = params.get("leads")
+    if not isinstance(leads, list):
+        raise ValueError("leads must be a list")
+    source = params.get("source") or "unknown"
+    store = get_store()
+    recorded = sum(store.add(lead, source) for lead in leads if isinstance(lead, dict))
+    store.flush()
+    return {"recorded": recorded}
+
+
+def serve(
+    infile=None,
+    outfile=None,
+    max_jobs: int = DEFAULT_MAX_JOBS,
+    scrapers: dict | None = None,
+    metrics_file: str | None = None,
+):
+    infile = infile or sys.stdin
+    outfile = outfile or sys.stdout
+    scrapers = scrapers if scrapers is not None else source_iters()
+    write_lock = threading.Lock()
+
+    def reply(message: dict):
+        line = json.dumps(message)
+        with write_lock:
+            outfile.write(line + "\n")
+            outfile.flush()
+
+    def handle(request_id, params: dict):
+        try:
+            stream = iter_scrape(scrapers, params)
+            if params.get("stream"):
+                result = consume(stream, lambda lead: reply({"id": request_id, "lead": lead}))
+            else:
+                leads, summary = drain(stream)
+                result = {"leads": leads, **summary}
+            reply({"id": request_id, "result": result})
+            if metrics_file:
+                labels = {name: params.get(name) for name in ("source", "keyword", "location")}
+                try:
+                    export_metrics(metrics_file, result, labels)
+                except OSError:
+                    pass
+        except Exception as exc:
+            reply({"id": request_id, "error": {"message": str(exc)}})
+
+    def handle_remember(request_id, params: dict):
+        try:
+            reply({"id": request_id, "result": remember_leads(params)})
+        except Exception as exc:
+            reply({"id": request_id, "error": {"message": str(exc)}})
+
+    with ThreadPoolExecutor(max_workers=max(1, max_jobs)) as pool:
+        for line in infile:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError:
+                reply({"id": None, "error": {"message": "Invalid JSON"}})
+                continue
+            if not isinstance(request, dict):
+                reply({"id": None, "error": {"message": "Invalid request: expected a JSON object"}})
+                continue
+
+            request_id = request.get("id")
+            method = request.get("method")
+            if method == "scrape":
+                pool.submit(handle, request_id, request.get("params") or {})
+            elif method == "remember":
+                pool.submit(handle_remember, request_id, request.get("params") or {})
+            elif method == "ping":
+                reply({"id": request_id, "result": "pong"})
+            elif method == "shutdown":
+                reply({"id": request_id, "result": "bye"})
+                break
+            else:
+                reply({"id": request_id, "error": {"message": f"Unknown method: {method}"}})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Persistent scraper worker (NDJSON JSON-RPC over stdio)")
+    parser.add_argument("--jobs", type=int, default=DEFAULT_MAX_JOBS, help="Scrape jobs run at once")
+    parser.add_argument(
+        "--metrics-file",
+        default=os.getenv("SCRAPER_METRICS_FILE"),
+        help="Write each job's metrics block here (.prom textfile, otherwise appended JSON lines)",
+    )
+    http_cache.add_arguments(parser)
+    args = parser.parse_args()
+    http_cache.configure_from_args(args)
+    serve(max_jobs=args.jobs, metrics_file=args.metrics_file)
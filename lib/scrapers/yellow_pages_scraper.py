@@ -2,162 +2,40 @@ import sys
 import json
 import argparse
 import os
-import random
 import time
-from curl_cffi import requests
-from bs4 import BeautifulSoup
-
-# Ciudades principales con alta población latina o uso extendido de español
-LATINO_HEAVY_LOCATIONS = [
-    # California
-    "Los Angeles, CA",
-    "San Diego, CA",
-    "San Jose, CA",
-    "San Francisco, CA",
-    "Oakland, CA",
-    "Fresno, CA",
-    "Sacramento, CA",
-    "Riverside, CA",
-    "Bakersfield, CA",
-    "Santa Ana, CA",
-    "Anaheim, CA",
-    "Long Beach, CA",
-    "Stockton, CA",
-    "Chula Vista, CA",
-    "Modesto, CA",
-    # Texas
-    "Houston, TX",
-    "San Antonio, TX",
-    "Dallas, TX",
-    "Austin, TX",
-    "Fort Worth, TX",
-    "El Paso, TX",
-    "McAllen, TX",
-    "Brownsville, TX",
-    "Laredo, TX",
-    "Corpus Christi, TX",
-    "San Jose, TX",
-    "Irving, TX",
-    "Arlington, TX",
-    "Plano, TX",
-    "Garland, TX",
-    "Grand Prairie, TX",
-    "Amarillo, TX",
-    "Lubbock, TX",
-    "Pasadena, TX",
-    "Mesquite, TX",
-    # Florida
-    "Miami, FL",
-    "Hialeah, FL",
-    "Homestead, FL",
-    "Fort Lauderdale, FL",
-    "West Palm Beach, FL",
-    "Orlando, FL",
-    "Tampa, FL",
-    "Jacksonville, FL",
-    "Kissimmee, FL",
-    # New York / East Coast
-    "New York, NY",
-    "Queens, NY",
-    "Bronx, NY",
-    "Brooklyn, NY",
-    "Jersey City, NJ",
-    "Newark, NJ",
-    "Paterson, NJ",
-    "Elizabeth, NJ",
-    "Union City, NJ",
-    "Trenton, NJ",
-    # Midwest
-    "Chicago, IL",
-    "Aurora, IL",
-    "Cicero, IL",
-    "Waukegan, IL",
-    # Southwest
-    "Phoenix, AZ",
-    "Tucson, AZ",
-    "Mesa, AZ",
-    "Glendale, AZ",
-    "Albuquerque, NM",
-    "Las Cruces, NM",
-    "Las Vegas, NV",
-    "Henderson, NV",
-    "Reno, NV",
-    "Denver, CO",
-    # Southeast
-    "Atlanta, GA",
-    "Doral, FL",
-    "Cape Coral, FL",
-    "Charlotte, NC",
-    "Raleigh, NC",
-    # Others con fuerte presencia latina
-    "Washington, DC",
-    "San Juan, PR",
-    "Ponce, PR",
-    "Bayamon, PR",
-]
-
-STATE_FALLBACK_CITY = {
-    "AL": "Birmingham, AL",
-    "AK": "Anchorage, AK",
-    "AZ": "Phoenix, AZ",
-    "AR": "Little Rock, AR",
-    "CA": "Los Angeles, CA",
-    "CO": "Denver, CO",
-    "CT": "Bridgeport, CT",
-    "DE": "Wilmington, DE",
-    "FL": "Miami, FL",
-    "GA": "Atlanta, GA",
-    "HI": "Honolulu, HI",
-    "ID": "Boise, ID",
-    "IL": "Chicago, IL",
-    "IN": "Indianapolis, IN",
-    "IA": "Des Moines, IA",
-    "KS": "Wichita, KS",
-    "KY": "Louisville, KY",
-    "LA": "New Orleans, LA",
-    "ME": "Portland, ME",
-    "MD": "Baltimore, MD",
-    "MA": "Boston, MA",
-    "MI": "Detroit, MI",
-    "MN": "Minneapolis, MN",
-    "MS": "Jackson, MS",
-    "MO": "Kansas City, MO",
-    "MT": "Billings, MT",
-    "NE": "Omaha, NE",
-    "NV": "Las Vegas, NV",
-    "NH": "Manchester, NH",
-    "NJ": "Newark, NJ",
-    "NM": "Albuquerque, NM",
-    "NY": "New York, NY",
-    "NC": "Charlotte, NC",
-    "ND": "Fargo, ND",
-    "OH": "Columbus, OH",
-    "OK": "Oklahoma City, OK",
-    "OR": "Portland, OR",
-    "PA": "Philadelphia, PA",
-    "RI": "Providence, RI",
-    "SC": "Charleston, SC",
-    "SD": "Sioux Falls, SD",
-    "TN": "Nashville, TN",
-    "TX": "Houston, TX",
-    "UT": "Salt Lake City, UT",
-    "VT": "Burlington, VT",
-    "VA": "Virginia Beach, VA",
-    "WA": "Seattle, WA",
-    "WV": "Charleston, WV",
-    "WI": "Milwaukee, WI",
-    "WY": "Cheyenne, WY",
-    "DC": "Washington, DC",
-}
-
-
-def parse_state_abbr(location: str) -> str | None:
-    parts = location.split(",")
-    if len(parts) < 2:
-        return None
-    state_part = parts[1].strip()
-    state = state_part.split()[0].upper() if state_part else ""
-    return state if len(state) == 2 else None
+from functools import partial
+from urllib.parse import urlsplit
+
+import checkpoint
+import city_yield
+import enrich
+import fetch
+import http_cache
+import lead_store
+import lead_table
+from extractors import RowSpec
+from deadline import Deadline, as_deadline, cancelled, out_of_time
+from engine import iter_source
+from fanout import DEFAULT_MAX_CITIES, claim_lead, is_stopped
+# The engine reads these off each source module, so a source can use its own.
+from locations import LATINO_HEAVY_LOCATIONS, STATE_FALLBACK_CITY, parse_state_abbr  # noqa: F401
+from metrics import Metrics, export as export_metrics
+from pagination import DEFAULT_PREFETCH, PagePrefetcher, last_page, pages_ahead, result_range
+from parsers import parse_html
+from proxies import get_pool as get_proxy_pool, proxy_dict
+from ratelimit import LIMITER
+from sessions import SessionManager
+from streaming import drain, write_ndjson
+from ua_pool import get_pool
+
+# Overridable so benchmarks can point the scraper at a local stand-in server.
+BASE_URL = os.getenv("YP_BASE_URL", "https://www.yellowpages.com").rstrip("/")
+
+SESSIONS = SessionManager("yellowpages", f"{BASE_URL}/", impersonate="chrome120", timeout=20)
+
+# Yellow Pages used to be fetched without any pacing; start fast and back off on blocks.
+LIMITER.configure(BASE_URL, rate=4.0, max_rate=20.0)
+
 
 def parse_locality(locality):
     if not locality:
@@ -168,21 +46,13 @@ def parse_locality(locality):
     sz_parts = state_zip.split()
     region = sz_parts[0] if len(sz_parts) > 0 else None
     postal_code = " ".join(sz_parts[1:]) if len(sz_parts) > 1 else None
+    # The same few cities and ZIPs repeat on every page; keep one copy of each.
     return {
-        "city": city,
-        "region": region,
-        "postalCode": postal_code
+        "city": sys.intern(city) if city else city,
+        "region": sys.intern(region) if region else region,
+        "postalCode": sys.intern(postal_code) if postal_code else postal_code
     }
 
-def load_user_agents():
-    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
-    ua_path = os.path.join(base_dir, "user_agents.txt")
-    try:
-        with open(ua_path, "r", encoding="utf-8") as handle:
-            agents = [line.strip() for line in handle if line.strip()]
-            return agents if agents else []
-    except Exception:
-        return []
 
 def build_headers(user_agent: str):
     return {
@@ -193,184 +63,479 @@ def build_headers(user_agent: str):
         "Referer": "https://www.google.com/",
     }
 
-def scrape_location(keyword, location, limit, seen_leads):
-    leads = []
-    page = 1
-    max_pages = 80  # Increased for up to 2000 results (usually ~30 results per page)
+# Fields of one result card, resolved in a single walk of the card.
+ROW_SPEC = RowSpec({
+    "name": "a.business-name",
+    "phone": ".phones.phone.primary, .phone",
+    "website": "a.track-visit-website, a.website-link",
+    "street": ".street-address, .adr .street-address",
+    "locality": ".locality",
+    "category": ".categories",
+})
 
-    user_agents = load_user_agents()
-    fallback_ua = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-    session = requests.Session()
 
-    while len(leads) < limit and page <= max_pages:
-        url = f"https://www.yellowpages.com/search?search_terms={keyword}&geo_location_terms={location}&page={page}"
-        
-        try:
-            response = None
-            for attempt in range(3):
-                user_agent = random.choice(user_agents) if user_agents else fallback_ua
-                headers = build_headers(user_agent)
-                # Warm up session for cookies
-                session.get(
-                    "https://www.yellowpages.com/",
-                    headers=headers,
-                    impersonate="chrome120",
-                    timeout=20,
-                )
-                response = session.get(
-                    url,
-                    headers=headers,
-                    impersonate="chrome120",
-                    timeout=30,
-                )
-                if response.status_code != 403:
-                    break
-                time.sleep(1 + attempt)
-            
-            if response.status_code != 200:
-                if page == 1:
-                    return {
-                        "error": f"Failed to fetch Yellow Pages. Status: {response.status_code}",
-                        "leads": []
-                    }
+# Increased for up to 2000 results (usually ~30 results per page)
+MAX_PAGES = 80
+
+# Listings per results page when the page does not say.
+RESULTS_PER_PAGE = 30
+
+
+def lead_key(lead: dict) -> str:
+    return f"{lead['name'].lower()}|{lead['phone'] or ''}"
+
+
+def parse_results_page(html_text, keyword, location, url, backend=None):
+    """
+    Extract every lead on a results page, in page order and without dedup.
+    Returns None when the page has no result rows at all (end of results).
+    """
+    doc = parse_html(html_text, backend)
+    results = doc.select(".search-results .result, .organic .result, [data-ypresult]")
+    if not results:
+        return None
+
+    leads = []
+    for row in results:
+        fields = ROW_SPEC.extract(row)
+        name_elem = fields["name"]
+        if not name_elem:
+            continue
+
+        name = name_elem.text()
+        phone = fields["phone"].text() if fields["phone"] else None
+
+        listing_path = name_elem.attr("href")
+        website_path = fields["website"].attr("href") if fields["website"] else None
+        street = fields["street"].text() if fields["street"] else None
+        locality = fields["locality"].text() if fields["locality"] else ""
+        loc_data = parse_locality(locality)
+        category = sys.intern(fields["category"].text()) if fields["category"] else None
+
+        leads.append({
+            "name": name,
+            "phone": phone,
+            "website": f"https://www.yellowpages.com{website_path}" if website_path and website_path.startswith("/") else website_path,
+            "street": street,
+            "city": loc_data.get("city"),
+            "region": loc_data.get("region"),
+            "postalCode": loc_data.get("postalCode"),
+            "address": f"{street}, {locality}" if street and locality else (street or locality or None),
+            "category": category,
+            "sourceUrl": f"https://www.yellowpages.com{listing_path}" if listing_path and listing_path.startswith("/") else listing_path or url,
+            "keyword": keyword,
+            "location": location,
+            "source": "yellow_pages"
+        })
+    return leads
+
+
+def iter_location(
+    keyword,
+    location,
+    limit,
+    seen_leads,
+    stop_event=None,
+    store=None,
+    start_page=1,
+    on_page=None,
+    end_page=None,
+):
+    """
+    Yield leads for one location as soon as each row is parsed. The generator
+    returns a summary dict (``status``, ``count``, ``pages_scraped`` or ``error``).
+    Leads already in ``store`` are skipped and do not count toward ``limit``.
+
+    Up to ``DEFAULT_PREFETCH`` following pages are fetched while the current one
+    is parsed, never past the last page announced on page 1 and never more
+    than the remaining ``limit`` needs.
+
+    Scraping starts at ``start_page`` and stops after ``end_page`` at the
+    latest. Once each page is done, ``on_page(page, leads, last_page)`` gets
+    the leads yielded from it and the last page the location is known to
+    have (see ``checkpoint`` and ``work_queue``).
+    """
+    metrics = Metrics()
+    deadline = as_deadline(stop_event)
+    count = 0
+    page = start_page
+    max_pages = MAX_PAGES
+    end_page = min(end_page or MAX_PAGES, MAX_PAGES)
+    per_page = RESULTS_PER_PAGE
+
+    user_agents = get_pool(impersonate="chrome120")
+    proxy_pool = get_proxy_pool()
+
+    def page_url(number):
+        return f"{BASE_URL}/search?search_terms={keyword}&geo_location_terms={location}&page={number}"
+
+    def fetch_page(number, prefetch_cancelled):
+        response = None
+        for attempt in range(3):
+            if prefetch_cancelled.is_set() or is_stopped(stop_event):
+                break
+            if attempt:
+                metrics.incr("retries")
+            user_agent = user_agents.choice()
+            headers = build_headers(user_agent)
+            proxies = proxy_dict(proxy_pool.choose())
+            try:
+                # Warms up only when the shared cookie jar is missing or stale.
+                session = SESSIONS.session(headers, proxies=proxies, metrics=metrics)
+                with metrics.phase("request"):
+                    response = fetch.get(
+                        session,
+                        page_url(number),
+                        headers=headers,
+                        impersonate="chrome120",
+                        proxies=proxies,
+                        proxy_pool=proxy_pool,
+                        timeout=30,
+                        metrics=metrics,
+                        deadline=deadline,
+                    )
+            except Exception:
+                # A dead proxy costs this attempt, not the whole location.
+                if proxies is None or attempt == 2:
+                    raise
+                continue
+            if response.status_code != 403:
                 break
+            # The rate limiter has already backed off for this host.
+            SESSIONS.invalidate()
+        return response
 
-            soup = BeautifulSoup(response.text, "html.parser")
-            results = soup.select(".search-results .result, .organic .result, [data-ypresult]")
-            
-            if not results:
+    pager = PagePrefetcher(fetch_page)
+    try:
+        while count < limit and page <= min(max_pages, end_page) and not is_stopped(stop_event):
+            if deadline is not None and not deadline.allows_page():
                 break
+            url = page_url(page)
+            started = time.monotonic()
 
-            for row in results:
-                if len(leads) >= limit:
+            try:
+                response = pager.take(page)
+                if response is None:
                     break
-                    
-                name_elem = row.select_one("a.business-name")
-                if not name_elem:
-                    continue
-                    
-                name = name_elem.get_text(strip=True)
-                phone_elem = row.select_one(".phones.phone.primary, .phone")
-                phone = phone_elem.get_text(strip=True) if phone_elem else None
-                
-                # Internal deduplication
-                lead_key = f"{name.lower()}|{phone or ''}"
-                if lead_key in seen_leads:
-                    continue
-                seen_leads.add(lead_key)
-
-                listing_path = name_elem.get("href")
-                website_elem = row.select_one("a.track-visit-website, a.website-link")
-                website_path = website_elem.get("href") if website_elem else None
-                
-                street_elem = row.select_one(".street-address, .adr .street-address")
-                street = street_elem.get_text(strip=True) if street_elem else None
-                
-                locality_elem = row.select_one(".locality")
-                locality = locality_elem.get_text(strip=True) if locality_elem else ""
-                loc_data = parse_locality(locality)
-                
-                category_elem = row.select_one(".categories")
-                category = category_elem.get_text(strip=True) if category_elem else None
-
-                lead = {
-                    "name": name,
-                    "phone": phone,
-                    "website": f"https://www.yellowpages.com{website_path}" if website_path and website_path.startswith("/") else website_path,
-                    "street": street,
-                    "city": loc_data.get("city"),
-                    "region": loc_data.get("region"),
-                    "postalCode": loc_data.get("postalCode"),
-                    "address": f"{street}, {locality}" if street and locality else (street or locality or None),
-                    "category": category,
-                    "sourceUrl": f"https://www.yellowpages.com{listing_path}" if listing_path and listing_path.startswith("/") else listing_path or url,
-                    "keyword": keyword,
-                    "location": location,
-                    "source": "yellow_pages"
-                }
-                leads.append(lead)
-
-            page += 1
-
-        except Exception as e:
-            if page == 1:
-                return {"error": str(e), "leads": []}
-            break
+
+                if response.status_code != 200:
+                    if page == start_page:
+                        return {
+                            "error": f"Failed to fetch Yellow Pages. Status: {response.status_code}",
+                            "metrics": metrics.as_dict(),
+                        }
+                    break
+
+                if page == start_page:
+                    max_pages = last_page(response.text, max_pages)
+                    showing = result_range(response.text)
+                    if showing:
+                        per_page = showing[1] - showing[0] + 1
+                ahead = pages_ahead(limit - count, per_page, DEFAULT_PREFETCH)
+                pager.fill(range(page + 1, min(max_pages, end_page, page + ahead) + 1))
+
+                with metrics.phase("parse"):
+                    page_leads = parse_results_page(response.text, keyword, location, url)
+                if page_leads is None:
+                    break
+
+                emitted = []
+                for lead in page_leads:
+                    if count >= limit or cancelled(stop_event):
+                        break
+                    # Internal deduplication
+                    if not claim_lead(seen_leads, lead_key(lead)):
+                        metrics.incr("dedup_hits")
+                        continue
+                    if store is not None and store.known(lead):
+                        metrics.incr("known_leads")
+                        continue
+                    count += 1
+                    emitted.append(lead)
+                    yield lead
+                if on_page is not None:
+                    on_page(page, emitted, max_pages)
+                if deadline is not None:
+                    deadline.record_page(time.monotonic() - started)
+
+                page += 1
+
+            except Exception as e:
+                if page == start_page and not (deadline is not None and deadline.spent()):
+                    return {"error": str(e), "metrics": metrics.as_dict()}
+                break
+    finally:
+        wasted = pager.close()
+        if wasted:
+            metrics.incr("prefetch_wasted", wasted)
 
     return {
-        "leads": leads,
         "status": 200,
-        "count": len(leads),
-        "pages_scraped": page - 1,
+        "count": count,
+        "pages_scraped": page - start_page,
+        **out_of_time(deadline, count < limit and page <= min(max_pages, end_page)),
+        "metrics": metrics.as_dict(),
     }
 
 
-def scrape_yellow_pages(keyword, location, limit=2000):
-    """
-    Si la ubicación es "us_latino" (case-insensitive), recorre un conjunto de
-    ciudades de EE.UU. con alta población latina/español y agrega los leads
-    hasta el límite indicado. Si no, ejecuta la búsqueda tradicional en una sola ciudad.
-    """
-    normalized_location = location.strip().lower()
-    use_latino_locations = normalized_location in {"us_latino", "usa_latino", "all_us_latino", "usa_es"}
+# "Visit website" links that go through a Yellow Pages redirect first.
+TRACKING_HOSTS = {"www.yellowpages.com", "yellowpages.com"}
 
-    if not use_latino_locations:
-        seen = set()
-        primary = scrape_location(keyword, location, limit, seen)
+WEBSITE_CACHE = enrich.DetailCache("yp_websites")
 
-        total_pages = primary.get("pages_scraped", 0)
-        leads = list(primary.get("leads", []))
+# Seconds a job may spend resolving tracking links, counted from its start.
+DEFAULT_RESOLVE_BUDGET = float(os.getenv("YP_RESOLVE_BUDGET", "30"))
 
-        state_abbr = parse_state_abbr(location)
-        fallback_loc = STATE_FALLBACK_CITY.get(state_abbr) if state_abbr else None
 
-        if fallback_loc and fallback_loc.strip().lower() != normalized_location and len(leads) < limit:
-            secondary = scrape_location(keyword, fallback_loc, limit, seen)
-            leads.extend(secondary.get("leads", []))
-            total_pages += secondary.get("pages_scraped", 0)
+def tracking_url(lead: dict) -> str | None:
+    """The lead's website when it is a Yellow Pages tracking link, on ``BASE_URL``."""
+    website = lead.get("website") or ""
+    parts = urlsplit(website)
+    if parts.netloc not in TRACKING_HOSTS:
+        return None
+    return f"{BASE_URL}{parts.path}" + (f"?{parts.query}" if parts.query else "")
 
-        trimmed = leads[:limit]
 
-        return {
-            "leads": trimmed,
-            "status": 200 if trimmed else primary.get("status", 404),
-            "count": len(trimmed),
-            "pages_scraped": total_pages,
-            "locations": [location] + ([fallback_loc] if fallback_loc else []),
-            "mode": "single_with_state_fallback" if fallback_loc else "single",
-        }
+def resolve_website(url: str, metrics=None) -> dict | None:
+    """``{"website": ..., "domain": ...}`` the tracking link ``url`` lands on; None when it cannot be followed."""
+    headers = build_headers(get_pool(impersonate="chrome120").choice())
+    proxy_pool = get_proxy_pool()
+    proxies = proxy_dict(proxy_pool.choose())
+    try:
+        session = SESSIONS.session(headers, proxies=proxies, metrics=metrics)
+    except Exception:
+        return None
+    final_url = fetch.resolve(
+        session,
+        url,
+        headers=headers,
+        impersonate="chrome120",
+        proxies=proxies,
+        timeout=10,
+        metrics=metrics,
+    )
+    domain = urlsplit(final_url or "").netloc.lower()
+    if not domain or domain in TRACKING_HOSTS or final_url.startswith(f"{BASE_URL}/"):
+        return None
+    return {"website": final_url, "domain": domain.removeprefix("www.")}
 
-    all_leads = []
-    seen_leads = set()
-    total_pages = 0
 
-    for loc in LATINO_HEAVY_LOCATIONS:
-        if len(all_leads) >= limit:
-            break
+def apply_website(lead: dict, details: dict) -> dict:
+    return {**lead, "website": details["website"]}
 
-        result = scrape_location(keyword, loc, limit, seen_leads)
 
-        if "leads" in result and isinstance(result["leads"], list):
-            all_leads.extend(result["leads"])
-        total_pages += result.get("pages_scraped", 0)
+def resolve_tracking_links(stream, metrics=None, deadline=None, workers: int = enrich.DEFAULT_WORKERS):
+    """
+    ``stream`` with Yellow Pages tracking links in ``website`` replaced by
+    the address they redirect to (see ``enrich``), in the same order.
+    """
+    return enrich.enrich(
+        stream,
+        partial(resolve_website, metrics=metrics),
+        tracking_url,
+        apply_website,
+        cache=WEBSITE_CACHE,
+        workers=workers,
+        metrics=metrics,
+        name="websites",
+        deadline=deadline,
+    )
+
+
+def scrape_location(keyword, location, limit, seen_leads, stop_event=None, store=None, deadline_s=None):
+    if deadline_s:
+        stop_event = Deadline(deadline_s, parent=stop_event)
+    leads, summary = drain(
+        iter_location(keyword, location, limit, seen_leads, stop_event=stop_event, store=store)
+    )
+    if "error" in summary:
+        return {"leads": [], **summary}
+    return {"leads": leads, **summary}
+
+
+def iter_yellow_pages(
+    keyword,
+    location,
+    limit=2000,
+    max_cities=DEFAULT_MAX_CITIES,
+    max_per_host=None,
+    store=None,
+    journal=None,
+    seen_leads=None,
+    resolve_websites=False,
+    resolve_budget=DEFAULT_RESOLVE_BUDGET,
+    deadline_s=None,
+    yield_stats=None,
+):
+    """
+    Si la ubicación es "us_latino" (case-insensitive), recorre un conjunto de
+    ciudades de EE.UU. con alta población latina/español y agrega los leads
+    hasta el límite indicado. Si no, ejecuta la búsqueda tradicional en una sola ciudad.
 
-    trimmed = all_leads[:limit]
+    En modo us_latino se scrapean hasta ``max_cities`` ciudades a la vez
+    (``max_per_host`` limita las peticiones simultáneas por dominio).
 
-    return {
-        "leads": trimmed,
-        "status": 200 if trimmed else 404,
-        "count": len(trimmed),
-        "pages_scraped": total_pages,
-        "locations": LATINO_HEAVY_LOCATIONS,
-        "mode": "us_latino",
-    }
+    Con ``store`` se omiten los leads ya devueltos en ejecuciones
+    anteriores (no cuentan para el límite) y se registran los nuevos. Con
+    ``journal`` (``checkpoint.Journal``) cada página queda registrada y un
+    trabajo reanudado no repite las páginas ya hechas. ``seen_leads`` permite
+    compartir la deduplicación entre varias búsquedas (ver ``batch``).
+
+    Con ``resolve_websites`` los enlaces de seguimiento de Yellow Pages en
+    ``website`` se sustituyen por la dirección a la que redirigen (en
+    paralelo, sin descargar las páginas y con caché en disco); el trabajo no
+    dedica a ello más de ``resolve_budget`` segundos desde su inicio.
+
+    Con ``deadline_s`` el trabajo entero termina a los ``deadline_s``
+    segundos: devuelve los leads obtenidos hasta entonces con
+    ``"partial": true`` y no empieza páginas ni ciudades que ya no caben.
+
+    Con ``yield_stats`` (``city_yield.YieldStats``) el modo us_latino ordena
+    las ciudades según los leads nuevos que dieron antes, omite las que no
+    rinden y abandona una ciudad en cuanto una de sus páginas apenas aporta
+    leads nuevos.
+
+    Genera los leads a medida que se parsean y devuelve el resumen final.
+    """
+    deadline = Deadline.start(deadline_s)
+    stage = None
+    if resolve_websites:
+        resolve_by = time.monotonic() + resolve_budget
+        if deadline is not None:
+            resolve_by = min(resolve_by, deadline.at)
+        stage = partial(resolve_tracking_links, deadline=resolve_by)
+    return (
+        yield from iter_source(
+            sys.modules[__name__],
+            "yellow_pages",
+            keyword,
+            location,
+            limit,
+            max_cities,
+            max_per_host,
+            store,
+            journal,
+            seen_leads,
+            stage=stage,
+            deadline=deadline,
+            yield_stats=yield_stats,
+        )
+    )
+
+
+def scrape_yellow_pages(
+    keyword,
+    location,
+    limit=2000,
+    max_cities=DEFAULT_MAX_CITIES,
+    max_per_host=None,
+    store=None,
+    journal=None,
+    resolve_websites=False,
+    resolve_budget=DEFAULT_RESOLVE_BUDGET,
+    deadline_s=None,
+    yield_stats=None,
+):
+    leads, summary = drain(
+        iter_yellow_pages(
+            keyword,
+            location,
+            limit,
+            max_cities,
+            max_per_host,
+            store,
+            journal,
+            resolve_websites=resolve_websites,
+            resolve_budget=resolve_budget,
+            deadline_s=deadline_s,
+            yield_stats=yield_stats,
+        )
+    )
+    return {"leads": leads, **summary}
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
-    parser.add_argument("keyword")
-    parser.add_argument("location")
+    parser.add_argument("keyword", nargs="?")
+    parser.add_argument("location", nargs="?")
     parser.add_argument("--limit", type=int, default=25)
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_MAX_CITIES)
+    parser.add_argument("--per-host", type=int, default=None)
+    parser.add_argument("--serve", action="store_true")
+    parser.add_argument("--jobs", type=int, default=4)
+    parser.add_argument("--batch", metavar="MATRIX", default=None)
+    parser.add_argument("--stream", action="store_true")
+    parser.add_argument("--resolve-websites", action="store_true")
+    parser.add_argument("--resolve-budget", type=float, default=DEFAULT_RESOLVE_BUDGET)
+    parser.add_argument("--deadline", type=float, default=None, help="Seconds the whole job may take")
+    parser.add_argument("--metrics-file", default=os.getenv("SCRAPER_METRICS_FILE"))
+    http_cache.add_arguments(parser)
+    lead_store.add_arguments(parser)
+    checkpoint.add_arguments(parser)
+    lead_table.add_arguments(parser)
+    city_yield.add_arguments(parser)
     args = parser.parse_args()
+    lead_table.check_args(parser, args)
+    http_cache.configure_from_args(args)
+    store = lead_store.store_from_args(args)
+
+    if args.serve:
+        from worker import serve
 
-    result = scrape_yellow_pages(args.keyword, args.location, args.limit)
+        serve(max_jobs=args.jobs, metrics_file=args.metrics_file)
+        sys.exit(0)
+    if args.batch:
+        from batch import read_matrix, run_batch
+
+        try:
+            matrix = read_matrix(args.batch, "yellow_pages")
+        except (OSError, ValueError) as exc:
+            parser.error(str(exc))
+        run_batch(matrix, sys.stdout, max_jobs=args.jobs, store=store)
+        sys.exit(0)
+    if not args.resume and (not args.keyword or not args.location):
+        parser.error("keyword and location are required unless --serve or --resume is given")
+    try:
+        journal = checkpoint.journal_from_args(args, "yellow_pages")
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    labels = {"source": "yellow_pages", "keyword": args.keyword, "location": args.location}
+    if args.stream or args.format != "json":
+        stream = iter_yellow_pages(
+            args.keyword,
+            args.location,
+            args.limit,
+            max_cities=args.concurrency,
+            max_per_host=args.per_host,
+            store=store,
+            journal=journal,
+            resolve_websites=args.resolve_websites,
+            resolve_budget=args.resolve_budget,
+            deadline_s=args.deadline,
+            yield_stats=city_yield.stats_from_args(args),
+        )
+        if args.stream:
+            summary = write_ndjson(stream, sys.stdout)
+        else:
+            summary = lead_table.export(stream, args.format, args.output)
+            print(json.dumps(summary), file=sys.stderr)
+        if args.metrics_file:
+            export_metrics(args.metrics_file, summary, labels)
+        sys.exit(0)
+
+    result = scrape_yellow_pages(
+        args.keyword,
+        args.location,
+        args.limit,
+        max_cities=args.concurrency,
+        max_per_host=args.per_host,
+        store=store,
+        journal=journal,
+        resolve_websites=args.resolve_websites,
+        resolve_budget=args.resolve_budget,
+        deadline_s=args.deadline,
+        yield_stats=city_yield.stats_from_args(args),
+    )
+    if args.metrics_file:
+        export_metrics(args.metrics_file, result, labels)
     print(json.dumps(result))
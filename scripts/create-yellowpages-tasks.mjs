@@ -1,8 +1,10 @@
 import fs from "node:fs";
 import path from "node:path";
-import { spawn } from "node:child_process";
 import { randomUUID } from "node:crypto";
 import { createClient } from "@supabase/supabase-js";
+import pythonWorker from "../lib/scrapers/python-worker.cjs";
+
+const { runScrapeJob, rememberLeads, closeWorkers } = pythonWorker;
 
 function loadEnvLocal() {
   const envPath = path.join(process.cwd(), ".env.local");
@@ -26,53 +28,12 @@ function hasPhone(phone) {
   return digits.length >= 7;
 }
 
-function runYellowPagesScraper({ keyword, location, limit }) {
-  const pythonPath = "C:\\Python313\\python.exe";
-  const scriptPath = path.join(
-    process.cwd(),
-    "lib",
-    "scrapers",
-    "yellow_pages_scraper.py",
-  );
-
-  return new Promise((resolve, reject) => {
-    const pyProcess = spawn(pythonPath, [
-      scriptPath,
-      keyword,
-      location,
-      "--limit",
-      limit.toString(),
-    ]);
-
-    let output = "";
-    let errorOutput = "";
-
-    pyProcess.stdout.on("data", (data) => {
-      output += data.toString();
-    });
-
-    pyProcess.stderr.on("data", (data) => {
-      errorOutput += data.toString();
-    });
-
-    pyProcess.on("close", (code) => {
-      if (code !== 0) {
-        reject(new Error(`Python scraper failed: ${errorOutput.trim()}`));
-        return;
-      }
-
-      try {
-        const result = JSON.parse(output);
-        if (result.error) {
-          reject(new Error(result.error));
-          return;
-        }
-        resolve(result);
-      } catch (err) {
-        reject(new Error(`Failed to parse Python output: ${output}`));
-      }
-    });
-  });
+async function runYellowPagesScraper({ keyword, location, limit }) {
+  const result = await runScrapeJob({ source: "yellow_pages", keyword, location, limit, skip_known: true });
+  if (result.error) {
+    throw new Error(result.error);
+  }
+  return result;
 }
 
 async function main() {
@@ -315,6 +276,7 @@ async function main() {
             raw_location: location,
           }));
 
+        let stored = true;
         if (leads.length > 0) {
           const upsertResult = await supabase
             .from("leads")
@@ -331,13 +293,20 @@ async function main() {
               const insertResult = await supabase.from("leads").insert(leads);
               if (insertResult.error) {
                 leadsError = insertResult.error.message;
+                stored = false;
               }
             } else {
               leadsError = message;
+              stored = false;
             }
           }
         }
 
+        // Leads that failed to upload stay unknown, so the next run returns them again.
+        if (stored) {
+          await rememberLeads("yellow_pages", result.leads || []);
+        }
+
         for (const lead of leads) {
           uniqueLeads.add(`${lead.name}|${lead.phone || ""}`);
         }
@@ -382,7 +351,9 @@ async function main() {
   }
 }
 
-main().catch((err) => {
-  console.error(err instanceof Error ? err.message : err);
-  process.exit(1);
-});
+main()
+  .catch((err) => {
+    console.error(err instanceof Error ? err.message : err);
+    process.exit(1);
+  })
+  .finally(closeWorkers);
@@ -1,7 +1,9 @@
 import fs from "node:fs";
 import path from "node:path";
-import { spawn } from "node:child_process";
 import { createClient } from "@supabase/supabase-js";
+import pythonWorker from "../lib/scrapers/python-worker.cjs";
+
+const { runScrapeJob, rememberLeads, closeWorkers } = pythonWorker;
 
 function loadEnvLocal() {
   const envPath = path.join(process.cwd(), ".env.local");
@@ -29,53 +31,12 @@ function hasPhone(phone) {
   return digits.length >= 7;
 }
 
-function runYellowPagesScraper({ keyword, location, limit }) {
-  const pythonPath = "C:\\Python313\\python.exe";
-  const scriptPath = path.join(
-    process.cwd(),
-    "lib",
-    "scrapers",
-    "yellow_pages_scraper.py",
-  );
-
-  return new Promise((resolve, reject) => {
-    const pyProcess = spawn(pythonPath, [
-      scriptPath,
-      keyword,
-      location,
-      "--limit",
-      limit.toString(),
-    ]);
-
-    let output = "";
-    let errorOutput = "";
-
-    pyProcess.stdout.on("data", (data) => {
-      output += data.toString();
-    });
-
-    pyProcess.stderr.on("data", (data) => {
-      errorOutput += data.toString();
-    });
-
-    pyProcess.on("close", (code) => {
-      if (code !== 0) {
-        reject(new Error(`Python scraper failed: ${errorOutput.trim()}`));
-        return;
-      }
-
-      try {
-        const result = JSON.parse(output);
-        if (result.error) {
-          reject(new Error(result.error));
-          return;
-        }
-        resolve(result);
-      } catch (err) {
-        reject(new Error(`Failed to parse Python output: ${output}`));
-      }
-    });
-  });
+async function runYellowPagesScraper({ keyword, location, limit }) {
+  const result = await runScrapeJob({ source: "yellow_pages", keyword, location, limit, skip_known: true });
+  if (result.error) {
+    throw new Error(result.error);
+  }
+  return result;
 }
 
 async function main() {
@@ -156,6 +117,9 @@ async function main() {
         }
       }
 
+      // Only now that they are stored may later runs skip them.
+      await rememberLeads("yellow_pages", result.leads || []);
+
       for (const lead of leads) {
         uniqueLeads.add(`${lead.name}|${lead.phone || ""}`);
       }
@@ -186,7 +150,9 @@ async function main() {
   }
 }
 
-main().catch((err) => {
-  console.error(err instanceof Error ? err.message : err);
-  process.exit(1);
-});
+main()
+  .catch((err) => {
+    console.error(err instanceof Error ? err.message : err);
+    process.exit(1);
+  })
+  .finally(closeWorkers);
@@ -1,8 +1,10 @@
 import fs from "node:fs";
 import path from "node:path";
-import { spawn } from "node:child_process";
 import { randomUUID } from "node:crypto";
 import { createClient } from "@supabase/supabase-js";
+import pythonWorker from "../lib/scrapers/python-worker.cjs";
+
+const { runScrapeJob, closeWorkers } = pythonWorker;
 
 function loadEnvLocal() {
     const envPath = path.join(process.cwd(), ".env.local");
@@ -20,58 +22,12 @@ function loadEnvLocal() {
     }
 }
 
-function runAngiScraper({ keyword, location, limit }) {
-    const pythonPath = "C:\\Python313\\python.exe";
-    const scriptPath = path.join(
-        process.cwd(),
-        "lib",
-        "scrapers",
-        "angi_scraper.py",
-    );
-
-    console.log(`Running Python script: ${pythonPath} ${scriptPath} "${keyword}" "${location}" --limit ${limit}`);
-
-    return new Promise((resolve, reject) => {
-        const pyProcess = spawn(pythonPath, [
-            scriptPath,
-            keyword,
-            location,
-            "--limit",
-            limit.toString(),
-        ]);
-
-        let output = "";
-        let errorOutput = "";
-
-        pyProcess.stdout.on("data", (data) => {
-            output += data.toString();
-        });
-
-        pyProcess.stderr.on("data", (data) => {
-            errorOutput += data.toString();
-            // Optional: Log stderr for debugging if needed
-            // console.error(`[Python stderr]: ${data.toString()}`);
-        });
-
-        pyProcess.on("close", (code) => {
-            if (code !== 0) {
-                reject(new Error(`Python scraper failed (code ${code}): ${errorOutput.trim()}`));
-                return;
-            }
-
-            try {
-                const result = JSON.parse(output);
-                if (result.error) {
-                    reject(new Error(result.error));
-                    return;
-                }
-                resolve(result);
-            } catch (err) {
-                console.error("Failed output:", output);
-                reject(new Error(`Failed to parse Python output. See console for raw output.`));
-            }
-        });
-    });
+async function runAngiScraper({ keyword, location, limit }) {
+    const result = await runScrapeJob({ source: "angi", keyword, location, limit });
+    if (result.error) {
+        throw new Error(result.error);
+    }
+    return result;
 }
 
 async function main() {
@@ -193,7 +149,9 @@ async function main() {
     }
 }
 
-main().catch((err) => {
-    console.error(err);
-    process.exit(1);
-});
+main()
+    .catch((err) => {
+        console.error(err);
+        process.exit(1);
+    })
+    .finally(closeWorkers);
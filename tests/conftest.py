@@ -0,0 +1,121 @@
+import os
+import sys
+import threading
+import time
+from argparse import Namespace
+from collections import namedtuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import pytest
+
+# The scrapers are standalone scripts that import their sibling modules by name.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "lib", "scrapers"))
+# The fake sites answer with the benchmark stand-in server's pages.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+
+import angi_scraper  # noqa: E402
+import fetch  # noqa: E402
+import stand_in_server  # noqa: E402
+import storage  # noqa: E402
+import yellow_pages_scraper  # noqa: E402
+from ratelimit import RateLimiter  # noqa: E402
+
+
+class VirtualClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture(autouse=True)
+def virtual_rate_limiter(monkeypatch):
+    """Rate-limiter waits advance a virtual clock instead of sleeping."""
+    clock = VirtualClock()
+    limiter = RateLimiter(clock=clock, sleep=clock.sleep)
+    # Angi also reads the limiter's block rate to decide when to hedge.
+    for module in (fetch, angi_scraper):
+        monkeypatch.setattr(module, "LIMITER", limiter)
+    return limiter
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, text: str):
+        self.status_code = status_code
+        self.text = text
+        self.content = text.encode("utf-8")
+
+
+Request = namedtuple("Request", "url location page kwargs")
+
+
+class FakeSite:
+    """
+    Stands in for a scraper's session: Yellow Pages searches, Angi listings
+    and Angi profiles get ``stand_in_server``'s pages, with ``pages`` result
+    pages per city, after ``delay`` seconds. ``aliases`` lists one city's
+    businesses under another's name and ``render(request)``, when given,
+    replaces the page. Every request is recorded in ``requests``.
+    """
+
+    def __init__(self, pages: int = 4, delay: float = 0.0, aliases: dict | None = None, render=None):
+        self.config = Namespace(pages=pages, yp_per_page=30, angi_per_page=10)
+        self.delay = delay
+        self.aliases = aliases or {}
+        self.render = render
+        self.cookies = {}
+        self.requests = []
+        self._lock = threading.Lock()
+
+    @property
+    def pages(self) -> list[int]:
+        return [request.page for request in self.requests]
+
+    def get(self, url, **kwargs):
+        query = parse_qs(urlsplit(url).query)
+        location = query.get("geo_location_terms", [None])[0]
+        request = Request(url, location, int(query.get("page", ["1"])[0]), kwargs)
+        with self._lock:
+            self.requests.append(request)
+        if self.delay:
+            time.sleep(self.delay)
+        text = self.render(request) if self.render is not None else self.page(request)
+        return FakeResponse(200, text)
+
+    def page(self, request: Request) -> str:
+        path = unquote(urlsplit(request.url).path)
+        if path == "/search":
+            location = self.aliases.get(request.location, request.location)
+            return stand_in_server.yp_page("plumber", location, request.page, self.config)
+        profile = stand_in_server.ANGI_PROFILE_PATH.match(path)
+        if profile:
+            return stand_in_server.angi_profile_page(
+                profile["state"], profile["city"], profile["slug"], int(profile["number"])
+            )
+        listing = stand_in_server.ANGI_PATH.match(path)
+        assert listing, f"unexpected request: {request.url}"
+        return stand_in_server.angi_page(listing["state"], listing["city"], listing["category"], request.page, self.config)
+
+
+@pytest.fixture
+def use_site(monkeypatch, tmp_path):
+    """
+    ``use_site(site, *scrapers)`` sends the scrapers' requests (both by
+    default) to ``site``, with the cache directory under ``tmp_path`` and,
+    unless ``fallbacks`` is true, no state fallback city; returns ``site``.
+    """
+    monkeypatch.setattr(storage, "CACHE_DIR", str(tmp_path))
+
+    def use(site, *scrapers, fallbacks=False):
+        for scraper in scrapers or (yellow_pages_scraper, angi_scraper):
+            monkeypatch.setattr(scraper.SESSIONS, "session", lambda headers, **kwargs: site)
+            monkeypatch.setattr(scraper.SESSIONS, "invalidate", lambda: None)
+            if not fallbacks:
+                monkeypatch.setattr(scraper, "STATE_FALLBACK_CITY", {})
+        return site
+
+    return use
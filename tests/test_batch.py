@@ -0,0 +1,94 @@
+import io
+import json
+
+import pytest
+
+from batch import read_matrix, run_batch, schedule
+from fanout import claim_lead
+
+
+def fake_scraper(names):
+    """A scraper whose every search finds ``names``, deduplicated through ``seen_leads``."""
+
+    def iter_fn(keyword, location, limit, seen_leads=None):
+        seen = seen_leads if seen_leads is not None else set()
+        count = 0
+        for name in names:
+            if count >= limit:
+                break
+            if claim_lead(seen, name):
+                count += 1
+                yield {"name": name, "keyword": keyword, "location": location}
+        return {"status": 200, "count": count}
+
+    return iter_fn
+
+
+def records(out):
+    return [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+def test_read_matrix_accepts_json_and_csv(tmp_path):
+    json_path = tmp_path / "jobs.json"
+    json_path.write_text(json.dumps({"jobs": [
+        {"keyword": "plumber", "location": "Houston, TX", "limit": 100},
+        {"id": "roof", "keyword": "roofer", "location": "Miami, FL", "source": "angi"},
+    ]}))
+    csv_path = tmp_path / "jobs.csv"
+    csv_path.write_text("keyword,location,limit\nplumber,\"Houston, TX\",100\nroofer,\"Miami, FL\",\n")
+
+    jobs = read_matrix(str(json_path))
+    assert jobs == [
+        {"id": "job-1", "source": "yellow_pages", "keyword": "plumber", "location": "Houston, TX", "limit": 100},
+        {"id": "roof", "source": "angi", "keyword": "roofer", "location": "Miami, FL", "limit": 25},
+    ]
+    assert [(job["keyword"], job["location"], job["limit"]) for job in read_matrix(str(csv_path), "angi")] == [
+        ("plumber", "Houston, TX", 100),
+        ("roofer", "Miami, FL", 25),
+    ]
+
+    csv_path.write_text("keyword,location\nplumber,\n")
+    with pytest.raises(ValueError):
+        read_matrix(str(csv_path))
+
+
+def test_schedule_alternates_sources():
+    jobs = [{"id": str(n), "source": source} for n, source in enumerate(["yp", "yp", "yp", "angi", "angi"])]
+    assert [job["id"] for job in schedule(jobs)] == ["0", "3", "1", "4", "2"]
+
+
+def test_batch_streams_tagged_leads_with_shared_dedup():
+    jobs = [
+        {"id": "a", "source": "fake", "keyword": "plumber", "location": "Houston, TX", "limit": 10},
+        {"id": "b", "source": "fake", "keyword": "plomero", "location": "Houston, TX", "limit": 10},
+        {"id": "c", "source": "missing", "keyword": "x", "location": "y", "limit": 1},
+    ]
+    with pytest.raises(ValueError):
+        run_batch(jobs, io.StringIO(), scrapers={"fake": fake_scraper(["A", "B", "C"])})
+
+    out = io.StringIO()
+    result = run_batch(jobs[:2], out, max_jobs=1, scrapers={"fake": fake_scraper(["A", "B", "C"])})
+    lines = records(out)
+    assert [(line["job"], line["lead"]["name"]) for line in lines if line["type"] == "lead"] == [
+        ("a", "A"), ("a", "B"), ("a", "C"),
+    ]
+    assert {line["job"]: line["count"] for line in lines if line["type"] == "summary"} == {"a": 3, "b": 0}
+    assert lines[-1] == result == {"type": "batch", "jobs": 2, "count": 3}
+
+    out = io.StringIO()
+    run_batch(jobs[:2], out, scrapers={"fake": fake_scraper(["A", "B", "C"])}, shared_dedup=False)
+    assert sum(line["type"] == "lead" for line in records(out)) == 6
+
+
+def test_batch_reports_failed_jobs_and_keeps_going():
+    def broken(keyword, location, limit, seen_leads=None):
+        raise RuntimeError("blocked")
+        yield
+
+    jobs = [
+        {"id": "bad", "source": "broken", "keyword": "k", "location": "l", "limit": 5},
+        {"id": "good", "source": "fake", "keyword": "k", "location": "l", "limit": 5},
+    ]
+    out = io.StringIO()
+    result = run_batch(jobs, out, scrapers={"broken": broken, "fake": fake_scraper(["A"])})
+    assert result["errors"] == {"bad": "blocked"} and result["count"] == 1
@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+import yellow_pages_scraper
+from checkpoint import Journal
+from conftest import FakeSite
+from streaming import drain
+
+
+PARAMS = {"source": "yellow_pages", "keyword": "plumber", "location": "Houston, TX", "limit": 100}
+
+
+def run(journal, limit=100):
+    return yellow_pages_scraper.iter_yellow_pages("plumber", "Houston, TX", limit, journal=journal)
+
+
+def test_resume_continues_after_the_last_journaled_page(use_site):
+    use_site(FakeSite(pages=5))
+    expected, _ = drain(run(None))
+
+    journal = Journal.create(PARAMS, "crashed")
+    stream = run(journal)
+    partial = [next(stream) for _ in range(45)]
+    stream.close()  # killed half way through page 2
+    assert partial == expected[:45]
+
+    site = use_site(FakeSite(pages=5))
+    leads, summary = drain(run(Journal.load("crashed")))
+    assert leads == expected
+    assert summary["count"] == 100 and summary["job_id"] == "crashed"
+    assert sorted(site.pages)[0] == 2  # page 1 is replayed from the journal
+
+
+def test_finished_locations_are_not_requested_again(use_site):
+    use_site(FakeSite(pages=2))
+    first, summary = drain(run(Journal.create(PARAMS, "done")))
+    assert summary["count"] == 60
+
+    site = use_site(FakeSite(pages=2))
+    again, summary = drain(run(Journal.load("done")))
+    assert again == first and summary["count"] == 60 and summary["pages_scraped"] == 2
+    assert site.pages == []
+
+
+def test_torn_last_line_is_ignored(use_site):
+    use_site(FakeSite(pages=5))
+    journal = Journal.create(PARAMS, "torn")
+    stream = run(journal)
+    [next(stream) for _ in range(35)]
+    stream.close()
+    with open(journal.path, "a", encoding="utf-8") as handle:
+        handle.write(json.dumps({"type": "page", "location": "Houston, TX", "page": 2})[:20])
+
+    loaded = Journal.load("torn")
+    assert loaded.params == PARAMS
+    with pytest.raises(ValueError):
+        Journal.create(PARAMS, "torn")
@@ -0,0 +1,127 @@
+import time
+from functools import partial
+
+import pytest
+
+import yellow_pages_scraper
+from city_yield import CitySchedule, YieldStats
+from conftest import FakeSite
+from fanout import iter_fan_out
+from streaming import drain
+
+
+@pytest.fixture
+def stats(tmp_path):
+    return YieldStats(str(tmp_path / "city_yield.json"))
+
+
+def seed(stats, city, pages, new, keyword="plumber", source="yellow_pages", per_page=30):
+    for _ in range(pages):
+        stats.record(source, keyword, city, new, per_page)
+
+
+def test_stats_add_up_across_saves_and_expire(stats):
+    seed(stats, "Queens, NY", 2, 3)
+    stats.save()
+    seed(stats, "Queens, NY", 1, 0)
+    stats.save()
+
+    reloaded = YieldStats(stats.path)
+    assert reloaded.get("yellow_pages", "Plumber ", "Queens, NY") == {"pages": 3, "new": 6, "rows": 90}
+    assert reloaded.get("angi", "plumber", "Queens, NY") is None
+    assert YieldStats(stats.path, ttl=-1).get("yellow_pages", "plumber", "Queens, NY") is None
+
+
+def test_order_puts_best_cities_first_and_prunes_proven_duds(stats):
+    seed(stats, "Miami, FL", 2, 27)
+    seed(stats, "New York, NY", 2, 12)
+    seed(stats, "Queens, NY", 2, 0)
+    seed(stats, "Hialeah, FL", 1, 0)  # one page is not enough to prune on
+    schedule = CitySchedule(stats, "yellow_pages", "plumber", 30)
+
+    locations = ["New York, NY", "Queens, NY", "Houston, TX", "Miami, FL", "Hialeah, FL"]
+    # Houston has no history and ranks as an average city: 0.325, behind New York's 0.4.
+    assert schedule.order(locations) == ["Miami, FL", "New York, NY", "Houston, TX", "Hialeah, FL"]
+    assert schedule.pruned == ["Queens, NY"]
+
+    assert schedule.order(["Queens, NY"]) == ["Queens, NY"]  # never prunes everything
+
+
+def fake_location(pages, names=None, delay=0.0):
+    """An ``iter_location`` whose page ``n`` yields ``pages[n - 1]`` leads, named after ``names`` or the city."""
+
+    def iter_location(keyword, location, limit, seen_leads, stop_event=None, on_page=None, **kwargs):
+        done = 0
+        for number, new in enumerate(pages, 1):
+            time.sleep(delay)
+            if stop_event is not None and stop_event.is_set():
+                break
+            leads = [{"name": f"{names or location} {number}-{n}"} for n in range(new)]
+            yield from leads
+            on_page(number, leads, len(pages))
+            done += 1
+        return {"status": 200, "pages_scraped": done, "kwargs": kwargs}
+
+    return iter_location
+
+
+def fan_out(schedule, iter_city, locations, **kwargs):
+    return drain(iter_fan_out(iter_city, "plumber", locations, 500, set(), on_commit=schedule.committed, **kwargs))
+
+
+def test_city_is_dropped_mid_pagination_once_its_yield_falls(stats):
+    schedule = CitySchedule(stats, "yellow_pages", "plumber", 30)
+    seen_pages = []
+    summaries = {}
+    iter_city = partial(
+        schedule.wrap(fake_location([30, 12, 1, 30, 30])),
+        on_page=lambda page, leads, last: seen_pages.append(page),
+        end_page=9,
+    )
+
+    leads, (count, pages) = fan_out(schedule, iter_city, ["Queens, NY"], on_summary=summaries.__setitem__)
+    assert len(leads) == count == 43 and pages == 3
+    assert summaries["Queens, NY"]["kwargs"] == {"end_page": 9}
+    assert seen_pages == [1, 2, 3]
+    assert schedule.report() == {"dropped_locations": ["Queens, NY"]}
+    assert stats.get("yellow_pages", "plumber", "Queens, NY") == {"pages": 3, "new": 43, "rows": 90}
+
+    # A thin last page is just the end of the results.
+    fan_out(schedule, schedule.wrap(fake_location([30, 2])), ["Miami, FL"])
+    assert schedule.dropped == ["Queens, NY"]
+
+
+def test_yield_counts_only_leads_no_earlier_city_returned(stats):
+    schedule = CitySchedule(stats, "yellow_pages", "plumber", 30)
+    cities = {
+        "New York, NY": fake_location([30, 30], delay=0.05),
+        # Queens lists the same businesses and, running alongside, gets them out first.
+        "Queens, NY": fake_location([30, 30], names="New York, NY"),
+    }
+
+    def iter_location(keyword, location, *args, **kwargs):
+        return cities[location](keyword, location, *args, **kwargs)
+
+    iter_city = schedule.wrap(iter_location)
+
+    leads, _ = fan_out(schedule, iter_city, list(cities), max_cities=2, lead_key=lambda lead: lead["name"])
+    assert len(leads) == 60
+    assert stats.get("yellow_pages", "plumber", "New York, NY")["new"] == 60
+    assert stats.get("yellow_pages", "plumber", "Queens, NY")["new"] == 0
+    assert schedule.dropped == ["Queens, NY"]
+
+
+def test_us_latino_follows_the_recorded_yield(stats, use_site, monkeypatch):
+    site = use_site(FakeSite(pages=2, delay=0.01), yellow_pages_scraper)
+    monkeypatch.setattr(yellow_pages_scraper, "LATINO_HEAVY_LOCATIONS", ["New York, NY", "Queens, NY", "Miami, FL"])
+    seed(stats, "Queens, NY", 2, 0)
+    seed(stats, "Miami, FL", 2, 30)
+    seed(stats, "New York, NY", 2, 20)
+
+    leads, summary = drain(
+        yellow_pages_scraper.iter_yellow_pages("plumber", "us_latino", 1000, max_cities=1, yield_stats=stats)
+    )
+    cities = [request.location for request in site.requests if request.page == 1]
+    assert cities == summary["locations"] == ["Miami, FL", "New York, NY"]
+    assert summary["pruned_locations"] == ["Queens, NY"] and len(leads) == 120
+    assert YieldStats(stats.path).get("yellow_pages", "plumber", "Miami, FL")["pages"] == 4
@@ -0,0 +1,90 @@
+import time
+
+import pytest
+
+import yellow_pages_scraper
+from checkpoint import Journal
+from conftest import FakeSite, VirtualClock
+from deadline import Deadline, cancelled
+from ratelimit import TokenBucket
+from streaming import drain
+
+
+@pytest.fixture
+def slow_site(use_site, monkeypatch, virtual_rate_limiter):
+    virtual_rate_limiter.configure(yellow_pages_scraper.BASE_URL, rate=100, max_rate=100)
+    # The fallback city lists Houston's businesses again, so it adds requests but no leads.
+    site = use_site(FakeSite(pages=20, delay=0.1, aliases={"San Antonio, TX": "Houston, TX"}), yellow_pages_scraper)
+    monkeypatch.setattr(yellow_pages_scraper, "STATE_FALLBACK_CITY", {"TX": "San Antonio, TX"})
+    monkeypatch.setattr(yellow_pages_scraper, "DEFAULT_PREFETCH", 0)
+    return site
+
+
+def test_budget_follows_page_pace_and_parent():
+    clock = VirtualClock()
+    parent = Deadline(10, clock=clock)
+    child = Deadline(parent=parent, clock=clock)
+    assert child.at == parent.at and child.allows_page()
+
+    child.record_page(4)
+    clock.now = 7
+    assert not parent.allows_page() and parent.spent() and not parent.expired()
+
+    child.set()
+    assert cancelled(child) and not cancelled(parent)
+    clock.now = 10
+    assert parent.is_set() and not cancelled(parent)
+    assert Deadline.start(None) is None
+
+
+def test_rate_limiter_refuses_to_wait_past_the_budget():
+    clock = VirtualClock()
+    bucket = TokenBucket(rate=0.5, clock=clock, sleep=clock.sleep)
+    bucket.acquire()
+    with pytest.raises(TimeoutError):
+        bucket.acquire(max_wait=1)
+    assert clock.now == 0
+    assert bucket.acquire(max_wait=2) == 2
+
+
+def test_deadline_returns_partial_results_in_time(slow_site):
+    started = time.monotonic()
+    result = yellow_pages_scraper.scrape_yellow_pages("plumber", "Houston, TX", 1000, deadline_s=0.35)
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 0.5
+    assert result["partial"] is True and result["skipped_locations"] == ["San Antonio, TX"]
+    assert 0 < result["count"] == len(result["leads"]) < 1000
+    assert all(request.kwargs["timeout"] <= 0.5 for request in slow_site.requests)  # capped from 30 s
+
+
+def test_without_a_deadline_nothing_is_partial(slow_site):
+    slow_site.config.pages = 2
+    slow_site.delay = 0
+    result = yellow_pages_scraper.scrape_yellow_pages("plumber", "Houston, TX", 1000)
+    assert "partial" not in result and result["locations"] == ["Houston, TX", "San Antonio, TX"]
+
+
+def test_partial_location_resumes_from_its_next_page(slow_site):
+    journal = Journal.create({"source": "yellow_pages"})
+    first, summary = drain(
+        yellow_pages_scraper.iter_yellow_pages("plumber", "Houston, TX", 1000, journal=journal, deadline_s=0.25)
+    )
+    assert summary["partial"] is True
+    done = len(slow_site.requests)
+
+    slow_site.delay = 0
+    slow_site.config.pages = done + 1
+    resumed = Journal.load(journal.job_id)
+    rest, summary = drain(yellow_pages_scraper.iter_yellow_pages("plumber", "Houston, TX", 1000, journal=resumed))
+    assert "partial" not in summary
+    assert slow_site.requests[done].page == done + 1
+    assert rest[: len(first)] == first and len(rest) == len(first) + 30  # replayed, then the last page
+
+
+def test_fan_out_skips_cities_that_no_longer_fit(slow_site, monkeypatch):
+    monkeypatch.setattr(yellow_pages_scraper, "LATINO_HEAVY_LOCATIONS", [f"City {n}, TX" for n in range(8)])
+    result = yellow_pages_scraper.scrape_yellow_pages("plumber", "us_latino", 10_000, max_cities=2, deadline_s=0.35)
+    assert result["partial"] is True
+    cities = {request.location for request in slow_site.requests}
+    assert len(cities) + len(result["skipped_locations"]) == 8
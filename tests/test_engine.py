@@ -0,0 +1,66 @@
+import time
+
+import angi_scraper
+import yellow_pages_scraper
+from conftest import FakeSite
+from engine import search
+from locations import fallback_city, is_latino
+from streaming import drain
+
+
+def slow_source(names, delay, city="Houston"):
+    def iter_fn(keyword, location, limit, **options):
+        for name in names[:limit]:
+            time.sleep(delay)
+            yield {"name": name, "city": city, "options": options}
+        return {"status": 200, "count": min(limit, len(names))}
+
+    return iter_fn
+
+
+def test_sources_run_concurrently_into_one_deduplicated_stream():
+    iters = {
+        "yp": slow_source(["Acme Plumbing", "Best Drains", "Joe's Pipes"], 0.1),
+        "angi": slow_source(["ACME plumbing", "Rapid Rooter", "Joes Pipes"], 0.1),
+    }
+    started = time.monotonic()
+    leads, summary = drain(
+        search("plumber", "Houston, TX", ["yp", "angi"], 10, {"angi": {"extra": 1}}, iters=iters, max_cities=2)
+    )
+    assert time.monotonic() - started < 0.5  # not 0.6 s back to back
+
+    assert len(leads) == summary["count"] == 4 and summary["cross_source_duplicates"] == 2
+    assert {lead["name"] for lead in leads} >= {"Best Drains", "Rapid Rooter"}
+    assert sum("acme" in lead["name"].lower() for lead in leads) == 1
+    angi_leads = [lead for lead in leads if lead["name"] == "Rapid Rooter"]
+    assert angi_leads[0]["options"] == {"max_cities": 2, "extra": 1}
+    assert summary["sources"]["yp"]["count"] == 3
+
+
+def test_a_failing_source_does_not_stop_the_others():
+    def broken(keyword, location, limit, **options):
+        raise RuntimeError("blocked")
+        yield
+
+    leads, summary = drain(search("plumber", "Houston, TX", ["bad", "good"], 5, iters={
+        "bad": broken,
+        "good": slow_source(["Acme"], 0),
+    }))
+    assert [lead["name"] for lead in leads] == ["Acme"]
+    assert summary["errors"] == {"bad": "blocked"} and summary["status"] == 200
+
+
+def test_search_runs_both_real_adapters(use_site):
+    use_site(FakeSite(pages=2, delay=0.01))
+
+    leads, summary = drain(search("plumber", "Houston, TX", ["yellow_pages", "angi"], 15))
+    assert summary["count"] == 30
+    assert {lead["source"] for lead in leads} == {"yellow_pages", "angi"}
+    assert summary["sources"]["angi"]["mode"] == summary["sources"]["yellow_pages"]["mode"] == "single"
+
+
+def test_locations_are_shared_by_both_sources():
+    assert yellow_pages_scraper.LATINO_HEAVY_LOCATIONS is angi_scraper.LATINO_HEAVY_LOCATIONS
+    assert is_latino(" US_Latino ") and not is_latino("Houston, TX")
+    assert fallback_city("Austin, TX") == "Houston, TX"
+    assert fallback_city("Houston, TX") is None and fallback_city("Houston") is None
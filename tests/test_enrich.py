@@ -0,0 +1,180 @@
+import threading
+import time
+from argparse import Namespace
+
+import angi_scraper
+import storage
+import yellow_pages_scraper as yp
+from conftest import FakeSite
+from enrich import DetailCache, enrich
+from metrics import Metrics
+from streaming import drain
+
+
+def leads_stream(urls):
+    for number, url in enumerate(urls):
+        yield {"name": f"Lead {number}", "url": url, "phone": None}
+    return {"count": len(urls)}
+
+
+def test_leads_keep_their_order_and_each_url_is_fetched_once():
+    urls = ["a", "b", None, "a", "c", "b"]
+    fetched = []
+    lock = threading.Lock()
+
+    def fetch_details(url):
+        time.sleep({"a": 0.05, "b": 0.01, "c": 0.0}[url])  # later URLs finish first
+        with lock:
+            fetched.append(url)
+        return None if url == "c" else {"phone": f"phone-{url}"}
+
+    metrics = Metrics()
+    leads, summary = drain(
+        enrich(
+            leads_stream(urls),
+            fetch_details,
+            lambda lead: lead["url"],
+            lambda lead, details: {**lead, **details},
+            workers=3,
+            metrics=metrics,
+            name="profiles",
+        )
+    )
+    assert summary == {"count": 6}
+    assert [lead["name"] for lead in leads] == [f"Lead {number}" for number in range(6)]
+    assert [lead["phone"] for lead in leads] == ["phone-a", "phone-b", None, "phone-a", None, "phone-b"]
+    assert sorted(fetched) == ["a", "b", "c"]
+    counters = metrics.counters
+    assert (counters["profiles_fetched"], counters["profiles_shared"], counters["profiles_failed"]) == (2, 2, 1)
+
+
+def test_cached_details_are_reused_until_they_expire(monkeypatch, tmp_path):
+    monkeypatch.setattr(storage, "CACHE_DIR", str(tmp_path))
+    fetched = []
+
+    def run(cache):
+        def fetch_details(url):
+            fetched.append(url)
+            return {"phone": url}
+
+        leads, _ = drain(enrich(leads_stream(["a", "b"]), fetch_details, lambda lead: lead["url"], dict.__or__, cache=cache))
+        return [lead["phone"] for lead in leads]
+
+    assert run(DetailCache("profiles")) == ["a", "b"]
+    assert run(DetailCache("profiles")) == ["a", "b"]
+    assert sorted(fetched) == ["a", "b"]
+    run(DetailCache("profiles", ttl=-1))
+    assert len(fetched) == 4
+
+
+def profiles(site) -> list[str]:
+    return [request.url for request in site.requests if "-reviews-" in request.url]
+
+
+def test_angi_leads_are_filled_in_from_their_profile_pages(use_site):
+    site = use_site(FakeSite(pages=2), angi_scraper)
+
+    plain, _ = drain(angi_scraper.iter_angi("plumber", "Houston, TX", 15))
+    leads, summary = drain(angi_scraper.iter_angi("plumber", "Houston, TX", 15, enrich_profiles=True))
+
+    assert [lead["name"] for lead in leads] == [lead["name"] for lead in plain]
+    assert all(lead["phone"] is None for lead in plain)
+    assert leads[3]["phone"] == "(555) 010-0003" and leads[3]["postalCode"] == "77003"
+    assert leads[3]["website"].startswith("https://example.com/")
+    assert leads[3]["address"] == plain[3]["address"]  # the card's address is kept
+    assert len(profiles(site)) == 15 and summary["metrics"]["counters"]["profiles_fetched"] == 15
+
+    site.requests.clear()
+    again, summary = drain(angi_scraper.iter_angi("plumber", "Houston, TX", 15, enrich_profiles=True))
+    assert again == leads and profiles(site) == []
+    assert summary["metrics"]["counters"]["profiles_cache_hits"] == 15
+
+
+def test_profile_page_parsing_falls_back_to_the_call_link():
+    page = '<html><body><a href="tel:+1-713-555-0100">Call</a></body></html>'
+    assert angi_scraper.parse_profile_page(page) == {"phone": "+1-713-555-0100"}
+    assert angi_scraper.profile_url({"sourceUrl": "https://www.angi.com/companylist/us/tx/houston/plumbing.htm"}) is None
+
+
+def test_leads_stop_waiting_once_the_deadline_has_passed():
+    release = threading.Event()
+
+    def fetch_details(url):
+        if url == "slow":
+            release.wait(5)
+        return {"phone": url}
+
+    metrics = Metrics()
+    stream = enrich(
+        leads_stream(["fast", "slow", "late"]),
+        fetch_details,
+        lambda lead: lead["url"],
+        lambda lead, details: {**lead, **details},
+        metrics=metrics,
+        name="websites",
+        deadline=time.monotonic() + 0.2,
+    )
+    started = time.monotonic()
+    leads, _ = drain(stream)
+    release.set()
+    assert time.monotonic() - started < 2
+    assert leads[0]["phone"] == "fast" and leads[1]["phone"] is None
+    assert metrics.counters["websites_over_budget"] >= 1
+
+
+class RedirectSession:
+    """Tracking links redirect to the business site; HEAD is refused for one of them."""
+
+    def __init__(self):
+        self.requests = []
+        self.cookies = {}
+        self._lock = threading.Lock()
+
+    def _respond(self, method, url, **kwargs):
+        with self._lock:
+            self.requests.append((method, url))
+        name = url.rsplit("/", 1)[1]
+        if method == "HEAD" and name == "no-head":
+            return Namespace(status_code=405, url=url, headers={})
+        if name == "gone":
+            return Namespace(status_code=404, url=url, headers={})
+        return Namespace(status_code=200, url=f"https://www.{name}.example/?utm_source=yp", headers={}, close=lambda: None)
+
+    def head(self, url, **kwargs):
+        assert kwargs["allow_redirects"]
+        return self._respond("HEAD", url, **kwargs)
+
+    def get(self, url, **kwargs):
+        assert kwargs["stream"]
+        return self._respond("GET", url, **kwargs)
+
+
+def test_yellow_pages_tracking_links_are_resolved_once(use_site):
+    session = use_site(RedirectSession(), yp)
+
+    def stream():
+        for name in ["acme", "no-head", "acme", "gone"]:
+            yield {"name": name, "website": f"https://www.yellowpages.com/redirect/{name}"}
+        yield {"name": "direct", "website": "https://direct.example/"}
+        return {"count": 5}
+
+    metrics = Metrics()
+    leads, summary = drain(yp.resolve_tracking_links(stream(), metrics))
+    assert summary == {"count": 5}
+    assert [lead["website"] for lead in leads] == [
+        "https://www.acme.example/?utm_source=yp",
+        "https://www.no-head.example/?utm_source=yp",
+        "https://www.acme.example/?utm_source=yp",
+        "https://www.yellowpages.com/redirect/gone",
+        "https://direct.example/",
+    ]
+    assert sorted(session.requests) == sorted([
+        ("HEAD", f"{yp.BASE_URL}/redirect/acme"),
+        ("HEAD", f"{yp.BASE_URL}/redirect/no-head"),
+        ("GET", f"{yp.BASE_URL}/redirect/no-head"),
+        ("HEAD", f"{yp.BASE_URL}/redirect/gone"),
+    ])
+
+    session.requests.clear()
+    again, _ = drain(yp.resolve_tracking_links(stream(), metrics))
+    assert again == leads and session.requests == [("HEAD", f"{yp.BASE_URL}/redirect/gone")]
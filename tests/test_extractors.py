@@ -0,0 +1,50 @@
+import pytest
+
+from extractors import CALIBRATION_ROWS, RowSpec
+from parsers import available_backends, parse_html
+
+CARD = """
+<div class="outer">
+  <div class="card" id="row">
+    <a class="profile-target x" href="/p"><span class="nm">Acme</span></a>
+    <p class="Address line" data-x>1 Main St</p>
+    <span class="phone">555</span>
+    <span class="phones phone primary">777</span>
+  </div>
+</div>
+"""
+
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_extract_matches_select_one_for_every_field(backend):
+    fields = {
+        "name": 'a[class*="profile-target"] span',
+        "outer_name": ".outer .nm",
+        "address": '[class*="address"], [class*="Address"]',
+        "phone": ".phones.phone.primary, .phone",
+        "flag": "p[data-x]",
+        "missing": "h3, [class^=\"nothing\"]",
+    }
+    row = parse_html(CARD, backend).select_one("#row")
+    found = RowSpec(fields).walk(row)
+    for name, css in fields.items():
+        expected = row.select_one(css)
+        assert (found[name].text() if found[name] else None) == (expected.text() if expected else None)
+    assert found["phone"].text() == "555"
+
+
+def test_unsupported_selectors_fail_at_compile_time():
+    with pytest.raises(ValueError):
+        RowSpec({"bad": "div > p"})
+
+
+def test_native_backends_settle_on_one_strategy_per_spec():
+    native = [backend for backend in available_backends() if parse_html(CARD, backend).native_select]
+    if not native:
+        pytest.skip("no backend with a native selector engine installed")
+    spec = RowSpec({"name": 'a[class*="profile-target"] span', "phone": ".phones.phone.primary, .phone"})
+    row = parse_html(CARD, native[0]).select_one("#row")
+    for _ in range(CALIBRATION_ROWS):
+        assert spec.extract(row)["phone"].text() == "555"
+    assert spec.strategy(type(row)) in {"walk", "select_each"}
+    assert spec.extract(row)["name"].text() == "Acme"
@@ -0,0 +1,150 @@
+import threading
+import time
+
+from fanout import SharedSeen, claim_lead, iter_fan_out
+from fetch import HostSlots
+from streaming import drain
+
+
+def fake_scrape(per_city: int, delays: dict[str, float] | None = None):
+    calls = []
+
+    def scrape(keyword, location, limit, seen_leads, stop_event=None):
+        calls.append(location)
+        time.sleep((delays or {}).get(location, 0))
+        count = 0
+        for i in range(per_city):
+            if count >= limit or stop_event.is_set():
+                break
+            if claim_lead(seen_leads, f"{location}-{i}"):
+                count += 1
+                yield {"name": f"{location}-{i}", "location": location}
+        return {"count": count, "pages_scraped": 1}
+
+    return scrape, calls
+
+
+def test_results_keep_sequential_city_order():
+    locations = ["A", "B", "C", "D"]
+    scrape, _ = fake_scrape(3, delays={"A": 0.05, "B": 0.02})
+    leads, (count, pages) = drain(iter_fan_out(scrape, "plumber", locations, 100, set(), max_cities=4))
+    assert [lead["location"] for lead in leads] == ["A"] * 3 + ["B"] * 3 + ["C"] * 3 + ["D"] * 3
+    assert (count, pages) == (12, 4)
+
+
+def test_stops_every_city_once_limit_is_reached():
+    locations = [f"city-{i}" for i in range(20)]
+    scrape, calls = fake_scrape(5)
+    leads, _ = drain(iter_fan_out(scrape, "plumber", locations, 7, set(), max_cities=2))
+    assert len(leads) == 7
+    assert len(calls) < len(locations)
+
+
+def test_later_cities_buffer_no_more_than_the_limit_needs():
+    produced = []
+
+    def scrape(keyword, location, limit, seen_leads, stop_event=None):
+        time.sleep(0.1 if location == "A" else 0)
+        for i in range(3 if location == "A" else 1000):
+            if stop_event.is_set():
+                break
+            produced.append(location)
+            yield {"name": f"{location}-{i}", "location": location}
+        return {"pages_scraped": 1}
+
+    leads, _ = drain(iter_fan_out(scrape, "plumber", ["A", "B"], 10, set(), max_cities=2))
+    assert [lead["location"] for lead in leads] == ["A"] * 3 + ["B"] * 7
+    assert produced.count("B") <= 11  # blocked once 10 were buffered, not 1000
+
+
+def overlapping_scrape(keys: dict[str, list[str]], delays: dict[str, float]):
+    def scrape(keyword, location, limit, seen_leads, stop_event=None):
+        time.sleep(delays.get(location, 0))
+        count = 0
+        for key in keys[location]:
+            if count >= limit or stop_event.is_set():
+                break
+            if claim_lead(seen_leads, key):
+                count += 1
+                yield {"name": key, "location": location}
+        return {"count": count, "pages_scraped": 1}
+
+    return scrape
+
+
+def sequential(keys: dict[str, list[str]], limit: int) -> list[str]:
+    seen, out = set(), []
+    for location_keys in keys.values():
+        for key in location_keys:
+            if len(out) < limit and key not in seen:
+                seen.add(key)
+                out.append(key)
+    return out
+
+
+def test_shared_keys_go_to_the_earlier_city_even_when_a_later_one_is_faster():
+    keys = {"A": ["shared", "A-1", "A-2"], "B": ["shared", "B-1", "B-2"]}
+    scrape = overlapping_scrape(keys, delays={"A": 0.05})
+    for limit in (100, 3, 4):
+        leads, (count, _) = drain(
+            iter_fan_out(scrape, "plumber", list(keys), limit, set(), max_cities=2, lead_key=lambda lead: lead["name"])
+        )
+        assert [lead["name"] for lead in leads] == sequential(keys, limit)
+        assert count == len(leads)
+
+
+def test_failed_cities_are_reported_not_swallowed():
+    def scrape(keyword, location, limit, seen_leads, stop_event=None):
+        if location == "B":
+            raise RuntimeError("proxy exploded")
+        if location == "C":
+            return {"error": "Failed to fetch"}
+        yield {"name": location}
+        return {"count": 1, "pages_scraped": 1}
+
+    errors = {}
+    leads, _ = drain(iter_fan_out(scrape, "plumber", ["A", "B", "C"], 10, set(), errors=errors))
+    assert [lead["name"] for lead in leads] == ["A"]
+    assert errors == {"B": "proxy exploded", "C": "Failed to fetch"}
+
+
+def test_host_caps_from_concurrent_jobs_do_not_reset_each_other():
+    slots = HostSlots(max_per_host=4)
+    peak, active = [0], [0]
+    lock = threading.Lock()
+
+    def request():
+        with slots.acquire("https://www.example.com/a"):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.01)
+            with lock:
+                active[0] -= 1
+
+    with slots.limit(1):
+        with slots.limit(3):
+            threads = [threading.Thread(target=request) for _ in range(6)]
+            for thread in threads:
+                thread.start()
+        # The looser job finishing must not lift the stricter job's cap.
+        for thread in threads:
+            thread.join()
+    assert peak[0] == 1
+
+
+def test_shared_seen_claims_each_key_once():
+    seen = SharedSeen()
+    wins = []
+
+    def worker():
+        for i in range(500):
+            if seen.claim(f"lead-{i}"):
+                wins.append(i)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(wins) == list(range(500))
@@ -0,0 +1,113 @@
+import threading
+import time
+
+import angi_scraper
+import bench_jina
+import stand_in_server
+from conftest import FakeSite
+from hedge import hedged
+from metrics import Metrics
+from streaming import drain
+
+
+def slow(result, delay, calls=None):
+    def call(stop, *hedge_now):
+        if calls is not None:
+            calls.append(stop)
+        time.sleep(delay)
+        return result
+
+    return call
+
+
+def test_backup_joins_after_the_delay_and_the_first_usable_result_wins():
+    metrics = Metrics()
+    calls = []
+    started = time.monotonic()
+    result, from_backup = hedged(slow("direct", 0.5, calls), slow("jina", 0.05), delay=0.05, metrics=metrics)
+    assert (result, from_backup) == ("jina", True)
+    assert time.monotonic() - started < 0.3
+    assert calls[0].is_set()  # the primary was told to stop
+    assert metrics.counters["hedges"] == metrics.counters["hedge_wins"] == 1
+
+
+def test_sides_run_on_long_lived_threads_so_their_sessions_stay_warm():
+    threads = set()
+
+    def record(stop, *hedge_now):
+        threads.add(threading.current_thread())
+        return "direct"
+
+    for _ in range(20):
+        hedged(record, slow("jina", 0))
+    assert len(threads) < 20 and all(thread.name.startswith("hedge") for thread in threads)
+
+
+def test_fast_primary_never_starts_the_backup():
+    calls = []
+    assert hedged(slow("direct", 0), slow("jina", 0, calls), delay=1) == ("direct", False)
+    assert calls == []
+
+
+def test_hedge_now_starts_the_backup_without_waiting():
+    def challenged(stop, hedge_now):
+        hedge_now()
+        stop.wait(1)
+        return None
+
+    started = time.monotonic()
+    assert hedged(challenged, slow("jina", 0), delay=None) == ("jina", True)
+    assert time.monotonic() - started < 0.5
+
+
+def test_failed_primary_falls_back_and_nothing_usable_is_none():
+    metrics = Metrics()
+    assert hedged(slow(None, 0), slow("jina", 0), delay=None, metrics=metrics) == ("jina", True)
+    assert "hedges" not in metrics.counters  # a fallback, not a race
+
+    def broken(stop, *hedge_now):
+        raise RuntimeError("boom")
+
+    assert hedged(broken, slow(None, 0), delay=None) == (None, False)
+
+
+def test_block_rate_turns_hedging_on(virtual_rate_limiter):
+    limiter = virtual_rate_limiter
+    url = f"{angi_scraper.BASE_URL}/companylist"
+    assert angi_scraper.hedge_delay() == angi_scraper.HEDGE_DELAY
+
+    for _ in range(4):
+        limiter.feedback(url, None, blocked=True)
+    assert limiter.block_rate(url) > angi_scraper.HEDGE_BLOCK_RATE
+    assert angi_scraper.hedge_delay() == 0
+
+    for _ in range(10):
+        limiter.feedback(url, None, blocked=False)
+    assert limiter.block_rate(url) < 0.1
+
+
+def test_angi_races_jina_after_the_first_challenge(use_site, monkeypatch):
+    # Every direct request gets a Cloudflare challenge.
+    site = use_site(FakeSite(delay=0.05, render=lambda request: stand_in_server.CHALLENGE_PAGE), angi_scraper)
+    monkeypatch.setattr(angi_scraper, "HEDGE_DELAY", 30.0)
+
+    def jina(url, metrics=None, deadline=None):
+        time.sleep(0.02)
+        return bench_jina.read_recorded()
+
+    monkeypatch.setattr(angi_scraper, "fetch_via_jina", jina)
+    leads, summary = drain(angi_scraper.iter_location("plumber", "Houston, TX", 5, set()))
+
+    assert len(leads) == 5 and summary["status"] == 200
+    counters = summary["metrics"]["counters"]
+    assert counters["hedges"] == counters["hedge_wins"] == 1
+    assert len(site.requests) < 4  # the direct retries stopped once Jina answered
+
+
+def test_a_failed_page_fetch_is_an_error_summary_not_a_crash(monkeypatch):
+    def broken(*args, **kwargs):
+        raise RuntimeError("hedge pool gone")
+
+    monkeypatch.setattr(angi_scraper.hedge, "hedged", broken)
+    leads, summary = drain(angi_scraper.iter_location("plumber", "Houston, TX", 5, set()))
+    assert leads == [] and summary["error"] == "hedge pool gone"
@@ -0,0 +1,117 @@
+import os
+import time
+from contextlib import contextmanager
+
+import pytest
+
+import fetch
+import yellow_pages_scraper
+from http_cache import HTTP_CACHE, MISS_STATUS, HttpCache, cache_key
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, text: str):
+        self.status_code = status_code
+        self.text = text
+
+
+class FakeSession:
+    def __init__(self, status_code=200, text="<html>ok</html>"):
+        self.calls = []
+        self.status_code = status_code
+        self.text = text
+
+    def get(self, url, **kwargs):
+        self.calls.append(url)
+        return FakeResponse(self.status_code, self.text)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    HTTP_CACHE.configure("record", directory=str(tmp_path))
+    yield HTTP_CACHE
+    HTTP_CACHE.configure("off")
+
+
+def test_key_ignores_user_agent_but_not_language():
+    base = cache_key("https://x.test/", {"User-Agent": "a", "Accept-Language": "en"})
+    assert base == cache_key("https://x.test/", {"user-agent": "b", "accept-language": "en"})
+    assert base != cache_key("https://x.test/", {"Accept-Language": "es"})
+
+
+def test_record_then_replay_without_network(cache):
+    session = FakeSession()
+    fetch.get(session, "https://x.test/a", headers={"User-Agent": "one"})
+    assert session.calls == ["https://x.test/a"]
+
+    cache.configure("replay", directory=cache.directory)
+    hit = fetch.get(session, "https://x.test/a", headers={"User-Agent": "two"})
+    miss = fetch.get(session, "https://x.test/b")
+    assert (hit.status_code, hit.text) == (200, "<html>ok</html>")
+    assert miss.status_code == MISS_STATUS
+    assert session.calls == ["https://x.test/a"]
+    assert cache.stats() == {"hits": 1, "misses": 1, "stores": 0}
+
+
+def test_blocked_responses_are_not_recorded(cache):
+    fetch.get(FakeSession(status_code=403), "https://x.test/a")
+    fetch.get(FakeSession(text="challenge"), "https://x.test/b", is_blocked=lambda r: "challenge" in r.text)
+    assert cache.stats()["stores"] == 0
+
+
+def test_uncached_requests_skip_lookup_and_store(cache):
+    session = FakeSession()
+    fetch.get(session, "https://x.test/", cache=False)
+    cache.configure("ttl", ttl=60, directory=cache.directory)
+    fetch.get(session, "https://x.test/", cache=False)
+    assert session.calls == ["https://x.test/", "https://x.test/"]
+    assert cache.stats() == {"hits": 0, "misses": 0, "stores": 0}
+
+
+def test_identical_bodies_are_stored_once(cache):
+    session = FakeSession()
+    fetch.get(session, "https://x.test/a")
+    fetch.get(session, "https://x.test/b")
+    assert len(os.listdir(os.path.join(cache.directory, "bodies"))) == 1
+
+
+def test_ttl_mode_refetches_stale_entries(tmp_path):
+    cache = HttpCache("ttl", ttl=60, directory=str(tmp_path))
+    cache.store("https://x.test/a", None, FakeResponse(200, "fresh"))
+    assert cache.lookup("https://x.test/a").text == "fresh"
+
+    cache.ttl = 0.001
+    time.sleep(0.01)
+    assert cache.lookup("https://x.test/a") is None
+
+
+def test_multi_city_job_replays_offline(cache, tmp_path, monkeypatch):
+    headers = yellow_pages_scraper.build_headers("recorded")
+    for page, fixture in ((1, "yp_search_page1.html"), (2, "yp_search_page2.html")):
+        url = (
+            "https://www.yellowpages.com/search?search_terms=plumber"
+            f"&geo_location_terms=Houston, TX&page={page}"
+        )
+        with open(os.path.join(FIXTURES, fixture), encoding="utf-8") as handle:
+            cache.store(url, headers, FakeResponse(200, handle.read()))
+    cache.configure("replay", directory=cache.directory)
+
+    @contextmanager
+    def no_network(url):
+        raise AssertionError(f"network access in replay mode: {url}")
+        yield
+
+    monkeypatch.setattr(fetch.HOST_SLOTS, "acquire", no_network)
+    monkeypatch.setattr(yellow_pages_scraper.SESSIONS, "path", str(tmp_path / "cookies.json"))
+
+    started = time.perf_counter()
+    result = yellow_pages_scraper.scrape_yellow_pages("plumber", "us_latino", limit=500, max_cities=8)
+    assert time.perf_counter() - started < 10
+
+    assert result["count"] == len(result["leads"]) > 0
+    assert {lead["location"] for lead in result["leads"]} == {"Houston, TX"}
+    assert result["cache"]["hits"] == 2
+    # Page 1 of every other city, plus Houston's page 3; a prefetched page 4 may be cancelled before it starts.
+    assert result["cache"]["misses"] >= len(yellow_pages_scraper.LATINO_HEAVY_LOCATIONS)
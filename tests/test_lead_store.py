@@ -0,0 +1,56 @@
+import yellow_pages_scraper
+from conftest import FakeSite
+from lead_store import LeadStore, store_keys
+from streaming import drain
+
+
+def test_store_keys_normalize_phone_name_and_zip():
+    yp = {"name": "Joe's Plumbing & Air, LLC", "phone": "+1 (713) 555-0100", "postalCode": "77002-1234"}
+    same = {"name": "joes plumbing and air llc", "phone": "713.555.0100", "postalCode": "77002"}
+    assert store_keys(yp) == store_keys(same) == ["phone:7135550100", "zip:77002|joes plumbing and air llc"]
+    assert store_keys({"name": "Plomería José", "phone": None, "postalCode": None}) == ["name:plomería josé"]
+
+
+def test_same_name_in_another_city_is_a_different_business(tmp_path):
+    store = LeadStore(str(tmp_path / "leads.sqlite3"))
+    houston = {"name": "Mr. Rooter Plumbing", "phone": None, "city": "Houston", "region": "TX", "postalCode": None}
+    dallas = dict(houston, city="Dallas")
+    assert store.add(houston, "angi") and store.add(dallas, "angi")
+    assert len(store) == 2
+
+    # The Yellow Pages row for the Houston one, with phone and ZIP, is the same business.
+    yp = dict(houston, name="Mr Rooter Plumbing", phone="713-555-0100", postalCode="77002")
+    assert store.known(yp) and not store.add(yp, "yellow_pages")
+    assert store.known({"name": "Someone Else", "phone": "(713) 555-0100"})
+    assert len(store) == 2
+    store.close()
+
+
+def test_known_leads_survive_reopening(tmp_path):
+    path = str(tmp_path / "leads.sqlite3")
+    lead = {"name": "Acme Rooter", "phone": "713-555-0100", "postalCode": "77002"}
+    store = LeadStore(path)
+    assert not store.known(lead)
+    assert store.add(lead, "yellow_pages")
+    assert not store.add(dict(lead, name="ACME  rooter"), "angi")
+    store.close()
+
+    reopened = LeadStore(path)
+    assert reopened.known(lead) and len(reopened) == 1
+    reopened.close()
+
+
+def test_second_run_skips_known_leads_and_fills_the_limit_with_new_ones(use_site, tmp_path):
+    use_site(FakeSite(pages=4))
+    store = LeadStore(str(tmp_path / "leads.sqlite3"))
+
+    first, summary = drain(yellow_pages_scraper.iter_yellow_pages("plumber", "Houston, TX", 40, store=store))
+    assert len(first) == summary["count"] == 40
+    assert len(store) == 40
+
+    second, summary = drain(yellow_pages_scraper.iter_yellow_pages("plumber", "Houston, TX", 40, store=store))
+    assert len(second) == summary["count"] == 40
+    assert not {key for lead in first for key in store_keys(lead)} & {key for lead in second for key in store_keys(lead)}
+    assert summary["metrics"]["counters"]["known_leads"] == 40
+    assert len(store) == 80
+    store.close()
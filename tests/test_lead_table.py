@@ -0,0 +1,86 @@
+import io
+import json
+
+import pytest
+
+import lead_table
+from lead_table import FIELDS, Lead, LeadTable, export, read_table, write_table
+
+
+def sample_leads(count):
+    for number in range(count):
+        yield {
+            "name": f"Plumber {number}",
+            "phone": f"(713) 555-{number:04d}" if number % 3 else None,
+            "website": None,
+            "city": "Houston",
+            "region": "".join(["T", "X"]),  # a fresh string per row, as parsing makes them
+            "postalCode": f"770{number % 2:02d}",
+            "rating": 4.5 if number % 2 else None,
+            "reviewCount": number if number % 2 else None,
+            "category": "Plumbing",
+            "sourceUrl": f"https://www.angi.com/companylist/us/tx/houston/plumber-{number}-reviews-{number}.htm",
+            "keyword": "plumber",
+            "location": "Houston, TX",
+            "source": "angi",
+            "extra": "dropped",
+        }
+
+
+def test_table_interns_repeated_values_and_yields_slot_records():
+    table = LeadTable()
+    table.extend(sample_leads(50))
+    assert len(table) == 50
+    regions = table.columns["region"]
+    assert all(region is regions[0] for region in regions)
+
+    lead = next(iter(table))
+    assert isinstance(lead, Lead) and not hasattr(lead, "__dict__")
+    assert lead.name == "Plumber 0" and lead.street is None
+    assert list(lead.as_dict()) == list(FIELDS)
+    assert "extra" not in next(table.dicts())
+
+
+def test_csv_round_trip_keeps_types_and_missing_values(tmp_path):
+    table = LeadTable()
+    table.extend(sample_leads(5))
+    path = str(tmp_path / "leads.csv")
+    write_table(table, "csv", path)
+
+    loaded = read_table(path)
+    assert loaded.columns == table.columns
+    assert loaded.columns["rating"][:2] == [None, 4.5] and loaded.columns["reviewCount"][1] == 1
+
+
+def test_export_consumes_the_stream_and_returns_its_summary():
+    def stream():
+        yield from sample_leads(3)
+        return {"count": 3}
+
+    out = io.StringIO()
+    assert export(stream(), "csv", out=out) == {"count": 3}
+    lines = out.getvalue().splitlines()
+    assert lines[0] == ",".join(FIELDS) and len(lines) == 4
+
+    out = io.StringIO()
+    export(stream(), "json", out=out)
+    assert [lead["name"] for lead in json.loads(out.getvalue())] == ["Plumber 0", "Plumber 1", "Plumber 2"]
+
+    with pytest.raises(ValueError):
+        write_table(LeadTable(), "xlsx", out=io.StringIO())
+
+
+@pytest.mark.parametrize("fmt, suffix", [("parquet", "parquet"), ("arrow", "arrow")])
+def test_columnar_round_trip(tmp_path, fmt, suffix):
+    pytest.importorskip("pyarrow")
+    table = LeadTable()
+    table.extend(sample_leads(1000))
+    path = str(tmp_path / f"leads.{suffix}")
+    write_table(table, fmt, path)
+    assert read_table(path).columns == table.columns
+
+
+def test_columnar_formats_need_pyarrow(monkeypatch):
+    monkeypatch.setattr(lead_table, "pa", None)
+    with pytest.raises(RuntimeError):
+        export(iter(()), "parquet", "leads.parquet")
@@ -0,0 +1,87 @@
+import json
+import os
+
+import yellow_pages_scraper
+from metrics import Metrics, export, to_prometheus
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, text: str):
+        self.status_code = status_code
+        self.text = text
+        self.content = text.encode("utf-8")
+
+
+class FixtureSite:
+    """Page 1 is blocked once, then pages 1-2 come from fixtures, then no results."""
+
+    def __init__(self):
+        self.blocked = False
+
+    def get(self, url, **kwargs):
+        page = int(url.rsplit("page=", 1)[1])
+        if page == 1 and not self.blocked:
+            self.blocked = True
+            return FakeResponse(403, "blocked")
+        name = {1: "yp_search_page1.html", 2: "yp_search_page2.html"}.get(page, "yp_search_empty.html")
+        with open(os.path.join(FIXTURES, name), encoding="utf-8") as handle:
+            return FakeResponse(200, handle.read())
+
+
+def test_location_metrics_cover_requests_retries_and_phases(monkeypatch):
+    site = FixtureSite()
+    monkeypatch.setattr(yellow_pages_scraper.SESSIONS, "session", lambda headers, **kwargs: site)
+    monkeypatch.setattr(yellow_pages_scraper.SESSIONS, "invalidate", lambda: None)
+    # Exact request counts: no pages fetched ahead past the empty one.
+    monkeypatch.setattr(yellow_pages_scraper, "DEFAULT_PREFETCH", 0)
+
+    result = yellow_pages_scraper.scrape_yellow_pages("plumber", "Houston, TX", limit=500)
+    block = result["metrics"]
+
+    assert block["requests_by_status"] == {"403": 1, "200": 3}
+    assert block["counters"]["retries"] == 1
+    assert block["counters"]["requests"] == 4
+    assert block["counters"]["bytes"] > 0
+    assert {"request", "parse", "backoff"} <= set(block["phases"])
+    assert block["counters"]["throttled"] == 1
+    assert block["locations"]["Houston, TX"]["counters"]["retries"] == 1
+    assert block["wall_seconds"] >= sum(block["phases"].values()) * 0.5
+
+
+def test_job_metrics_sum_locations():
+    job = Metrics()
+    for location in ("A", "B"):
+        city = Metrics()
+        city.incr("dedup_hits", 2)
+        with city.phase("parse"):
+            pass
+        city.record_response(FakeResponse(200, "abc"))
+        job.add_location(location, {"metrics": city.as_dict()})
+    block = job.as_dict()
+    assert block["counters"] == {"dedup_hits": 4, "requests": 2, "bytes": 6}
+    assert block["requests_by_status"] == {"200": 2}
+    assert set(block["locations"]) == {"A", "B"}
+
+
+def test_prometheus_textfile_and_json_log(tmp_path):
+    metrics = Metrics()
+    metrics.record_response(FakeResponse(403, ""))
+    metrics.incr("retries")
+    summary = {"count": 0, "metrics": metrics.as_dict()}
+    labels = {"source": "yellow_pages", "location": 'Odd "City"'}
+
+    text = to_prometheus(summary["metrics"], labels)
+    assert 'scraper_requests{location="Odd \\"City\\"",source="yellow_pages",status="403"} 1' in text
+    assert 'scraper_retries{location="Odd \\"City\\"",source="yellow_pages"} 1' in text
+
+    prom = tmp_path / "scraper.prom"
+    export(str(prom), summary, labels)
+    assert prom.read_text() == text
+
+    log = tmp_path / "metrics.jsonl"
+    export(str(log), summary, labels)
+    export(str(log), summary, labels)
+    records = [json.loads(line) for line in log.read_text().splitlines()]
+    assert len(records) == 2 and records[0]["metrics"]["counters"]["retries"] == 1
@@ -0,0 +1,85 @@
+import os
+import threading
+import time
+
+import angi_scraper
+import yellow_pages_scraper
+from conftest import FakeSite
+from pagination import PagePrefetcher, last_page, pages_ahead, result_range
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def read_fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as handle:
+        return handle.read()
+
+
+def test_result_banner_gives_the_last_page():
+    assert result_range(read_fixture("yp_search_page1.html")) == (1, 30, 1284)
+    assert last_page(read_fixture("yp_search_page1.html"), 80) == 43
+    assert last_page(read_fixture("angi_search_page1.html"), 40) == 25
+    assert last_page(read_fixture("angi_search_page1.html"), 10) == 10
+    assert last_page(read_fixture("yp_search_empty.html"), 80) == 80
+
+
+def test_pages_ahead_stays_within_the_remaining_limit():
+    assert pages_ahead(500, 30, 2) == 2
+    assert pages_ahead(35, 30, 2) == 1
+    assert pages_ahead(30, 30, 2) == 0
+    assert pages_ahead(0, 30, 2) == 0
+
+
+def test_prefetcher_reuses_prefetched_pages_and_joins_on_close():
+    calls = []
+    release = threading.Event()
+
+    def fetch_page(page, cancelled):
+        calls.append(page)
+        if page == 3:
+            release.wait(5)
+            return None if cancelled.is_set() else page
+        return page * 10
+
+    pager = PagePrefetcher(fetch_page)
+    pager.fill([2, 3])
+    assert pager.take(1) == 10
+    assert pager.take(2) == 20
+    time.sleep(0.05)
+    closer = threading.Thread(target=lambda: calls.append(("wasted", pager.close())))
+    closer.start()
+    time.sleep(0.05)
+    assert closer.is_alive()  # still waiting for page 3
+    release.set()
+    closer.join(5)
+    assert sorted(call for call in calls if isinstance(call, int)) == [1, 2, 3]
+    assert ("wasted", 1) in calls
+    assert pager.cancelled.is_set()
+
+
+def test_yellow_pages_never_requests_past_the_last_page(use_site):
+    site = use_site(FakeSite(pages=3))
+
+    leads, summary = yellow_pages_scraper.drain(
+        yellow_pages_scraper.iter_location("plumber", "Houston, TX", 1000, set())
+    )
+    assert len(leads) == 90 and summary["pages_scraped"] == 3
+    assert sorted(site.pages) == [1, 2, 3]
+
+
+def test_yellow_pages_prefetch_stops_short_of_the_limit(use_site):
+    site = use_site(FakeSite(pages=10))
+
+    leads, _ = yellow_pages_scraper.drain(
+        yellow_pages_scraper.iter_location("plumber", "Houston, TX", 35, set())
+    )
+    assert len(leads) == 35
+    assert sorted(site.pages) == [1, 2]
+
+
+def test_angi_never_requests_past_the_last_page(use_site):
+    site = use_site(FakeSite(pages=2))
+
+    leads, summary = angi_scraper.drain(angi_scraper.iter_location("plumber", "Houston, TX", 1000, set()))
+    assert len(leads) == 20 and summary["pages_scraped"] == 2
+    assert sorted(site.pages) == [1, 2]
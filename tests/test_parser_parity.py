@@ -0,0 +1,116 @@
+import json
+import os
+
+import pytest
+
+import angi_scraper
+import bench_jina
+import yellow_pages_scraper
+from parsers import available_backends
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+# Cloudflare challenge page saved by an earlier debugging session.
+CF_CHALLENGE = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "debug_yp.html"))
+
+
+def read(path):
+    with open(path, encoding="utf-8") as handle:
+        return handle.read()
+
+
+def parse_yp(name, backend):
+    html_text = read(os.path.join(FIXTURES, name))
+    return yellow_pages_scraper.parse_results_page(html_text, "plumber", "Houston, TX", "https://example.test/search", backend)
+
+
+def parse_angi(name, backend):
+    html_text = read(os.path.join(FIXTURES, name))
+    return angi_scraper.parse_results_page(
+        html_text, "plumber", "Houston, TX", "houston", "tx", "plumbing", "https://example.test/plumbing.htm", backend
+    )
+
+
+YP_PAGES = ["yp_search_page1.html", "yp_search_page2.html", "yp_search_empty.html", CF_CHALLENGE]
+ANGI_PAGES = ["angi_search_page1.html", "angi_search_fallback.html"]
+
+
+@pytest.mark.parametrize("backend", available_backends())
+@pytest.mark.parametrize("page", YP_PAGES)
+def test_yellow_pages_backends_match_html_parser(page, backend):
+    assert parse_yp(page, backend) == parse_yp(page, "html.parser")
+
+
+@pytest.mark.parametrize("backend", available_backends())
+@pytest.mark.parametrize("page", ANGI_PAGES)
+def test_angi_backends_match_html_parser(page, backend):
+    assert parse_angi(page, backend) == parse_angi(page, "html.parser")
+
+
+def test_fixtures_exercise_the_extractors():
+    page1 = parse_yp("yp_search_page1.html", "html.parser")
+    assert len(page1) == 31
+    assert any(lead["website"] and lead["website"].startswith("https://www.yellowpages.com/redirect") for lead in page1)
+    assert any(lead["phone"] is None for lead in page1)
+    assert len(parse_yp("yp_search_page2.html", "html.parser")) == 31
+    assert parse_yp("yp_search_empty.html", "html.parser") is None
+    assert parse_yp(CF_CHALLENGE, "html.parser") is None
+
+    cards = parse_angi("angi_search_page1.html", "html.parser")
+    assert any(lead["rating"] is not None and lead["reviewCount"] for lead in cards)
+    assert len(parse_angi("angi_search_fallback.html", "html.parser")) == 9
+
+
+EXPECTED = os.path.join(FIXTURES, "expected")
+
+
+def expected(name):
+    with open(os.path.join(EXPECTED, name.replace(".html", ".json")), encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_compiled_row_extraction_matches_recorded_select_one_output(backend):
+    # Recorded from the per-field select_one() extractor before RowSpec.
+    for page in ("yp_search_page1.html", "yp_search_page2.html"):
+        assert parse_yp(page, backend) == expected(page)
+    for page in ANGI_PAGES:
+        assert parse_angi(page, backend) == expected(page)
+
+
+JINA_ARGS = ("plumber", "Houston, TX", "houston", "tx", "plumbing")
+
+
+def without_ratings(leads):
+    return [{k: v for k, v in lead.items() if k not in ("rating", "reviewCount")} for lead in leads]
+
+
+def assert_keeps_legacy_ratings(leads, legacy):
+    assert without_ratings(leads) == without_ratings(legacy)
+    for lead, old in zip(leads, legacy):
+        if old["rating"] is not None:
+            assert (lead["rating"], lead["reviewCount"]) == (old["rating"], old["reviewCount"])
+
+
+def test_jina_parser_matches_recorded_per_lead_search_output():
+    # Recorded from the parser that ran one regex search per lead.
+    leads = angi_scraper.parse_jina_markdown(bench_jina.read_recorded(), *JINA_ARGS, set())
+    assert_keeps_legacy_ratings(leads, expected("angi_jina_page1.json"))
+
+
+def test_jina_parser_reads_ratings_laid_out_after_the_link():
+    leads = angi_scraper.parse_jina_markdown(bench_jina.read_recorded(), *JINA_ARGS, set())
+    ratings = {lead["name"]: (lead["rating"], lead["reviewCount"]) for lead in leads}
+    assert ratings["ARS Rescue Rooter Plumbing & Air"] == (3.4, 1034)
+    assert ratings["Texas Best Plumbing & Air"] == (3.3, 2124)
+    assert ratings["Aqua Pro Plumbing of Houston"] == (4.0, 593)
+    # No rating of its own; the next card's heading rating is not borrowed.
+    assert ratings["John Moore Home Services"] == (None, None)
+    assert ratings["Abacus Home Services"] == (3.4, 1180)
+
+
+def test_jina_parser_matches_per_lead_search_on_large_pages():
+    text = bench_jina.large_markdown(200)
+    leads = angi_scraper.parse_jina_markdown(text, *JINA_ARGS, set())
+    legacy = bench_jina.legacy_parse_jina_markdown(text, *JINA_ARGS, set())
+    assert len(leads) == 180
+    assert_keeps_legacy_ratings(leads, legacy)
@@ -0,0 +1,100 @@
+import threading
+from email.utils import formatdate
+
+import fetch
+from conftest import VirtualClock
+from ratelimit import RateLimiter, TokenBucket, parse_retry_after
+
+
+def make_bucket(**settings):
+    clock = VirtualClock()
+    return TokenBucket(clock=clock, sleep=clock.sleep, **settings), clock
+
+
+def test_paces_at_the_current_rate():
+    bucket, clock = make_bucket(rate=2.0, increase=0.0)
+    for _ in range(5):
+        bucket.acquire()
+    assert clock.now == 2.0
+
+
+def test_refill_rounding_does_not_spin_forever():
+    bucket, clock = make_bucket(rate=1.25)
+    clock.now = bucket._updated = 5.133333333333334
+    # A refill that lands a hair under one token used to wait 1e-16 s, a no-op on this clock.
+    bucket._tokens = 0.9999999999999998
+    assert bucket.acquire() == 0.0
+
+
+def test_aimd_speeds_up_additively_and_backs_off_multiplicatively():
+    bucket, _ = make_bucket(rate=1.0, max_rate=3.0, increase=0.5, decrease=0.5)
+    for _ in range(10):
+        bucket.succeeded()
+    assert bucket.rate == 3.0
+    bucket.blocked()
+    bucket.blocked()
+    assert bucket.rate == 0.75
+
+
+def test_block_empties_the_bucket_and_retry_after_pauses_the_host():
+    bucket, clock = make_bucket(rate=10.0, burst=5.0)
+    bucket.blocked(retry_after=30)
+    bucket.acquire()
+    assert clock.now >= 30
+
+
+def test_parse_retry_after_seconds_and_http_date():
+    assert parse_retry_after("120") == 120
+    assert parse_retry_after("nonsense") is None
+    assert 55 <= parse_retry_after(formatdate(1_000_060, usegmt=True), now=1_000_000) <= 60
+    assert parse_retry_after("99999") == 300
+
+
+class Response:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.text = ""
+
+
+class Session:
+    def __init__(self, responses):
+        self.responses = list(responses)
+
+    def get(self, url, **kwargs):
+        return self.responses.pop(0)
+
+
+def test_fetch_feeds_back_blocks_and_retry_after(virtual_rate_limiter):
+    limiter = virtual_rate_limiter
+    limiter.configure("https://site.test", rate=4.0, increase=1.0)
+    session = Session([Response(200), Response(429, {"Retry-After": "20"}), Response(200)])
+
+    fetch.get(session, "https://site.test/a")
+    assert limiter.rates()["site.test"] == 5.0
+    fetch.get(session, "https://site.test/b")
+    assert limiter.rates()["site.test"] == 2.5
+    waited = limiter.acquire("https://site.test/c")
+    assert waited >= 19
+
+
+def test_shared_by_threads():
+    clock = VirtualClock()
+    limiter = RateLimiter(clock=clock, sleep=clock.sleep)
+    limiter.configure("https://site.test", rate=1.0, increase=0.0)
+    lock = threading.Lock()
+    grants = []
+
+    def worker():
+        for _ in range(3):
+            limiter.acquire("https://site.test/x")
+            with lock:
+                grants.append(clock.now)
+
+    threads = [threading.Thread(target=worker) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(grants) == 9
+    assert clock.now >= 8
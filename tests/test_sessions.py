@@ -0,0 +1,96 @@
+import os
+import threading
+
+import sessions
+from sessions import SessionManager
+
+
+class FakeResponse:
+    def __init__(self, status_code: int):
+        self.status_code = status_code
+
+
+def fake_site(monkeypatch):
+    warmups = []
+
+    def fake_get(session, url, **kwargs):
+        warmups.append(url)
+        session.cookies.set("__cf_bm", f"token-{len(warmups)}", domain=".example.com", path="/")
+        session.cookies.set("other", "x", domain=".elsewhere.com", path="/")
+        return FakeResponse(200)
+
+    monkeypatch.setattr(sessions.fetch, "get", fake_get)
+    return warmups
+
+
+def make_manager(tmp_path):
+    manager = SessionManager("example", "https://www.example.com/", impersonate="chrome120")
+    manager.path = str(tmp_path / "example.json")
+    return manager
+
+
+def test_warms_up_once_across_threads_and_pages(tmp_path, monkeypatch):
+    warmups = fake_site(monkeypatch)
+    manager = make_manager(tmp_path)
+
+    def worker():
+        for _ in range(5):
+            session = manager.session({})
+            assert session.cookies.get("__cf_bm", domain=".example.com") == "token-1"
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(warmups) == 1
+
+
+def test_saved_jar_is_reused_by_a_new_process(tmp_path, monkeypatch):
+    warmups = fake_site(monkeypatch)
+    make_manager(tmp_path).session({})
+
+    restarted = make_manager(tmp_path)
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(session=restarted.session({})))
+    thread.start()
+    thread.join()
+
+    assert len(warmups) == 1
+    assert result["session"].cookies.get("__cf_bm", domain=".example.com") == "token-1"
+    assert [c["name"] for c in restarted._cookies] == ["__cf_bm"]
+
+
+def test_invalidate_forces_one_new_warm_up(tmp_path, monkeypatch):
+    warmups = fake_site(monkeypatch)
+    manager = make_manager(tmp_path)
+    manager.session({})
+    manager.invalidate()
+    manager.session({})
+    manager.session({})
+    assert len(warmups) == 2
+
+
+def test_failed_warm_up_is_not_saved_and_is_retried_later(tmp_path, monkeypatch):
+    attempts = []
+
+    def failing_get(session, url, **kwargs):
+        attempts.append(url)
+        raise TimeoutError("proxy timed out")
+
+    monkeypatch.setattr(sessions.fetch, "get", failing_get)
+    manager = make_manager(tmp_path)
+    manager.session({})
+    manager.session({})
+    assert len(attempts) == 1
+    assert not os.path.exists(manager.path)
+
+    monkeypatch.setattr(sessions.fetch, "get", lambda session, url, **kwargs: FakeResponse(403))
+    manager._retry_at = 0.0
+    manager.session({})
+    assert not os.path.exists(manager.path)
+
+    warmups = fake_site(monkeypatch)
+    manager._retry_at = 0.0
+    manager.session({})
+    assert len(warmups) == 1 and os.path.exists(manager.path)
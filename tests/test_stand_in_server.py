@@ -0,0 +1,32 @@
+from argparse import Namespace
+
+import angi_scraper
+import stand_in_server
+import yellow_pages_scraper
+
+CONFIG = Namespace(pages=2, yp_per_page=30, angi_per_page=10)
+
+
+def test_synthetic_yellow_pages_parse_like_real_ones():
+    page = stand_in_server.yp_page("plumber", "Houston, TX", 2, CONFIG)
+    leads = yellow_pages_scraper.parse_results_page(page, "plumber", "Houston, TX", "u")
+    assert len(leads) == 30
+    assert leads[0]["phone"] and leads[0]["city"] == "Houston" and leads[0]["website"]
+    assert yellow_pages_scraper.parse_results_page(
+        stand_in_server.yp_page("plumber", "Houston, TX", 3, CONFIG), "plumber", "Houston, TX", "u"
+    ) is None
+
+
+def test_synthetic_angi_pages_parse_like_real_ones():
+    page = stand_in_server.angi_page("tx", "houston", "plumbing", 1, CONFIG)
+    leads = angi_scraper.parse_results_page(page, "plumber", "Houston, TX", "houston", "tx", "plumbing", "u")
+    # Like the live markup, nested card elements repeat a lead; dedup drops them.
+    assert len({lead["name"] for lead in leads}) == 10
+    assert leads[0]["rating"] is not None and leads[0]["sourceUrl"].endswith(".htm")
+    assert angi_scraper.is_cf_blocked(stand_in_server.CHALLENGE_PAGE)
+
+
+def test_synthetic_jina_markdown_parses():
+    markdown = stand_in_server.jina_markdown("127.0.0.1:1/companylist/us/tx/houston/plumbing.htm?page=2", CONFIG)
+    leads = angi_scraper.parse_jina_markdown(markdown, "plumber", "Houston, TX", "houston", "tx", "plumbing", set())
+    assert len(leads) == 10
@@ -0,0 +1,42 @@
+import random
+
+from ua_pool import FALLBACK_UA, UserAgentPool, get_pool, is_desktop_chrome
+
+CHROME_120 = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+CHROME_99 = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/99.0.4844.51 Safari/537.36"
+EDGE = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/112.0.0.0 Safari/537.36 Edg/112.0.1722.48"
+FIREFOX = "Mozilla/5.0 (X11; Linux x86_64; rv:121.0) Gecko/20100101 Firefox/121.0"
+
+
+def write_agents(tmp_path, lines):
+    path = tmp_path / "user_agents.txt"
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def test_pool_indexes_stripped_non_empty_lines(tmp_path):
+    path = write_agents(tmp_path, [f"  {CHROME_120}  ", "", FIREFOX, "   "])
+    pool = UserAgentPool.from_file(path)
+    assert list(pool) == [CHROME_120, FIREFOX]
+
+
+def test_missing_or_empty_file_falls_back(tmp_path):
+    assert UserAgentPool.from_file(str(tmp_path / "missing.txt")).choice() == FALLBACK_UA
+    assert UserAgentPool.from_file(write_agents(tmp_path, [])).choice() == FALLBACK_UA
+
+
+def test_impersonate_pool_keeps_desktop_chrome_and_prefers_matching_version(tmp_path):
+    path = write_agents(tmp_path, [CHROME_120, CHROME_99, EDGE, FIREFOX])
+    pool = get_pool(impersonate="chrome120", path=path)
+    assert set(pool) == {CHROME_120, CHROME_99}
+    assert get_pool(impersonate="chrome120", path=path) is pool
+
+    rng = random.Random(3)
+    picks = [pool.choice(rng) for _ in range(2000)]
+    assert picks.count(CHROME_120) > picks.count(CHROME_99) * 5
+
+
+def test_is_desktop_chrome():
+    assert is_desktop_chrome(CHROME_120)
+    assert not is_desktop_chrome(EDGE)
+    assert not is_desktop_chrome(FIREFOX)
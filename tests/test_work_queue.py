@@ -0,0 +1,78 @@
+import threading
+
+import pytest
+
+import work_queue
+import yellow_pages_scraper
+from conftest import FakeSite
+from work_queue import WorkQueue, work
+
+CITIES = ["Houston, TX", "Pasadena, TX", "Dallas, TX"]
+
+
+@pytest.fixture
+def site(use_site, monkeypatch):
+    monkeypatch.setattr(yellow_pages_scraper, "LATINO_HEAVY_LOCATIONS", CITIES)
+    # Seven result pages per city; Pasadena lists the same businesses as Houston.
+    site = FakeSite(pages=7, aliases={"Pasadena, TX": "Houston, TX"})
+    return use_site(site, yellow_pages_scraper, fallbacks=True)
+
+
+def run_workers(directory, job_id, workers=3):
+    threads = [
+        threading.Thread(target=work, args=(directory, job_id, f"worker-{number}")) for number in range(workers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+
+
+def test_job_is_split_per_city_and_page_block(site, tmp_path):
+    queue = WorkQueue(str(tmp_path))
+    job_id = queue.submit("yellow_pages", "plumber", "us_latino", 2000)
+    blocks = -(-yellow_pages_scraper.MAX_PAGES // work_queue.PAGES_PER_UNIT)
+    assert queue.summary(job_id)["units"] == {"pending": len(CITIES) * blocks}
+    assert work_queue.job_locations(yellow_pages_scraper, "Austin, TX") == ["Austin, TX", "Houston, TX"]
+    queue.close()
+
+
+def test_workers_merge_leads_with_job_wide_dedup(site, tmp_path):
+    queue = WorkQueue(str(tmp_path))
+    job_id = queue.submit("yellow_pages", "plumber", "us_latino", 2000)
+    run_workers(queue.directory, job_id)
+
+    leads = queue.leads(job_id)
+    summary = queue.summary(job_id)
+    # Pasadena only repeats Houston's listings.
+    assert len(leads) == summary["count"] == 2 * 7 * 30
+    assert [lead["location"] for lead in leads] == ["Houston, TX"] * 210 + ["Dallas, TX"] * 210
+    assert len({yellow_pages_scraper.lead_key(lead) for lead in leads}) == len(leads)
+    # Pages 1-5 and 6-7 of every city; the banner ends each city at page 7.
+    requested = [(request.location, request.page) for request in site.requests]
+    assert sorted(requested) == sorted((city, page) for city in CITIES for page in range(1, 8))
+    assert summary["units"]["done"] == 2 * len(CITIES) and "pending" not in summary["units"]
+    queue.close()
+
+
+def test_job_wide_limit_stops_every_worker(site, tmp_path):
+    queue = WorkQueue(str(tmp_path))
+    job_id = queue.submit("yellow_pages", "plumber", "us_latino", 50)
+    run_workers(queue.directory, job_id)
+
+    assert len(queue.leads(job_id)) == queue.summary(job_id)["count"] == 50
+    assert len(site.requests) < 3 * 7
+    queue.close()
+
+
+def test_unit_of_a_dead_worker_resumes_after_its_last_page(site, tmp_path, monkeypatch):
+    monkeypatch.setattr(work_queue, "LEASE_SECONDS", -1)  # every lease is already expired
+    queue = WorkQueue(str(tmp_path))
+    job_id = queue.submit("yellow_pages", "plumber", "Houston, TX", 2000)
+    unit = queue.claim("dead-worker", job_id)
+    queue.commit_page(unit, 1, [], yellow_pages_scraper.lead_key)
+    queue.commit_page(unit, 2, [], yellow_pages_scraper.lead_key)
+
+    resumed = queue.claim("other", job_id)
+    assert (resumed["unit_id"], resumed["next_page"], resumed["attempts"]) == (unit["unit_id"], 3, 1)
+    queue.close()
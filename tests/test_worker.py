@@ -0,0 +1,83 @@
+import io
+import json
+
+import worker
+from lead_store import LeadStore, remember
+from worker import serve
+
+
+def test_serve_answers_every_request_by_id():
+    def fake_scrape(keyword, location, limit, max_cities=None, max_per_host=None):
+        yield {"name": keyword, "location": location}
+        return {"count": 1, "status": 200}
+
+    requests = [
+        {"id": 1, "method": "ping"},
+        {"id": 2, "method": "scrape", "params": {"source": "fake", "keyword": "plumber", "location": "Houston, TX"}},
+        {"id": 3, "method": "scrape", "params": {"source": "missing", "keyword": "a", "location": "b"}},
+        {"id": 4, "method": "scrape", "params": {"source": "fake", "keyword": "roofer", "location": "Miami, FL"}},
+    ]
+    infile = io.StringIO("".join(json.dumps(r) + "\n" for r in requests))
+    outfile = io.StringIO()
+
+    serve(infile, outfile, max_jobs=2, scrapers={"fake": fake_scrape})
+
+    replies = {msg["id"]: msg for msg in map(json.loads, outfile.getvalue().splitlines())}
+    assert replies[1]["result"] == "pong"
+    assert replies[2]["result"]["leads"][0]["name"] == "plumber"
+    assert "Unknown source" in replies[3]["error"]["message"]
+    assert replies[4]["result"]["leads"][0]["location"] == "Miami, FL"
+
+
+def test_non_object_lines_get_an_error_and_the_worker_keeps_serving():
+    infile = io.StringIO('[]\n1\n"x"\n{"id": 5, "method": "ping"}\n')
+    outfile = io.StringIO()
+    serve(infile, outfile, scrapers={})
+
+    replies = [json.loads(line) for line in outfile.getvalue().splitlines()]
+    assert [reply["id"] for reply in replies] == [None, None, None, 5]
+    assert all("Invalid request" in reply["error"]["message"] for reply in replies[:3])
+    assert replies[3]["result"] == "pong"
+
+
+def test_stream_sends_leads_before_the_summary():
+    def fake_scrape(keyword, location, limit, max_cities=None, max_per_host=None):
+        for i in range(3):
+            yield {"name": f"{keyword}-{i}"}
+        return {"count": 3, "status": 200}
+
+    request = {"id": 7, "method": "scrape", "params": {"source": "fake", "keyword": "k", "location": "l", "stream": True}}
+    outfile = io.StringIO()
+    serve(io.StringIO(json.dumps(request) + "\n"), outfile, scrapers={"fake": fake_scrape})
+
+    messages = [json.loads(line) for line in outfile.getvalue().splitlines()]
+    assert [m["lead"]["name"] for m in messages[:3]] == ["k-0", "k-1", "k-2"]
+    assert messages[3] == {"id": 7, "result": {"count": 3, "status": 200}}
+
+
+def test_skip_known_records_only_the_leads_the_client_confirms(monkeypatch, tmp_path):
+    store = LeadStore(str(tmp_path / "leads.sqlite3"))
+    monkeypatch.setattr(worker, "get_store", lambda: store)
+    kept = {"name": "Acme Rooter", "phone": "713-555-0100"}
+    lost = {"name": "Lost Plumbing", "phone": "713-555-0199"}
+
+    def fake_scrape(keyword, location, limit, max_cities=None, max_per_host=None, store=None):
+        leads = [lead for lead in (kept, lost) if not store.known(lead)]
+        yield from remember(store, (lead for lead in leads), "fake")
+        return {"count": len(leads), "status": 200}
+
+    job = {"source": "fake", "keyword": "k", "location": "l", "skip_known": True}
+    requests = [
+        {"id": 1, "method": "scrape", "params": job},
+        {"id": 2, "method": "remember", "params": {"source": "fake", "leads": [kept]}},
+        {"id": 3, "method": "remember", "params": {"source": "fake", "leads": "nope"}},
+    ]
+    outfile = io.StringIO()
+    serve(io.StringIO("".join(json.dumps(r) + "\n" for r in requests)), outfile, max_jobs=1, scrapers={"fake": fake_scrape})
+
+    replies = {msg["id"]: msg for msg in map(json.loads, outfile.getvalue().splitlines())}
+    assert replies[1]["result"]["count"] == 2
+    assert replies[2]["result"] == {"recorded": 1}
+    assert "leads must be a list" in replies[3]["error"]["message"]
+    assert store.known(kept) and not store.known(lost)
+    store.close()